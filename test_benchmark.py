@@ -0,0 +1,58 @@
+import unittest
+from transient_heat_conduction.benchmarks.benchmark import (
+    run_benchmarks, compare_records, find_baseline, read_history,
+    benchmark_report)
+import numpy as np
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        """creates the records of a baseline run with noisy timings"""
+        rng = np.random.default_rng(0)
+        self.baseline = {"case": "robin_radiation", "label": "baseline",
+                         "total_times": list(1 + 0.02 * rng.random(10))}
+        self.baseline["total_time"] = np.median(self.baseline["total_times"])
+
+    def test_a_comparison(self):
+        """Tests that changes are only reported if they are above the
+        threshold and the noise of the timings"""
+        for factor, noise, status in [(1.2, 0.02, "slower"),
+                                      (0.8, 0.02, "faster"),
+                                      (1.02, 0.02, "unchanged"),
+                                      (1.2, 2, "unchanged")]:
+            rng = np.random.default_rng(1)
+            total_times = list(factor + noise * (rng.random(10) - 0.5))
+            record = {"total_times": total_times,
+                      "total_time": np.median(total_times)}
+            self.assertEqual(compare_records(record, self.baseline)[
+                "status"], status)
+
+    def test_b_history(self):
+        """Tests that the runs are appended to the history and compared
+        against the labelled baseline (or the previous run)"""
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            history_file = os.path.join(directory, "history.jsonl")
+            first = run_benchmarks(history_file, cases=["large_mesh"],
+                                   repeats=2, label="baseline")
+            self.assertIsNone(first[0]["comparison"])
+            record = first[0]["record"]
+            self.assertEqual(record["steps"], 29)
+            self.assertEqual(len(record["total_times"]), 2)
+            self.assertGreater(record["allocated_peak"], 0)
+            second = run_benchmarks(history_file, cases=["large_mesh"],
+                                    repeats=2, baseline="baseline")
+            self.assertIn(second[0]["comparison"]["status"],
+                          ["slower", "faster", "unchanged"])
+            history = read_history(history_file)
+        self.assertEqual(len(history), 2)
+        self.assertEqual(find_baseline(history, "large_mesh", "baseline"),
+                         history[0])
+        self.assertEqual(find_baseline(history, "large_mesh"), history[1])
+        self.assertIn("large_mesh", benchmark_report(second))
+
+
+if __name__ == '__main__':
+    unittest.main()
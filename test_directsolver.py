@@ -0,0 +1,281 @@
+import unittest
+from transient_heat_conduction.main_solver import main_solver
+import numpy as np
+
+
+class TestDirectSolver(unittest.TestCase):
+
+    def setUp(self):
+        """creates a small dirichlet problem that the solver can run in a
+        fraction of a second"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 11, "time_total": 200,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "dirichlet", "temperature_surface": 800,
+            "nhf": None, "ihf_type": "constant", "ihf_coefficients": 0,
+            "surface_losses_type": "linear", "h_total": 10,
+            "h_convective": None, "absorptivity": None, "emissivity": None,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0}
+
+    def test_a_terminal_event(self):
+        """Tests that a terminal event stops the solver and that the time of
+        the crossing lies between the last two time steps"""
+        self.problem_description_test["events"] = [
+            {"quantity": "back_temperature", "threshold": 400,
+             "name": "back_limit"},
+            {"quantity": "surface_temperature", "threshold": 100,
+             "terminal": False}]
+        solution = main_solver(self.problem_description_test)
+        sample = solution["sample"]
+        self.assertEqual([event["name"] for event in solution["events"]],
+                         ["back_limit"])
+        event_time = solution["events"][0]["time"]
+        self.assertLess(sample.temporal_mesh[-1], 200 - sample.dt[0])
+        self.assertTrue(sample.temporal_mesh[-2] < event_time <=
+                        sample.temporal_mesh[-1])
+        self.assertEqual(sample.temperatures.shape[1],
+                         sample.temporal_mesh.shape[0])
+        back = sample.temperatures.iloc[-1, -2:].values
+        np.testing.assert_allclose(np.interp(400, back,
+                                             sample.temporal_mesh[-2:]),
+                                   event_time)
+
+    def test_b_mass_loss_rate_event(self):
+        """Tests that the mass loss rate event is detected for a reactive
+        solid"""
+        self.problem_description_test.update({
+            "material_type": "reactive", "pre_exp_factor": 1e10,
+            "activation_energy": 1.5e5, "heat_reaction": 0,
+            "reaction_order": 1})
+        self.problem_description_test["events"] = [
+            {"quantity": "mass_loss_rate", "threshold": 1e-3}]
+        solution = main_solver(self.problem_description_test)
+        self.assertEqual(len(solution["events"]), 1)
+        self.assertLess(solution["events"][0]["time"], 200)
+
+    def test_c_neunman(self):
+        """Tests the neunman boundary condition against the analytical
+        solution for a semi-infinite solid"""
+        from transient_heat_conduction.validation_plots_analyticalsols.\
+            calc_analytical import calc_neunman
+        self.problem_description_test.update({
+            "depth": 0.02, "x_divisions": 41, "time_total": 60,
+            "boundcond_surface": "neunman", "nhf": 5000})
+        solution = main_solver(self.problem_description_test)
+        t = solution["sample"].temporal_mesh[-1]
+        np.testing.assert_allclose(
+            solution["sample"].temperatures.iloc[:, -1].values,
+            calc_neunman(solution, t), atol=2)
+
+    def test_d_ihf_time_series(self):
+        """Tests that a measured heat flux is resampled onto the temporal mesh
+        and gives the same result as the equivalent polynomial heat flux"""
+        self.problem_description_test.update({
+            "boundcond_surface": "robin", "ihf_type": "polynomial",
+            "ihf_coefficients": [10000, 100]})
+        solution_polynomial = main_solver(self.problem_description_test)
+        self.problem_description_test.update({
+            "ihf_type": "time_series",
+            "ihf_coefficients": np.array([[0, 10000], [300, 40000]])})
+        solution_series = main_solver(self.problem_description_test)
+        sample = solution_series["sample"]
+        np.testing.assert_allclose(sample.ihf,
+                                   10000 + 100 * sample.temporal_mesh)
+        np.testing.assert_allclose(
+            sample.temperatures.values,
+            solution_polynomial["sample"].temperatures.values)
+
+        # on demand evaluation with the cursor
+        for t in [250, 10, 10.5, 400]:
+            self.assertAlmostEqual(sample.ihf_function(t),
+                                   10000 + 100 * min(t, 300))
+
+    def test_e_checkpoint_restart(self):
+        """Tests that a run resumed from a checkpoint continues bit-for-bit,
+        including probes and events, and that a run can be warm started from
+        the final profile of another run"""
+        import os
+        import tempfile
+        self.problem_description_test.update({
+            "boundcond_surface": "robin", "ihf_coefficients": 30000,
+            "probe_depths": [0.0025], "probe_times": [10, 100, 190],
+            "events": [{"quantity": "surface_temperature",
+                        "threshold": 400, "terminal": False}]})
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_file = os.path.join(directory, "run.npz")
+            solution = main_solver(dict(self.problem_description_test,
+                                        checkpoint_file=checkpoint_file,
+                                        checkpoint_interval=50))
+            solution_resumed = main_solver(dict(self.problem_description_test,
+                                                resume_from=checkpoint_file))
+            sample, sample_resumed = (solution["sample"],
+                                      solution_resumed["sample"])
+            self.assertGreater(sample_resumed.t_step_start, 0)
+            self.assertTrue(np.all(np.isnan(
+                sample_resumed.temperatures.iloc[:, 1].values)))
+            np.testing.assert_array_equal(
+                sample.temperatures.iloc[:, -1].values,
+                sample_resumed.temperatures.iloc[:, -1].values)
+            np.testing.assert_array_equal(
+                solution["probes"].temperatures,
+                solution_resumed["probes"].temperatures)
+            self.assertEqual(solution["events"], solution_resumed["events"])
+
+            # warm start from the checkpoint and from the solution
+            for source in [checkpoint_file, solution]:
+                solution_warm = main_solver(dict(
+                    self.problem_description_test, x_divisions=21,
+                    warm_start_from=source))
+                initial = solution_warm["sample"].temperatures.iloc[
+                    :, 0].values
+                self.assertEqual(initial.shape[0], 21)
+                self.assertGreater(initial[0], 400)
+                if source is solution:
+                    profile = sample.temperatures.iloc[:, -1].values
+                else:
+                    with np.load(checkpoint_file) as checkpoint:
+                        profile = checkpoint["temperatures"]
+                np.testing.assert_allclose(initial[::2], profile)
+
+                # the profile is not stretched onto a different depth
+                with self.assertRaises(SystemExit):
+                    main_solver(dict(self.problem_description_test,
+                                     depth=0.02, warm_start_from=source))
+
+    def test_f_newton_constant_properties(self):
+        """Tests that the newton solver reproduces the linear Crank-Nicolson
+        scheme for constant properties and linear surface losses"""
+        self.problem_description_test.update({
+            "boundcond_surface": "robin", "ihf_coefficients": 30000})
+        solution_lagged = main_solver(self.problem_description_test)
+        solution_newton = main_solver(dict(self.problem_description_test,
+                                           nonlinear_solver="newton"))
+        np.testing.assert_allclose(
+            solution_newton["sample"].temperatures.values,
+            solution_lagged["sample"].temperatures.values, atol=1e-6)
+        self.assertEqual(solution_newton["diagnostics"][
+            "newton_not_converged"], 0)
+        self.assertTrue(np.all(solution_newton["diagnostics"][
+            "newton_iterations"] <= 3))
+
+    def test_g_newton_large_time_step(self):
+        """Tests that, for temperature dependent properties and re-radiation,
+        the newton solver with a large time step is closer to a reference
+        solution (small time step) than the lagged scheme"""
+        self.problem_description_test.update({
+            "properties_type": "temperature_dependent",
+            "conductivity_coeff": (0.2, 1.5), "density_coeff": (1196, 0),
+            "heat_capacity_coeff": (1549, 1),
+            "boundcond_surface": "robin", "ihf_coefficients": 80000,
+            "surface_losses_type": "non-linear", "h_convective": 10,
+            "absorptivity": 1, "emissivity": 1, "time_total": 100,
+            "nonlinear_solver": "newton"})
+        reference = main_solver(dict(self.problem_description_test,
+                                     time_step=0.5))
+        solution_newton = main_solver(dict(self.problem_description_test,
+                                           time_step=10))
+        solution_lagged = main_solver(dict(self.problem_description_test,
+                                           time_step=10,
+                                           nonlinear_solver="lagged"))
+        time = solution_newton["sample"].temporal_mesh[-1]
+        surface = {name: np.interp(
+            time, solution["sample"].temporal_mesh,
+            solution["sample"].temperatures.iloc[0, :].values)
+            for name, solution in [("reference", reference),
+                                   ("newton", solution_newton),
+                                   ("lagged", solution_lagged)]}
+        self.assertLess(abs(surface["newton"] - surface["reference"]),
+                        abs(surface["lagged"] - surface["reference"]))
+        self.assertLess(abs(surface["newton"] - surface["reference"]), 5)
+        self.assertGreater(solution_newton["diagnostics"][
+            "newton_iterations"].max(), 1)
+
+    def test_h_time_integrators(self):
+        """Tests that, with a large time step after the step of the surface
+        temperature, Crank-Nicolson oscillates while TR-BDF2 and Rannacher
+        give temperatures that never decrease in time, and that TR-BDF2 is
+        second order accurate for smooth boundary data"""
+        self.problem_description_test.update({
+            "x_divisions": 21, "time_total": 100})
+        for time_integrator in ["crank_nicolson", "rannacher", "tr_bdf2"]:
+            solution = main_solver(dict(self.problem_description_test,
+                                        time_integrator=time_integrator,
+                                        time_step=10))
+            decrease = np.diff(solution["sample"].temperatures.values[1:],
+                               axis=1).min()
+            if time_integrator == "crank_nicolson":
+                self.assertLess(decrease, -1)
+            else:
+                self.assertGreaterEqual(decrease, 0)
+
+        # smooth heat flux (ramp from zero)
+        self.problem_description_test.update({
+            "boundcond_surface": "robin", "ihf_type": "polynomial",
+            "ihf_coefficients": [0, 300]})
+        reference = main_solver(self.problem_description_test)
+        errors = []
+        for time_step in [5, 10]:
+            solution = main_solver(dict(self.problem_description_test,
+                                        time_integrator="tr_bdf2",
+                                        time_step=time_step))
+            sample = solution["sample"]
+            errors.append(abs(sample.temperatures.iloc[0, -1] - np.interp(
+                sample.temporal_mesh[-1], reference["sample"].temporal_mesh,
+                reference["sample"].temperatures.iloc[0, :].values)))
+        self.assertLess(errors[0], 0.1)
+        self.assertGreater(errors[1] / errors[0], 3)
+
+    def test_i_newton_back_face(self):
+        """Tests that the newton and lagged solvers give the same back face
+        temperatures for every back face boundary condition available
+        (insulated, conductive losses are rejected by both)"""
+        self.problem_description_test.update({
+            "boundcond_surface": "neunman", "nhf": 0,
+            "temperature_initial": 300, "time_total": 300})
+        for boundcond_back in ["insulated", "conductive_losses"]:
+            solutions = {}
+            for nonlinear_solver in ["lagged", "newton"]:
+                problem_description = dict(
+                    self.problem_description_test,
+                    boundcond_back=boundcond_back, conductivity_subs=0.5,
+                    nonlinear_solver=nonlinear_solver)
+                if boundcond_back != "insulated":
+                    with self.assertRaises(SystemExit):
+                        main_solver(problem_description)
+                    continue
+                solutions[nonlinear_solver] = main_solver(
+                    problem_description)["sample"].temperatures.values
+            if solutions:
+                np.testing.assert_allclose(solutions["newton"][-1],
+                                           solutions["lagged"][-1],
+                                           atol=1e-6)
+                np.testing.assert_allclose(solutions["newton"][:, -1], 300)
+
+    def test_j_reaction_units(self):
+        """Tests the units of the reaction parameters: the reaction rate
+        (kg/m3s) uses the activation energy in J/mol and the heat absorbed
+        (W/m3) the heat of reaction in J/kg"""
+        self.problem_description_test.update({
+            "material_type": "reactive", "pre_exp_factor": 1e10,
+            "activation_energy": 1.5e5, "heat_reaction": 1e6,
+            "reaction_order": 1, "time_total": 20})
+        sample = main_solver(self.problem_description_test)["sample"]
+        temperatures = sample.temperatures.iloc[:, 10].values
+        omega_dots = 1196 * 1e10 * np.exp(- 1.5e5 / 8.314 / temperatures)
+        np.testing.assert_allclose(sample.omega_dots.iloc[:, 10].values,
+                                   omega_dots)
+        np.testing.assert_allclose(sample.g_dots.iloc[:, 10].values,
+                                   omega_dots * 1e6)
+        self.assertGreater(omega_dots[0], 1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from transient_heat_conduction.main_solver import main_solver
+import numpy as np
+
+
+class TestDirectSolver2D(unittest.TestCase):
+
+    def setUp(self):
+        """creates a small robin problem with its 2-D geometry"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 11, "time_total": 60,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "robin", "temperature_surface": None,
+            "nhf": None, "ihf_type": "constant", "ihf_coefficients": 20000,
+            "surface_losses_type": "non-linear", "h_total": None,
+            "h_convective": 10, "absorptivity": 0.9, "emissivity": 0.9,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0,
+            "geometry": "2d_planar", "width": 0.02, "y_divisions": 11,
+            "boundcond_side": "insulated", "h_side": None}
+
+    def test_a_insulated_side_matches_1d(self):
+        """Tests that, with insulated sides, every column of nodes follows the
+        1-D solution (both 2-D solvers and both geometries). ADI imposes the
+        dirichlet surface temperature at the start of the first step, hence
+        the tolerance of 1 K"""
+        for boundcond_surface in ["dirichlet", "robin"]:
+            self.problem_description_test.update({
+                "boundcond_surface": boundcond_surface,
+                "temperature_surface": 600})
+            problem_1d = dict(self.problem_description_test,
+                              geometry="1d")
+            solution_1d = main_solver(problem_1d)
+            for geometry in ["2d_planar", "2d_axisymmetric"]:
+                for solver_2d in ["adi", "sparse"]:
+                    self.problem_description_test.update({
+                        "geometry": geometry, "solver_2d": solver_2d})
+                    solution = main_solver(self.problem_description_test)
+                    sample = solution["sample"]
+                    np.testing.assert_allclose(
+                        sample.temperatures_2d[-1],
+                        np.tile(solution_1d["sample"].temperatures.iloc[
+                            :, -1].values[:, np.newaxis], (1, 11)),
+                        atol=1)
+
+    def test_b_convective_side(self):
+        """Tests that losses at the side cool the edge of the sample, and that
+        ADI and the sparse solver agree"""
+        self.problem_description_test.update({
+            "boundcond_side": "convective", "h_side": 50,
+            "geometry": "2d_axisymmetric", "output_interval": 10})
+        solutions = {}
+        for solver_2d in ["adi", "sparse"]:
+            self.problem_description_test["solver_2d"] = solver_2d
+            solutions[solver_2d] = main_solver(self.problem_description_test)
+        sample = solutions["adi"]["sample"]
+        self.assertEqual(sample.temperatures_2d.shape[0],
+                         sample.output_times.shape[0])
+        self.assertEqual(sample.output_times[-1], sample.temporal_mesh[-1])
+        self.assertTrue(np.all(sample.temperatures_2d[-1][:, -1] <
+                               sample.temperatures_2d[-1][:, 0]))
+        np.testing.assert_allclose(
+            sample.temperatures_2d[-1],
+            solutions["sparse"]["sample"].temperatures_2d[-1], atol=0.5)
+
+    def test_c_output_interval(self):
+        """Tests that the fields are stored at every time step if the output
+        interval is None, and that invalid output intervals are rejected"""
+        sample = main_solver(dict(self.problem_description_test,
+                                  output_interval=None))["sample"]
+        np.testing.assert_array_equal(sample.output_times,
+                                      sample.temporal_mesh)
+        for output_interval in [0, 2.5, "ten"]:
+            with self.assertRaises(SystemExit):
+                main_solver(dict(self.problem_description_test,
+                                 output_interval=output_interval))
+
+
+if __name__ == '__main__':
+    unittest.main()
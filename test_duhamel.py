@@ -0,0 +1,92 @@
+import unittest
+from transient_heat_conduction.main_solver import main_solver
+from transient_heat_conduction.direct_solution.duhamel_solver import (
+    calc_flux_histories)
+import numpy as np
+
+
+class TestDuhamel(unittest.TestCase):
+
+    def setUp(self):
+        """creates a small robin problem with linear surface losses"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 11, "time_total": 300,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 300,
+            "boundcond_surface": "robin", "temperature_surface": 800,
+            "nhf": 5000, "ihf_type": "sinusoidal",
+            "ihf_coefficients": [20000, 0.05, 0.3],
+            "surface_losses_type": "linear", "h_total": 15,
+            "h_convective": None, "absorptivity": 0.9, "emissivity": None,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0}
+
+    def test_a_numerical_step_response(self):
+        """Tests that, with the numerical step response, the convolution
+        reproduces the time stepping solution to round-off"""
+        for boundcond_surface in ["dirichlet", "neunman", "robin"]:
+            self.problem_description_test[
+                "boundcond_surface"] = boundcond_surface
+            solution = main_solver(self.problem_description_test)
+            solution_duhamel = main_solver(dict(
+                self.problem_description_test, direct_method="duhamel",
+                duhamel_step_response="numerical"))
+            np.testing.assert_allclose(
+                solution_duhamel["sample"].temperatures.values,
+                solution["sample"].temperatures.values, atol=1e-8)
+
+    def test_b_analytical_step_response(self):
+        """Tests the series step responses against the time stepping
+        solution (discretization error only) at the probes"""
+        for boundcond_surface in ["dirichlet", "neunman", "robin"]:
+            self.problem_description_test.update({
+                "boundcond_surface": boundcond_surface, "x_divisions": 21,
+                "time_total": 150, "probe_depths": [0.001, 0.005, 0.01],
+                "probe_times": [30, 90, 145]})
+            solution = main_solver(self.problem_description_test)
+            solution_duhamel = main_solver(dict(
+                self.problem_description_test, direct_method="duhamel"))
+            rise = solution["probes"].temperatures - 300
+            np.testing.assert_allclose(
+                solution_duhamel["probes"].temperatures - 300, rise,
+                rtol=0.02, atol=1)
+
+    def test_c_flux_histories(self):
+        """Tests that many ihf histories are solved from the step response
+        of one solution"""
+        solution = main_solver(dict(self.problem_description_test,
+                                    direct_method="duhamel"))
+        sample = solution["sample"]
+        histories = np.array([np.full_like(sample.temporal_mesh, 10000),
+                              sample.ihf])
+        temperatures = calc_flux_histories(
+            sample, self.problem_description_test, histories)
+        self.assertEqual(temperatures.shape,
+                         (2,) + sample.temperatures.shape)
+        np.testing.assert_allclose(temperatures[1],
+                                   sample.temperatures.values)
+        # steady state of the constant ihf
+        self.assertLess(temperatures[0, 0, -1],
+                        288 + 0.9 * 10000 / 15)
+
+    def test_d_options_not_available(self):
+        """Tests that the options of the time stepping solver are rejected
+        instead of being ignored"""
+        for property_name, value in [("warm_start_from", "run.npz"),
+                                     ("nonlinear_solver", "newton"),
+                                     ("time_integrator", "tr_bdf2"),
+                                     ("energy_tolerance", 0.01)]:
+            with self.assertRaises(SystemExit):
+                main_solver(dict(self.problem_description_test,
+                                 direct_method="duhamel",
+                                 **{property_name: value}))
+
+
+if __name__ == '__main__':
+    unittest.main()
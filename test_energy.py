@@ -0,0 +1,110 @@
+import unittest
+from transient_heat_conduction.main_solver import main_solver
+import numpy as np
+
+
+class TestEnergyBalance(unittest.TestCase):
+
+    def setUp(self):
+        """creates a robin problem with linear losses"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 21, "time_total": 120,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "robin", "temperature_surface": None,
+            "nhf": None, "ihf_type": "constant", "ihf_coefficients": 30000,
+            "surface_losses_type": "linear", "h_total": 10,
+            "h_convective": None, "absorptivity": None, "emissivity": None,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0}
+        self.temperature_dependent = {
+            "properties_type": "temperature_dependent",
+            "conductivity_coeff": (0.2, 0.5), "density_coeff": (1196, 0),
+            "heat_capacity_coeff": (1549, 0.8), "time_step": 5}
+
+    def test_a_linear_problems_conserve_energy(self):
+        """Tests that Crank-Nicolson conserves energy to round-off for
+        linear problems (every surface boundary condition, linearized
+        re-radiation and a reaction sink) and
+        that the stored energy is the one of the temperatures"""
+        for problem_update in [
+                {}, {"boundcond_surface": "neunman", "nhf": 20000},
+                {"surface_losses_type": "non-linear", "h_convective": 10,
+                 "absorptivity": 0.9, "emissivity": 0.9},
+                {"boundcond_surface": "dirichlet",
+                 "temperature_surface": 600},
+                {"material_type": "reactive", "pre_exp_factor": 1e10,
+                 "activation_energy": 1.5e5, "heat_reaction": 1e6,
+                 "reaction_order": 1}]:
+            solution = main_solver(dict(self.problem_description_test,
+                                        **problem_update))
+            balance = solution["diagnostics"]["energy_balance"]
+            self.assertLess(abs(balance["relative_imbalance"]), 1e-10)
+            temperatures = solution["sample"].temperatures.values
+            temperature_rise = temperatures[:, -1] - temperatures[:, 0]
+            stored = 1196 * 1549 * solution["sample"].dx * (
+                np.sum(temperature_rise) -
+                (temperature_rise[0] + temperature_rise[-1]) / 2)
+            self.assertAlmostEqual(balance["stored"] / stored, 1)
+            if "material_type" in problem_update:
+                self.assertGreater(balance["reaction"], 0)
+
+    def test_b_imbalance_of_large_time_steps(self):
+        """Tests that the lagged scheme with large time steps is flagged and
+        stopped by the energy tolerance, and that newton iterations reduce
+        the imbalance"""
+        solution = main_solver(dict(self.problem_description_test,
+                                    **self.temperature_dependent,
+                                    energy_tolerance=2e-2,
+                                    energy_terminal=True))
+        balance = solution["diagnostics"]["energy_balance"]
+        self.assertGreater(abs(balance["relative_imbalance"]), 2e-2)
+        self.assertEqual(solution["sample"].temporal_mesh[-1],
+                         balance["exceeded_time"])
+        self.assertLess(balance["exceeded_time"], 115)
+
+        solution = main_solver(dict(self.problem_description_test,
+                                    **self.temperature_dependent,
+                                    nonlinear_solver="newton",
+                                    energy_tolerance=2e-2))
+        balance = solution["diagnostics"]["energy_balance"]
+        self.assertIsNone(balance["exceeded_time"])
+        self.assertEqual(solution["sample"].temporal_mesh[-1], 115)
+
+    def test_c_resumed_balance(self):
+        """Tests that a run resumed from a checkpoint continues the running
+        energy balance and the newton diagnostics of the whole run"""
+        import os
+        import tempfile
+        problem_description = dict(self.problem_description_test,
+                                   **self.temperature_dependent,
+                                   nonlinear_solver="newton")
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_file = os.path.join(directory, "run.npz")
+            solution = main_solver(dict(problem_description,
+                                        checkpoint_file=checkpoint_file,
+                                        checkpoint_interval=10))
+            solution_resumed = main_solver(dict(problem_description,
+                                                resume_from=checkpoint_file))
+        self.assertGreater(solution_resumed["sample"].t_step_start, 0)
+        for name, value in solution["diagnostics"][
+                "energy_balance"].items():
+            if value is None:
+                self.assertIsNone(solution_resumed["diagnostics"][
+                    "energy_balance"][name])
+            else:
+                self.assertAlmostEqual(solution_resumed["diagnostics"][
+                    "energy_balance"][name], value)
+        np.testing.assert_array_equal(
+            solution["diagnostics"]["newton_iterations"],
+            solution_resumed["diagnostics"]["newton_iterations"])
+
+
+if __name__ == '__main__':
+    unittest.main()
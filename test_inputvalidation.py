@@ -161,6 +161,16 @@ class TestInputValidation(unittest.TestCase):
             with self.assertRaises(SystemExit) as cm:
                 main_solver(self.problem_description_test)
             self.assertEqual(cm.exception.code, 1)
+
+        # measured heat flux (time series)
+        self.problem_description_test["ihf_type"] = "time_series"
+        for ihf_coefficients in [[1, 2, 3], [[0, 1], [0, 2]],
+                                 [[0, 1, 2], [1, 2, 3]], "missing_file.csv"]:
+            self.problem_description_test[
+                "ihf_coefficients"] = ihf_coefficients
+            with self.assertRaises(SystemExit) as cm:
+                main_solver(self.problem_description_test)
+            self.assertEqual(cm.exception.code, 1)
         self.problem_description_test["ihf_type"] = "constant"
         self.problem_description_test["ihf_coefficients"] = 10
 
@@ -203,6 +213,13 @@ class TestInputValidation(unittest.TestCase):
         with self.assertRaises(SystemExit) as cm:
             main_solver(self.problem_description_test)
         self.assertEqual(cm.exception.code, 1)
+
+        # conductive losses are not available (the substrate is not
+        # modelled)
+        self.problem_description_test["conductivity_subs"] = 0.5
+        with self.assertRaises(SystemExit) as cm:
+            main_solver(self.problem_description_test)
+        self.assertEqual(cm.exception.code, 1)
         self.problem_description_test["boundcond_back"] = "insulated"
 
     def test_n_pyrolysis(self):
@@ -229,5 +246,118 @@ class TestInputValidation(unittest.TestCase):
             main_solver(self.problem_description_test)
         self.assertEqual(cm.exception.code, 1)
 
+    def test_p_probes(self):
+        """Tests that probe depths lie within the sample and that probe times
+        are increasing and within the temporal mesh"""
+        self.problem_description_test["in-depth_absorptivity"] = 0
+        for probe_depths in [[-1], [11], ["value"]]:
+            self.problem_description_test["probe_depths"] = probe_depths
+            with self.assertRaises(SystemExit) as cm:
+                main_solver(self.problem_description_test)
+            self.assertEqual(cm.exception.code, 1)
+
+        self.problem_description_test["probe_depths"] = [5]
+        for probe_times in [[2, 1], [11], [-1]]:
+            self.problem_description_test["probe_times"] = probe_times
+            with self.assertRaises(SystemExit) as cm:
+                main_solver(self.problem_description_test)
+            self.assertEqual(cm.exception.code, 1)
+
+        # probe times after the last time step (temporal mesh 0, 3, 6, 9)
+        self.problem_description_test["probe_times"] = [9.5]
+        with self.assertRaises(SystemExit) as cm:
+            main_solver(dict(self.problem_description_test, time_step=3))
+        self.assertEqual(cm.exception.code, 1)
+
+        # probe times without probe depths
+        self.problem_description_test["probe_depths"] = None
+        self.problem_description_test["probe_times"] = [1, 2]
+        with self.assertRaises(SystemExit) as cm:
+            main_solver(self.problem_description_test)
+        self.assertEqual(cm.exception.code, 1)
+
+    def test_q_events(self):
+        """Tests that events have a known quantity, a numeric threshold and a
+        valid direction"""
+        self.problem_description_test["in-depth_absorptivity"] = 0
+        for event in [{"quantity": None, "threshold": 1},
+                      {"quantity": "surface_temperature", "threshold": None},
+                      {"quantity": "surface_temperature", "threshold": 1,
+                       "direction": "up"}]:
+            self.problem_description_test["events"] = [event]
+            with self.assertRaises(SystemExit) as cm:
+                main_solver(self.problem_description_test)
+            self.assertEqual(cm.exception.code, 1)
+
+        self.problem_description_test["events"] = "surface_temperature"
+        with self.assertRaises(SystemExit) as cm:
+            main_solver(self.problem_description_test)
+        self.assertEqual(cm.exception.code, 1)
+
+    def test_r_geometry(self):
+        """Tests that the geometry is valid and that 2-D problems define the
+        lateral mesh and a valid side boundary condition"""
+        self.problem_description_test["in-depth_absorptivity"] = 0
+        self.problem_description_test["geometry"] = "3d"
+        with self.assertRaises(SystemExit) as cm:
+            main_solver(self.problem_description_test)
+        self.assertEqual(cm.exception.code, 1)
+
+        self.problem_description_test.update({
+            "geometry": "2d_axisymmetric", "width": 10, "y_divisions": 10})
+        for property_name, value in [("width", None), ("y_divisions", None),
+                                     ("boundcond_side", "radiative"),
+                                     ("solver_2d", "explicit"),
+                                     ("output_interval", 0),
+                                     ("nonlinear_solver", "newton"),
+                                     ("time_integrator", "tr_bdf2"),
+                                     ("energy_tolerance", 0.01)]:
+            problem_description = dict(self.problem_description_test)
+            problem_description[property_name] = value
+            with self.assertRaises(SystemExit) as cm:
+                main_solver(problem_description)
+            self.assertEqual(cm.exception.code, 1)
+
+        self.problem_description_test["boundcond_side"] = "convective"
+        self.problem_description_test["h_side"] = None
+        with self.assertRaises(SystemExit) as cm:
+            main_solver(self.problem_description_test)
+        self.assertEqual(cm.exception.code, 1)
+
+    def test_s_checkpoints(self):
+        """Tests that checkpoints need a valid interval and that restart and
+        warm start files exist"""
+        self.problem_description_test["in-depth_absorptivity"] = 0
+        for property_name, value in [("checkpoint_file", "run.npz"),
+                                     ("resume_from", "missing_file.npz"),
+                                     ("warm_start_from", "missing_file.npz")]:
+            problem_description = dict(self.problem_description_test)
+            problem_description[property_name] = value
+            with self.assertRaises(SystemExit) as cm:
+                main_solver(problem_description)
+            self.assertEqual(cm.exception.code, 1)
+
+    def test_t_nonlinear_solver(self):
+        """Tests the time step, the non-linear solver, the parameters of the
+        newton iterations and the time integrator"""
+        self.problem_description_test["in-depth_absorptivity"] = 0
+        for property_name, value in [("time_step", -1),
+                                     ("time_step", "large"),
+                                     ("nonlinear_solver", "picard"),
+                                     ("newton_tolerance", 0),
+                                     ("newton_max_iterations", 2.5),
+                                     ("time_integrator", "tr_bdf2"),
+                                     ("time_integrator", "bdf3")]:
+            problem_description = dict(self.problem_description_test,
+                                       nonlinear_solver="newton")
+            problem_description[property_name] = value
+            with self.assertRaises(SystemExit) as cm:
+                main_solver(problem_description)
+            self.assertEqual(cm.exception.code, 1)
+        with self.assertRaises(SystemExit) as cm:
+            main_solver(dict(self.problem_description_test,
+                             time_integrator="rannacher", startup_steps=-1))
+        self.assertEqual(cm.exception.code, 1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from transient_heat_conduction.mesh_independence.mesh_study import (
+    mesh_study, calc_richardson)
+import numpy as np
+
+
+class TestMeshStudy(unittest.TestCase):
+
+    def setUp(self):
+        """creates a small neunman problem that the solver can run over
+        three meshes in a few seconds"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 6, "time_total": 60,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "neunman", "temperature_surface": None,
+            "nhf": 5000, "ihf_type": "constant", "ihf_coefficients": 0,
+            "surface_losses_type": "linear", "h_total": 10,
+            "h_convective": None, "absorptivity": None, "emissivity": None,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0}
+
+    def test_a_richardson(self):
+        """Tests the Richardson extrapolation of an output with a known
+        second order error"""
+        values = [1 + 0.1 * h**2 for h in [0.4, 0.2, 0.1]]
+        order, extrapolated, gci = calc_richardson(values, 2)
+        self.assertAlmostEqual(order, 2)
+        self.assertAlmostEqual(extrapolated, 1)
+        self.assertAlmostEqual(gci, 1.25 * (values[2] - 1) / values[2])
+
+    def test_b_mesh_study(self):
+        """Tests that the study converges, recommends one of the meshes for a
+        loose tolerance and reuses previous results"""
+        results = mesh_study(self.problem_description_test,
+                             outputs=["surface_temperature"], tolerance=0.05)
+        self.assertEqual(results["x_divisions"], [6, 11, 21])
+        self.assertGreater(results["observed_order"]["surface_temperature"],
+                           1)
+        self.assertIn(results["recommended_x_divisions"],
+                      results["x_divisions"])
+        errors = results["relative_errors"]["surface_temperature"]
+        self.assertTrue(np.all(np.diff(errors) < 0))
+
+        # a tighter tolerance with an additional mesh reuses the first three
+        results_refined = mesh_study(self.problem_description_test,
+                                     outputs=["surface_temperature"],
+                                     levels=4, tolerance=1e-6,
+                                     previous_results=results)
+        self.assertEqual(results_refined["computing_time"][:3],
+                         results["computing_time"])
+        self.assertGreater(results_refined["recommended_x_divisions"], 41)
+
+    def test_c_probes(self):
+        """Tests that the probes are compared at the same sampling times on
+        every mesh (probe times required)"""
+        self.problem_description_test["probe_depths"] = [0.002, 0.004]
+        with self.assertRaises(SystemExit):
+            mesh_study(self.problem_description_test, outputs=["probes"])
+        self.problem_description_test["probe_times"] = [10, 30, 50]
+        results = mesh_study(self.problem_description_test,
+                             outputs=["probes"], levels=2)
+        self.assertEqual(results["extrapolated"]["probes"].shape, (3, 2))
+
+    def test_d_evaluation_time(self):
+        """Tests that the outputs are compared at the evaluation time given
+        and that times outside the simulated time are rejected instead of
+        clamped"""
+        results = mesh_study(self.problem_description_test, levels=2,
+                             evaluation_time=30)
+        self.assertEqual(results["evaluation_time"], 30)
+        for evaluation_time in [-1, 1000]:
+            with self.assertRaises(SystemExit):
+                mesh_study(self.problem_description_test, levels=2,
+                           evaluation_time=evaluation_time)
+        with self.assertRaises(SystemExit):
+            mesh_study(self.problem_description_test, levels=2,
+                       evaluation_time=40, previous_results=results)
+
+        # after the last time step of the meshes (time_total excluded)
+        self.problem_description_test["time_step"] = 7
+        with self.assertRaises(SystemExit):
+            mesh_study(self.problem_description_test, levels=2,
+                       evaluation_time=59)
+
+
+if __name__ == '__main__':
+    unittest.main()
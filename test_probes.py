@@ -0,0 +1,82 @@
+import unittest
+from transient_heat_conduction.main_solver import main_solver
+import numpy as np
+
+
+class TestProbes(unittest.TestCase):
+
+    def setUp(self):
+        """creates a small dirichlet problem that the solver can run in a
+        fraction of a second"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 11, "time_total": 30,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "dirichlet", "temperature_surface": 800,
+            "nhf": None, "ihf_type": "constant", "ihf_coefficients": 0,
+            "surface_losses_type": "linear", "h_total": 10,
+            "h_convective": None, "absorptivity": None, "emissivity": None,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0}
+
+    def test_a_probes_at_nodes(self):
+        """Tests that probes placed at nodes reproduce the temperature field
+        at every time step"""
+        self.problem_description_test["probe_depths"] = [0, 0.003, 0.01]
+        solution = main_solver(self.problem_description_test)
+        sample = solution["sample"]
+        probes = solution["probes"]
+        self.assertEqual(probes.temperatures.shape,
+                         (sample.temporal_mesh.shape[0], 3))
+        np.testing.assert_allclose(
+            probes.temperatures,
+            sample.temperatures.iloc[[0, 3, 10], :].values.T.astype(float))
+
+    def test_b_probes_interpolation(self):
+        """Tests the linear interpolation of the probes in space and time"""
+        self.problem_description_test["probe_depths"] = [0.0015]
+        self.problem_description_test["probe_times"] = [0, 5, 12.5]
+        solution = main_solver(self.problem_description_test)
+        sample = solution["sample"]
+        field = sample.temperatures.values.astype(float)
+        in_space = (field[1, :] + field[2, :]) / 2
+        expected = np.interp([0, 5, 12.5], sample.temporal_mesh, in_space)
+        np.testing.assert_allclose(solution["probes"].temperatures[:, 0],
+                                   expected)
+
+    def test_c_probes_only(self):
+        """Tests that with the probes as the only output the probes are the
+        same while the fields keep only the last two time steps"""
+        self.problem_description_test["probe_depths"] = [0.0015, 0.007]
+        self.problem_description_test["probe_times"] = [0, 5, 12.5]
+        solution = main_solver(self.problem_description_test)
+        solution_probes = main_solver(dict(self.problem_description_test,
+                                           probes_only=True))
+        np.testing.assert_array_equal(solution_probes["probes"].temperatures,
+                                      solution["probes"].temperatures)
+        temperatures = solution_probes["sample"].temperatures
+        self.assertEqual(temperatures.values.shape, (11, 2))
+        self.assertLess(temperatures.nbytes, 11 * 3 * 8)
+        np.testing.assert_array_equal(
+            temperatures.values,
+            solution["sample"].temperatures.values[:, -2:])
+        np.testing.assert_array_equal(
+            temperatures.columns, solution["sample"].temporal_mesh[-2:])
+        with self.assertRaises(IndexError):
+            temperatures.iloc[:, 0]
+
+        self.problem_description_test["probe_depths"] = None
+        self.problem_description_test["probe_times"] = None
+        with self.assertRaises(SystemExit):
+            main_solver(dict(self.problem_description_test,
+                             probes_only=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
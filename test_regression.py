@@ -0,0 +1,80 @@
+import unittest
+from transient_heat_conduction.main_solver import main_solver
+import numpy as np
+
+
+class TestSurfaceRegression(unittest.TestCase):
+
+    def setUp(self):
+        """creates a reactive (pmma) sample exposed to a high heat flux"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 21, "time_total": 200,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "robin", "temperature_surface": None,
+            "nhf": None, "ihf_type": "constant", "ihf_coefficients": 40000,
+            "surface_losses_type": "non-linear", "h_total": None,
+            "h_convective": 10, "absorptivity": 0.9, "emissivity": 0.9,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "reactive", "pre_exp_factor": 8.5e12,
+            "activation_energy": 1.88e5, "heat_reaction": 8.7e5,
+            "reaction_order": 1, "in-depth_absorptivity": 0,
+            "time_step": 0.5, "surface_regression": True}
+
+    def test_a_mass_and_energy(self):
+        """Tests that the surface recedes by the mass lost over the virgin
+        density, that the nodes span the remaining thickness, that probes
+        reached by the surface read the surface temperature and that energy
+        is conserved"""
+        solution = main_solver(dict(self.problem_description_test,
+                                    probe_depths=[0.0005, 0.005]))
+        sample = solution["sample"]
+        surface_position = sample.surface_position
+        self.assertTrue(np.all(np.diff(surface_position) >= 0))
+        self.assertGreater(surface_position[-1], 0.0005)
+
+        omega_dots = sample.omega_dots.values[:, :-1]
+        dx = (sample.depth - surface_position[:-1]) / (
+            sample.x_divisions - 1)
+        mass_lost = np.sum(0.5 * dx * (
+            np.sum(omega_dots, axis=0) -
+            (omega_dots[0] + omega_dots[-1]) / 2))
+        self.assertAlmostEqual(surface_position[-1], mass_lost / 1196)
+
+        positions = sample.node_positions(-1)
+        self.assertAlmostEqual(positions[0], surface_position[-1])
+        self.assertAlmostEqual(positions[-1], sample.depth)
+        self.assertAlmostEqual(solution["probes"].temperatures[-1, 0],
+                               sample.temperatures.iloc[0, -1])
+
+        balance = solution["diagnostics"]["energy_balance"]
+        self.assertGreater(balance["regression"], 0)
+        self.assertLess(abs(balance["relative_imbalance"]), 1e-3)
+
+    def test_b_coarse_mesh(self):
+        """Tests that the surface position of a coarse mesh is close to the
+        one of a mesh twice as fine"""
+        positions = [main_solver(dict(self.problem_description_test,
+                                      x_divisions=x_divisions))[
+            "sample"].surface_position[-1] for x_divisions in [21, 41]]
+        self.assertLess(abs(positions[0] / positions[1] - 1), 0.05)
+
+    def test_c_validation(self):
+        """Tests that surface regression is only available for reactive
+        samples and the lagged crank_nicolson scheme"""
+        for problem_update in [{"material_type": "inert"},
+                               {"nonlinear_solver": "newton"},
+                               {"time_integrator": "tr_bdf2"},
+                               {"surface_regression": "yes"}]:
+            with self.assertRaises(SystemExit) as cm:
+                main_solver(dict(self.problem_description_test,
+                                 **problem_update))
+            self.assertEqual(cm.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from transient_heat_conduction.main_solver import main_solver
+from transient_heat_conduction.service.solver_service import (
+    solver_service, submit_job, job_result)
+import numpy as np
+import time
+import urllib.error
+import urllib.request
+
+
+class TestService(unittest.TestCase):
+
+    def setUp(self):
+        """creates a small robin problem and a service with one worker (not
+        started)"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 11, "time_total": 60,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "robin", "temperature_surface": None,
+            "nhf": None, "ihf_type": "constant", "ihf_coefficients": 20000,
+            "surface_losses_type": "non-linear", "h_total": None,
+            "h_convective": 10, "absorptivity": 0.9, "emissivity": 0.9,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0,
+            "time_step": 1}
+        self.service = solver_service(workers=1)
+
+    def tearDown(self):
+        """stops the service"""
+        self.service.shutdown()
+
+    def test_a_jobs(self):
+        """Tests that the jobs queued before the service starts run by
+        priority, that identical jobs are solved once and that the solutions
+        are the ones of main_solver"""
+        low = self.service.submit(self.problem_description_test)
+        high = self.service.submit(dict(self.problem_description_test,
+                                        ihf_coefficients=30000), priority=5)
+        duplicate = self.service.submit(self.problem_description_test)
+        self.assertTrue(duplicate["duplicate"])
+        self.assertEqual(duplicate["job_id"], low["job_id"])
+        self.service.start()
+
+        results = [job_result(self.service.url, job["job_id"])
+                   for job in [low, high]]
+        self.assertEqual([result["status"] for result in results],
+                         ["done", "done"])
+        self.assertLess(results[1]["started"], results[0]["started"])
+        temperatures = main_solver(self.problem_description_test)[
+            "sample"].temperatures.values
+        np.testing.assert_allclose(results[0]["solution"]["temperatures"],
+                                   temperatures)
+
+        # once finished, the same problem is solved again
+        again = submit_job(self.service.url, self.problem_description_test)
+        self.assertFalse(again["duplicate"])
+        self.assertNotEqual(again["job_id"], low["job_id"])
+        self.assertEqual(self.service.status()["workers"], 1)
+
+    def test_b_failed_and_cancelled(self):
+        """Tests that problems that are not valid fail with the error of the
+        validation and that queued jobs can be cancelled"""
+        queued = self.service.submit(self.problem_description_test)
+        self.assertTrue(self.service.delete(queued["job_id"]))
+        self.service.start()
+        self.assertEqual(job_result(self.service.url,
+                                    queued["job_id"])["status"],
+                         "cancelled")
+        job = submit_job(self.service.url, dict(
+            self.problem_description_test, boundcond_surface="none"))
+        result = job_result(self.service.url, job["job_id"])
+        self.assertEqual(result["status"], "failed")
+        self.assertTrue(result["error"].startswith("Error"))
+
+        # the time to wait for a job must be a number of seconds
+        for wait in ["abc", "-1", "nan"]:
+            with self.assertRaises(urllib.error.HTTPError) as cm:
+                urllib.request.urlopen(
+                    f"{self.service.url}/jobs/{job['job_id']}?wait={wait}")
+            self.assertEqual(cm.exception.code, 400)
+
+    def test_c_retention(self):
+        """Tests that only the last max_finished finished jobs are kept and
+        that the finished jobs expire after the retention"""
+        self.service.server.server_close()
+        self.service = solver_service(workers=1, retention=0.5,
+                                      max_finished=1).start()
+        jobs = [submit_job(self.service.url, dict(
+            self.problem_description_test, ihf_coefficients=ihf))
+            for ihf in [20000, 30000]]
+        for job in jobs:
+            self.assertIsNotNone(self.service.job(job["job_id"], wait=60))
+        self.assertIsNone(self.service.job(jobs[0]["job_id"]))
+        self.assertEqual(self.service.job(jobs[1]["job_id"])["status"],
+                         "done")
+        time.sleep(0.6)
+        self.assertEqual(self.service.status()["finished"], 0)
+        self.assertIsNone(self.service.job(jobs[1]["job_id"]))
+
+    def test_d_worker_crash(self):
+        """Tests that the job of a worker that dies fails and that the pool
+        is recreated for the next jobs"""
+        self.service.start()
+        pool = self.service.pool
+        job = submit_job(self.service.url, dict(
+            self.problem_description_test, time_total=200000))
+        while self.service.job(job["job_id"])["status"] != "running":
+            time.sleep(0.01)
+        for process in list(pool._processes.values()):
+            process.kill()
+        result = job_result(self.service.url, job["job_id"])
+        self.assertEqual(result["status"], "failed")
+        self.assertIn("BrokenProcessPool", result["error"])
+        self.assertIsNot(self.service.pool, pool)
+        job = submit_job(self.service.url, self.problem_description_test)
+        self.assertEqual(job_result(self.service.url,
+                                    job["job_id"])["status"], "done")
+
+
+if __name__ == '__main__':
+    unittest.main()
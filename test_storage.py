@@ -0,0 +1,110 @@
+import unittest
+from transient_heat_conduction.main_solver import main_solver
+from transient_heat_conduction.classes_and_functions.storage import (
+    save_solution, load_solution)
+import numpy as np
+
+
+class TestStorage(unittest.TestCase):
+
+    def setUp(self):
+        """creates a robin problem with temperature dependent properties"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 21, "time_total": 120,
+            "properties_type": "temperature_dependent",
+            "conductivity_coeff": (0.2, 0.0005),
+            "density_coeff": (1196, 0),
+            "heat_capacity_coeff": (1549, 2),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "robin", "temperature_surface": None,
+            "nhf": None, "ihf_type": "constant", "ihf_coefficients": 40000,
+            "surface_losses_type": "non-linear", "h_total": None,
+            "h_convective": 10, "absorptivity": 0.9, "emissivity": 0.9,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0}
+        self.storage = {
+            "temperatures": {"dtype": "int16"},
+            "conductivity": {"dtype": "float32", "decimation": 10},
+            "fo": {"store": False}, "upsilon": {"store": False}}
+
+    def test_a_compact_storage(self):
+        """Tests that the compacted fields are the full fields to the
+        resolution of their dtype, and that they are saved and loaded"""
+        import os
+        import tempfile
+        sample = main_solver(self.problem_description_test)["sample"]
+        solution = main_solver(dict(self.problem_description_test,
+                                    storage=self.storage))
+        sample_compact = solution["sample"]
+        self.assertEqual(type(sample_compact.temperatures).__name__,
+                         "scaled_field")
+        self.assertLess(np.max(np.abs(
+            sample_compact.temperatures.values -
+            sample.temperatures.values)), 0.01)
+        conductivity = sample_compact.conductivity
+        self.assertEqual(conductivity.values.dtype, np.float32)
+        self.assertEqual(conductivity.columns[-1],
+                         sample.conductivity.columns[-1])
+        np.testing.assert_allclose(
+            conductivity.values,
+            sample.conductivity.loc[:, conductivity.columns].values,
+            rtol=1e-6)
+        self.assertIsNone(sample_compact.fo)
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "solution.npz")
+            save_solution(file_name, solution)
+            loaded = load_solution(file_name)
+        np.testing.assert_array_equal(
+            loaded["temperatures"].values,
+            sample_compact.temperatures.values)
+        np.testing.assert_array_equal(loaded["conductivity"].columns,
+                                      conductivity.columns)
+        self.assertIsNone(loaded["upsilon"])
+        self.assertEqual(loaded["problem_description"]["storage"][
+            "temperatures"]["dtype"], "int16")
+
+    def test_b_validation(self):
+        """Tests that the storage policies are validated"""
+        for storage in [{"pressure": {"dtype": "float32"}},
+                        {"temperatures": {"dtype": "float16"}},
+                        {"temperatures": {"decimation": 0}},
+                        {"temperatures": {"decimation": "ten"}},
+                        {"fo": {"store": "no"}}]:
+            with self.assertRaises(SystemExit) as cm:
+                main_solver(dict(self.problem_description_test,
+                                 storage=storage))
+            self.assertEqual(cm.exception.code, 1)
+        with self.assertRaises(SystemExit) as cm:
+            main_solver(dict(self.problem_description_test,
+                             output_interval="ten"))
+        self.assertEqual(cm.exception.code, 1)
+
+    def test_c_compacted_solutions(self):
+        """Tests that runs warm started from compacted solutions start from
+        their last temperatures, and that the mesh study rejects storage"""
+        from transient_heat_conduction.mesh_independence.mesh_study import (
+            mesh_study)
+        solution = main_solver(dict(self.problem_description_test,
+                                    storage=self.storage))
+        solution_warm = main_solver(dict(self.problem_description_test,
+                                         warm_start_from=solution))
+        np.testing.assert_array_equal(
+            solution_warm["sample"].temperatures.iloc[:, 0].values,
+            solution["sample"].temperatures.values[:, -1])
+        solution = main_solver(dict(self.problem_description_test,
+                                    storage={"temperatures": {
+                                        "store": False}}))
+        with self.assertRaises(SystemExit):
+            main_solver(dict(self.problem_description_test,
+                             warm_start_from=solution))
+        with self.assertRaises(SystemExit):
+            mesh_study(dict(self.problem_description_test,
+                            storage=self.storage))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import asyncio
+from transient_heat_conduction.main_solver import (main_solver, iter_solve,
+                                                   async_iter_solve)
+import numpy as np
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        """creates a small robin problem"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 11, "time_total": 60,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "robin", "temperature_surface": None,
+            "nhf": None, "ihf_type": "constant", "ihf_coefficients": 20000,
+            "surface_losses_type": "non-linear", "h_total": None,
+            "h_convective": 10, "absorptivity": 0.9, "emissivity": 0.9,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0,
+            "time_step": 1}
+
+    def test_a_states_match_main_solver(self):
+        """Tests that the yielded states are the temperatures of main_solver,
+        every output interval and at the last time step, and that the
+        solution is returned at the end"""
+        temperatures = main_solver(self.problem_description_test)[
+            "sample"].temperatures
+        states = iter_solve(dict(self.problem_description_test,
+                                 output_interval=7))
+        t_steps = []
+        while True:
+            try:
+                state = next(states)
+            except StopIteration as stop:
+                solution = stop.value
+                break
+            t_steps.append(state.t_step)
+            self.assertEqual(state.time, temperatures.columns[state.t_step])
+            np.testing.assert_array_equal(
+                state.temperatures,
+                temperatures.iloc[:, state.t_step].values)
+        self.assertEqual(t_steps, list(range(0, 59, 7)) + [59])
+        np.testing.assert_array_equal(
+            solution["sample"].temperatures.values, temperatures.values)
+
+    def test_b_read_only_and_early_stop(self):
+        """Tests that the states cannot modify the solver, that they remain
+        valid while the solver continues and that closing the generator
+        stops the solver"""
+        states = iter_solve(self.problem_description_test)
+        first = next(states)
+        self.assertFalse(hasattr(first, "sample"))
+        for state in states:
+            with self.assertRaises(ValueError):
+                state.temperatures[0] = 0
+            if state.t_step == 10:
+                break
+        self.assertTrue(np.all(first.temperatures == 288))
+        self.assertGreater(state.temperatures[0], 288)
+        states.close()
+        with self.assertRaises(StopIteration):
+            next(states)
+
+    def test_c_2d_and_async(self):
+        """Tests the 2-D fields and the asynchronous iterator"""
+        problem_description = dict(
+            self.problem_description_test, geometry="2d_planar",
+            width=0.02, y_divisions=5, boundcond_side="insulated",
+            h_side=None, output_interval=20)
+
+        solution = {}
+
+        async def consume():
+            return [state async for state in
+                    async_iter_solve(problem_description, solution=solution)]
+
+        states = asyncio.run(consume())
+        self.assertEqual([state.t_step for state in states], [0, 20, 40, 59])
+        sample = solution["sample"]
+        for state, field in zip(states, sample.temperatures_2d):
+            self.assertEqual(state.temperatures.shape, (11, 5))
+            np.testing.assert_array_equal(state.temperatures, field)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from transient_heat_conduction.main_solver import main_solver
+from transient_heat_conduction.surrogate.reduced_model import (
+    train_reduced_model, reduced_model)
+import numpy as np
+
+
+class TestSurrogate(unittest.TestCase):
+
+    def setUp(self):
+        """creates a small robin problem with a large time step, so that the
+        training sweep takes a couple of seconds"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 11, "time_total": 100,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "robin", "temperature_surface": None,
+            "nhf": None, "ihf_type": "polynomial",
+            "ihf_coefficients": [20000, 100],
+            "surface_losses_type": "linear", "h_total": 10,
+            "h_convective": None, "absorptivity": None, "emissivity": None,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0,
+            "time_step": 1}
+        self.training_parameters = {"conductivity": [0.15, 0.25],
+                                    "h_total": [5, 15]}
+
+    def test_a_reduced_model(self):
+        """Tests the reduced model against the direct solver at parameters
+        outside the training sweep, and its error estimate"""
+        model = train_reduced_model(self.problem_description_test,
+                                    self.training_parameters)
+        self.assertLessEqual(model.modes, 10)
+        self.assertEqual(model.validation_errors.shape[0], 1)
+        parameters = {"conductivity": 0.18, "h_total": 12,
+                      "absorptivity": 0.9}
+        solution = main_solver(dict(self.problem_description_test,
+                                    conductivity_coeff=(0.18, None),
+                                    h_total=12, absorptivity=0.9))
+        error = np.max(np.abs(solution["sample"].temperatures.values -
+                              model.solve(parameters)))
+        self.assertLess(error, 0.1)
+        estimate = model.error_estimate(parameters)
+        self.assertTrue(error / 3 < estimate < 3 * error)
+
+    def test_b_save_load(self):
+        """Tests that a saved model gives the same temperatures once loaded,
+        also at depths between the nodes"""
+        import os
+        import tempfile
+        model = train_reduced_model(self.problem_description_test,
+                                    self.training_parameters,
+                                    validation_parameters={})
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "model.npz")
+            model.save(file_name)
+            model_loaded = reduced_model.load(file_name)
+        parameters = {"conductivity": 0.2, "h_total": 8}
+        np.testing.assert_array_equal(model.solve(parameters),
+                                      model_loaded.solve(parameters))
+        temperatures = model_loaded.solve(parameters)
+        np.testing.assert_allclose(
+            model_loaded.solve(parameters, depths=[0.0015])[0],
+            (temperatures[1] + temperatures[2]) / 2)
+
+    def test_c_validation(self):
+        """Tests that the reduced model is only trained for linear problems
+        and known parameters"""
+        for problem_update, training_parameters in [
+                ({"surface_losses_type": "non-linear", "h_convective": 10,
+                  "absorptivity": 1, "emissivity": 1},
+                 self.training_parameters),
+                ({}, {"emissivity": [0.8, 0.9]})]:
+            with self.assertRaises(SystemExit) as cm:
+                train_reduced_model(dict(self.problem_description_test,
+                                         **problem_update),
+                                    training_parameters)
+            self.assertEqual(cm.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
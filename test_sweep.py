@@ -0,0 +1,126 @@
+import os
+import unittest
+import multiprocessing
+from transient_heat_conduction.main_solver import main_solver
+from transient_heat_conduction.sweep.distributed_sweep import (
+    create_sweep, claim_task, run_worker, sweep_progress, run_coordinator,
+    solve_task)
+import numpy as np
+
+
+class TestDistributedSweep(unittest.TestCase):
+
+    def setUp(self):
+        """creates a small robin problem and a temporary work directory"""
+        import tempfile
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 11, "time_total": 60,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "robin", "temperature_surface": None,
+            "nhf": None, "ihf_type": "constant", "ihf_coefficients": 20000,
+            "surface_losses_type": "non-linear", "h_total": None,
+            "h_convective": 10, "absorptivity": 0.9, "emissivity": 0.9,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0,
+            "time_step": 1}
+        self.directory = tempfile.TemporaryDirectory()
+        self.work_directory = self.directory.name
+
+    def tearDown(self):
+        """removes the work directory"""
+        self.directory.cleanup()
+
+    def test_a_local_workers(self):
+        """Tests a sweep solved by three local worker processes, with a task
+        claimed by a worker that crashed, and that the merged results are
+        the solutions of main_solver"""
+        problem_updates = [{"ihf_coefficients": ihf}
+                           for ihf in [10000, 20000, 30000, 40000, 50000]]
+        problem_updates.append({"boundcond_surface": "none"})
+        task_ids = create_sweep(self.work_directory,
+                                self.problem_description_test,
+                                problem_updates)
+
+        # a worker that claims a task and stops sending heartbeats
+        running_file = claim_task(self.work_directory, "crashed")
+        os.utime(running_file, (0, 0))
+        self.assertEqual(sweep_progress(self.work_directory)["running"], 1)
+
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=run_worker, args=(
+            self.work_directory,), kwargs={"worker_id": f"local{index}",
+                                           "stale_timeout": 10,
+                                           "poll_interval": 0.1})
+                   for index in range(3)]
+        for worker in workers:
+            worker.start()
+        merged = run_coordinator(self.work_directory, stale_timeout=10,
+                                 poll_interval=0.1, timeout=120,
+                                 file_name=os.path.join(self.work_directory,
+                                                        "merged.npz"))
+        for worker in workers:
+            worker.join(30)
+            self.assertEqual(worker.exitcode, 0)
+
+        self.assertEqual(sweep_progress(self.work_directory),
+                         {"pending": 0, "running": 0, "done": 5,
+                          "failed": 1})
+        self.assertTrue(merged[task_ids[0]]["worker_id"].startswith("local"))
+        self.assertTrue(merged[task_ids[-1]]["error"].startswith("Error"))
+        temperatures = main_solver(dict(self.problem_description_test,
+                                        ihf_coefficients=30000))[
+            "sample"].temperatures.values
+        np.testing.assert_array_equal(
+            merged[task_ids[2]]["solution"]["temperatures"].values,
+            temperatures)
+        self.assertIsNone(merged[task_ids[2]]["solution"]["fo"])
+        with np.load(os.path.join(self.work_directory, "merged.npz")) as data:
+            np.testing.assert_array_equal(
+                data[f"{task_ids[2]}/temperatures"], temperatures)
+
+    def test_b_single_claim(self):
+        """Tests that every task is claimed by one worker only"""
+        task_ids = create_sweep(self.work_directory,
+                                self.problem_description_test,
+                                [{}, {"h_convective": 5}])
+        claims = [claim_task(self.work_directory, f"worker{index}")
+                  for index in range(3)]
+        self.assertEqual(sorted(claim.split(os.sep)[-1].split(".")[0]
+                                for claim in claims[:2]), task_ids)
+        self.assertIsNone(claims[2])
+        with self.assertRaises(SystemExit) as cm:
+            create_sweep(self.work_directory,
+                         self.problem_description_test, [{}])
+        self.assertEqual(cm.exception.code, 1)
+
+    def test_c_failures(self):
+        """Tests that 2-D sweeps are rejected and that a task that raises an
+        exception is recorded as failed (the worker and the sweep go on)"""
+        import json
+        with self.assertRaises(SystemExit):
+            create_sweep(self.work_directory, self.problem_description_test,
+                         [{}, {"geometry": "2d"}])
+        create_sweep(self.work_directory, self.problem_description_test,
+                     [{}])
+        running_file = claim_task(self.work_directory, "worker")
+        with open(running_file) as f:
+            task = json.load(f)
+        del task["problem_description"]["depth"]
+        with open(running_file, "w") as f:
+            json.dump(task, f)
+        summary = solve_task(self.work_directory, running_file, "worker",
+                             max_attempts=3, heartbeat_interval=1)
+        self.assertEqual(summary["status"], "failed")
+        self.assertTrue(summary["error"].startswith("KeyError"))
+        self.assertEqual(sweep_progress(self.work_directory)["failed"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from transient_heat_conduction.main_solver import main_solver
+from transient_heat_conduction.uncertainty.uncertainty_study import (
+    uncertainty_study, solve_batch, running_moments, p2_quantile)
+import numpy as np
+
+
+class TestUncertainty(unittest.TestCase):
+
+    def setUp(self):
+        """creates a small robin problem that can be solved for hundreds of
+        samples in a fraction of a second"""
+        self.problem_description_test = {
+            "material": "pmma", "problem_type": "direct",
+            "depth": 0.01, "x_divisions": 11, "time_total": 200,
+            "properties_type": "constant",
+            "conductivity_coeff": (0.2, None),
+            "density_coeff": (1196, None),
+            "heat_capacity_coeff": (1549, None),
+            "temperature_ambient": 288, "temperature_initial": 288,
+            "boundcond_surface": "robin", "temperature_surface": None,
+            "nhf": None, "ihf_type": "constant", "ihf_coefficients": 30000,
+            "surface_losses_type": "linear", "h_total": 10,
+            "h_convective": None, "absorptivity": None, "emissivity": None,
+            "boundcond_back": "insulated", "conductivity_subs": None,
+            "material_type": "inert", "pre_exp_factor": None,
+            "activation_energy": None, "heat_reaction": None,
+            "reaction_order": None, "in-depth_absorptivity": 0}
+
+    def test_a_online_statistics(self):
+        """Tests the running moments and the P-square quantiles against the
+        statistics of all the values"""
+        values = np.random.default_rng(0).normal(10, 2, 20000)
+        moments = running_moments()
+        estimators = [p2_quantile(p) for p in [0.05, 0.5, 0.95]]
+        for batch in np.split(values, 100):
+            moments.update(batch)
+            for estimator in estimators:
+                estimator.update(batch)
+        self.assertAlmostEqual(moments.mean, values.mean())
+        self.assertAlmostEqual(moments.variance, values.var(ddof=1))
+        np.testing.assert_allclose(
+            [estimator.value for estimator in estimators],
+            np.quantile(values, [0.05, 0.5, 0.95]), atol=0.05)
+
+    def test_b_batch_solver(self):
+        """Tests that the batch solver gives the temperatures of the direct
+        solver for every sample"""
+        conductivities = np.array([0.15, 0.25])
+        sample = main_solver(self.problem_description_test)["sample"]
+        mesh = {"space_mesh": sample.space_mesh,
+                "temporal_mesh": sample.temporal_mesh, "ihf": sample.ihf}
+        results = solve_batch(self.problem_description_test, mesh,
+                              {"conductivity": conductivities},
+                              ["surface_temperature", "back_temperature"])
+        for conductivity, surface, back in zip(
+                conductivities, results["surface_temperature"],
+                results["back_temperature"]):
+            problem_description = dict(self.problem_description_test,
+                                       conductivity_coeff=(conductivity,
+                                                           None),
+                                       time_step=sample.dt[0])
+            temperatures = main_solver(problem_description)[
+                "sample"].temperatures
+            self.assertAlmostEqual(surface, temperatures.iloc[0, -1])
+            self.assertAlmostEqual(back, temperatures.iloc[-1, -1])
+
+    def test_c_uncertainty_study(self):
+        """Tests that the study stops once the statistics converge and that
+        the nominal ignition time lies within the quantiles"""
+        results = uncertainty_study(
+            self.problem_description_test,
+            {"conductivity": ("normal", 0.2, 0.02),
+             "ihf_factor": ("uniform", 0.9, 1.1)},
+            outputs=["ignition_time", "back_temperature"],
+            ignition_temperature=600, batch_size=32, max_samples=2048,
+            tolerance=0.01, seed=1)
+        self.assertTrue(results["converged"])
+        self.assertLess(results["samples"], 2048)
+        self.assertEqual(results["ignition_fraction"], 1)
+        statistics = results["statistics"]["ignition_time"]
+        self.assertEqual(statistics["count"], results["samples"])
+        self.assertLess(statistics["standard_error"],
+                        0.01 * statistics["mean"])
+        quantiles = list(statistics["quantiles"].values())
+        self.assertTrue(np.all(np.diff(quantiles) > 0))
+
+        nominal = main_solver(dict(self.problem_description_test, events=[
+            {"quantity": "surface_temperature", "threshold": 600}]))
+        self.assertTrue(quantiles[0] < nominal["events"][0]["time"] <
+                        quantiles[-1])
+        self.assertEqual(len(results["history"]),
+                         results["samples"] // 32)
+
+    def test_d_validation(self):
+        """Tests that uncertain inputs, outputs, sampling and batch sizes
+        (powers of two for sobol) are validated"""
+        for uncertain, kwargs in [
+                ({"thickness": ("normal", 0.01, 0.001)}, {}),
+                ({"emissivity": ("uniform", 0.8, 0.9)}, {}),
+                ({"conductivity": ("gamma", 0.2, 0.01)}, {}),
+                ({"conductivity": ("normal", 0.2, 0.01)},
+                 {"outputs": ["ignition_time"]}),
+                ({"conductivity": ("normal", 0.2, 0.01)},
+                 {"sampling": "grid"}),
+                ({"conductivity": ("normal", 0.2, 0.01)},
+                 {"batch_size": 48})]:
+            with self.assertRaises(SystemExit) as cm:
+                uncertainty_study(self.problem_description_test, uncertain,
+                                  **kwargs)
+            self.assertEqual(cm.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
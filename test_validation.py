@@ -0,0 +1,60 @@
+import unittest
+from transient_heat_conduction.validation_plots_analyticalsols.\
+    validation_report import minmax_decimate, validation_report, case_problem
+from transient_heat_conduction.validation_plots_analyticalsols.\
+    calc_analytical import calc_robin
+from transient_heat_conduction.main_solver import main_solver
+import numpy as np
+
+
+class TestValidation(unittest.TestCase):
+
+    def test_a_decimation(self):
+        """Tests that the decimation keeps the extremes, the end points and
+        the order of the values"""
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=100001)
+        values[12345] = 50
+        values[54321] = -50
+        kept = minmax_decimate(values, 1000)
+        self.assertLessEqual(kept.shape[0], 1002)
+        self.assertTrue(np.all(np.diff(kept) > 0))
+        for index in [0, 12345, 54321, 100000]:
+            self.assertIn(index, kept)
+        np.testing.assert_array_equal(minmax_decimate(values[:500], 1000),
+                                      np.arange(500))
+
+    def test_b_report(self):
+        """Tests that the numerical solutions match the analytical ones
+        (robin included) and that the report is written"""
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "report.html")
+            metrics = validation_report(
+                file_name, cases=["robin-crank_nicolson", "robin-duhamel",
+                                  "dirichlet-tr_bdf2"], workers=2)
+            with open(file_name) as f:
+                report = f.read()
+        self.assertEqual([m["case"] for m in metrics],
+                         ["robin-crank_nicolson", "robin-duhamel",
+                          "dirichlet-tr_bdf2"])
+        for m in metrics:
+            self.assertTrue(m["passed"])
+            self.assertLess(m["relative_error"], 0.005)
+        self.assertLess(metrics[1]["max_error"], 0.1)
+        self.assertEqual(report.count("data:image/png;base64"), 3)
+
+    def test_c_robin_conditions(self):
+        """Tests that the robin analytical solution is rejected with
+        non-linear surface losses"""
+        solution = main_solver(dict(
+            case_problem("robin-crank_nicolson"), time_total=10,
+            surface_losses_type="non-linear", h_convective=10,
+            emissivity=0.9))
+        with self.assertRaises(SystemExit):
+            calc_robin(solution, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
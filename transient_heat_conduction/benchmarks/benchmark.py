@@ -0,0 +1,293 @@
+"""
+Performance benchmarks of the direct solver.
+Solves a set of representative problems (demo PMMA dirichlet, temperature
+dependent properties, robin with re-radiation, reactive sample and a large
+mesh), each one in a fresh process, and records the time per step, total
+time, peak traced allocations and peak RSS to a history file (JSON lines).
+Every case is repeated so that the comparison against a baseline (a label
+or the previous run) accounts for the noise of the timings: a case is only
+reported slower or faster if the change exceeds the threshold and the
+Mann-Whitney U test rejects equal timings.
+
+Run from the transient_heat_conduction directory:
+    python -m benchmarks.benchmark --repeats 5 --label baseline
+    python -m benchmarks.benchmark --baseline baseline
+    python -m benchmarks.benchmark --profile reactive
+"""
+import io
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import argparse
+import platform
+import datetime
+import tracemalloc
+import contextlib
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# import from local project
+from main_solver import main_solver
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows (peak RSS is not recorded)
+    resource = None
+
+# problem shared by all the cases (PMMA of the demo problem)
+base_problem = {
+    "material": "pmma", "problem_type": "direct",
+    "depth": 0.025, "x_divisions": 101, "time_total": 60,
+    "properties_type": "constant",
+    "conductivity_coeff": (0.2, None), "density_coeff": (1196, None),
+    "heat_capacity_coeff": (1549, None),
+    "temperature_ambient": 288, "temperature_initial": 288,
+    "boundcond_surface": "dirichlet", "temperature_surface": 800,
+    "nhf": None, "ihf_type": "constant", "ihf_coefficients": 40000,
+    "surface_losses_type": "non-linear", "h_total": None,
+    "h_convective": 12, "absorptivity": 0.9, "emissivity": 0.9,
+    "boundcond_back": "insulated", "conductivity_subs": None,
+    "material_type": "inert", "pre_exp_factor": None,
+    "activation_energy": None, "heat_reaction": None,
+    "reaction_order": None, "in-depth_absorptivity": 0}
+
+# changes to the base problem of every case
+benchmark_cases = {
+    "demo_dirichlet": {},
+    "temperature_dependent": {
+        "properties_type": "temperature_dependent",
+        "conductivity_coeff": (0.2, 0.5), "density_coeff": (1196, 0),
+        "heat_capacity_coeff": (1549, 0.8), "x_divisions": 51,
+        "boundcond_surface": "robin", "time_step": 0.5,
+        "time_total": 120},
+    "robin_radiation": {"boundcond_surface": "robin", "time_step": 0.5,
+                        "time_total": 120},
+    "reactive": {"boundcond_surface": "robin", "material_type": "reactive",
+                 "pre_exp_factor": 8.5e12, "activation_energy": 1.88e5,
+                 "heat_reaction": 8.7e5, "reaction_order": 1,
+                 "x_divisions": 41, "time_step": 0.25, "time_total": 300},
+    "large_mesh": {"boundcond_surface": "robin", "x_divisions": 801,
+                   "time_step": 1, "time_total": 30}}
+
+
+def case_problem(name):
+    """Returns the problem description of a benchmark case"""
+    return dict(base_problem, **benchmark_cases[name])
+
+
+def solve_quietly(problem_description):
+    """Solves a problem without printing the progress"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return main_solver(problem_description)
+
+
+def peak_rss():
+    """Returns the peak resident set size of the process in bytes (None if
+    not available)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def measure_case(name, repeats):
+    """Solves a case repeats times (plus once with tracemalloc) and returns
+    the timings and memory of the run. Runs in a fresh process"""
+    problem_description = case_problem(name)
+    total_times = []
+    for _ in range(repeats):
+        time_start = time.perf_counter()
+        solution = solve_quietly(problem_description)
+        total_times.append(time.perf_counter() - time_start)
+    steps = solution["sample"].temporal_mesh.shape[0] - 1
+
+    # allocations (separate run, tracemalloc slows the solver down)
+    tracemalloc.start()
+    solve_quietly(problem_description)
+    allocated_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"case": name, "steps": steps, "total_times": total_times,
+            "time_per_step": float(np.median(total_times)) / steps,
+            "total_time": float(np.median(total_times)),
+            "allocated_peak": allocated_peak, "rss_peak": peak_rss()}
+
+
+def environment():
+    """Returns the commit and versions the benchmarks run with"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(),
+            "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.node()}
+
+
+def read_history(history_file):
+    """Returns the records of the history file (oldest first)"""
+    if not os.path.exists(history_file):
+        return []
+    with open(history_file) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_baseline(history, name, baseline=None):
+    """Returns the latest record of a case with the baseline label (the
+    latest record of the case if None)"""
+    for record in reversed(history):
+        if record["case"] == name and (baseline is None or
+                                       record.get("label") == baseline):
+            return record
+    return None
+
+
+def compare_records(record, baseline, threshold=0.05, alpha=0.05):
+    """Compares the timings of a record against a baseline. Returns the
+    ratio of the medians, the p-value of the Mann-Whitney U test and the
+    status ("slower", "faster" or "unchanged")"""
+    ratio = record["total_time"] / baseline["total_time"]
+    alternative = "greater" if ratio > 1 else "less"
+    p_value = stats.mannwhitneyu(record["total_times"],
+                                 baseline["total_times"],
+                                 alternative=alternative).pvalue
+    status = "unchanged"
+    if p_value < alpha and abs(ratio - 1) > threshold:
+        status = "slower" if ratio > 1 else "faster"
+    return {"ratio": ratio, "p_value": float(p_value), "status": status}
+
+
+def run_benchmarks(history_file="benchmark_history.jsonl", cases=None,
+                   repeats=5, label=None, baseline=None, threshold=0.05,
+                   alpha=0.05):
+    """
+    Runs the benchmark cases, appends the results to the history file and
+    compares them against the baseline.
+
+    Parameters
+    ----------
+    history_file : STR
+        JSON lines file with the records of every run.
+
+    cases : LIST
+        names of the cases (all the benchmark cases if None).
+
+    repeats : INT
+        number of times each case is solved (timings are the medians).
+
+    label : STR
+        label of the records (e.g. "baseline"), to be compared against.
+
+    baseline : STR
+        label of the baseline records. If None, the previous run of every
+        case is the baseline.
+
+    threshold : FLOAT
+        relative change of the median time below which a case is reported
+        unchanged.
+
+    alpha : FLOAT
+        significance level of the Mann-Whitney U test.
+
+    Returns
+    -------
+    results : LIST
+        for each case, the record and its comparison against the baseline
+        (None if there is no baseline).
+
+    """
+    cases = list(benchmark_cases) if cases is None else cases
+    for name in cases:
+        if name not in benchmark_cases:
+            print(f"Error, benchmark case {name} not valid")
+            sys.exit(1)
+    if not isinstance(repeats, int) or repeats < 2:
+        print("Error, benchmark repeats not valid")
+        sys.exit(1)
+
+    history = read_history(history_file)
+    run_environment = environment()
+    timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+    results = []
+    for name in cases:
+        # every case in a fresh process (independent peak RSS)
+        with ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn")) as pool:
+            record = pool.submit(measure_case, name, repeats).result()
+        record.update(run_environment, timestamp=timestamp, label=label)
+        reference = find_baseline(history, name, baseline)
+        comparison = (None if reference is None
+                      else compare_records(record, reference, threshold,
+                                           alpha))
+        results.append({"record": record, "comparison": comparison})
+        with open(history_file, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    return results
+
+
+def benchmark_report(results):
+    """Returns a short report of the benchmark results"""
+    lines = [f"{'case':<22}{'steps':>7}{'ms/step':>10}{'total s':>9}"
+             f"{'alloc MB':>10}{'RSS MB':>8}{'change':>9}{'p':>7}  status"]
+    for result in results:
+        record, comparison = result["record"], result["comparison"]
+        rss = ("-" if record["rss_peak"] is None
+               else f"{record['rss_peak'] / 1e6:.0f}")
+        line = (f"{record['case']:<22}{record['steps']:>7}"
+                f"{record['time_per_step'] * 1e3:>10.3f}"
+                f"{record['total_time']:>9.2f}"
+                f"{record['allocated_peak'] / 1e6:>10.1f}{rss:>8}")
+        if comparison is None:
+            line += f"{'-':>9}{'-':>7}  no baseline"
+        else:
+            line += (f"{(comparison['ratio'] - 1) * 100:>+8.1f}%"
+                     f"{comparison['p_value']:>7.3f}  "
+                     f"{comparison['status']}")
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def profile_case(name, sort="cumulative", limit=25):
+    """Solves a case under cProfile and prints the functions that take the
+    most time. Returns the statistics"""
+    problem_description = case_problem(name)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    solve_quietly(problem_description)
+    profiler.disable()
+    statistics = pstats.Stats(profiler).strip_dirs().sort_stats(sort)
+    statistics.print_stats(limit)
+    return statistics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--cases", nargs="+", default=None)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--history", default="benchmark_history.jsonl")
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--threshold", type=float, default=0.05)
+    parser.add_argument("--profile", default=None,
+                        help="case solved under cProfile (no history)")
+    arguments = parser.parse_args()
+    if arguments.profile is not None:
+        profile_case(arguments.profile)
+    else:
+        print(benchmark_report(run_benchmarks(
+            arguments.history, arguments.cases, arguments.repeats,
+            arguments.label, arguments.baseline, arguments.threshold)))
@@ -16,47 +16,82 @@ def calc_Fo(sample, t_step):
 
 
 def calc_Upsilon(problem_description, sample, t_step):
-    """Calculates the Upsilon parameter, defined in my thesis Appendix B"""
+    """Calculates the Upsilon parameter, defined in my thesis Appendix B.
+    Accounts for the term dk/dT (dT/dx)^2 of temperature dependent
+    conductivity, scaled by dt/(rho c)"""
     base, exp = problem_description["conductivity_coeff"]
-    temperature_difference = np.zeros_like(sample.temperatures.iloc[:, t_step])
-    temperature_difference[0] = (sample.temperatures.iloc[1, t_step] -
-                                 sample.temperatures.iloc[0, t_step])
-    for i in sample.temperatures.iloc[:-1, t_step]:
-        if i == 0:
-            continue
-        temperature_difference[i] = (sample.temperatures.iloc[i+1, t_step] -
-                                     sample.temperatures.iloc[i-1, t_step])
-    temperature_difference[-1] = (sample.temperatures.iloc[-1, t_step] -
-                                  sample.temperature.iloc[-2, t_step])
+    temperatures = sample.temperatures.iloc[:, t_step].values
+    temperature_gradient = np.gradient(temperatures, sample.dx)
     sample.upsilon.iloc[:, t_step] = (
-        exp * base / 300)*(sample.temperatures.iloc[:, t_step]**(exp-1))*(
-            sample.dt/sample.density.iloc[:, t_step] /
-            sample.heat_capacity.iloc[:, t_step] / sample.dx)*(
-                temperature_difference/2/sample.dx)**2
+        exp * base / 300)*((temperatures / 300)**(exp-1))*(
+            sample.dt/sample.density.iloc[:, t_step].values /
+            sample.heat_capacity.iloc[:, t_step].values)*(
+                temperature_gradient)**2
+
+
+def calc_h_surface(problem_description, sample, t_step):
+    """Returns the heat transfer coefficient of the surface losses. Non-linear
+    losses (convection and re-radiation) are linearized with the surface
+    temperature at t=n"""
+    if problem_description["surface_losses_type"] == "linear":
+        return sample.h_total
+    temperature_surface = sample.temperatures.iloc[0, t_step]
+    return sample.h_conv + sample.emissivity * sample.stefan_boltz * (
+        temperature_surface**2 + sample.temperature_ambient**2) * (
+            temperature_surface + sample.temperature_ambient)
+
+
+def tridiagonal_operator(problem_description, fo, dx, conductivity_surface,
+                         h_surface=None):
+    """Returns the tridiagonal coefficients (lower, diag, upper, stored as in
+    solve_tridiagonal) of the conduction operator scaled by dt, given the
+    Fourier numbers of the nodes along the last axis (leading axes are
+    batches, e.g. samples or columns of nodes). The surface (neunman and
+    robin, with the surface losses h_surface implicit) and the insulated back
+    face use ghost nodes. The surface row is zero for the dirichlet boundary
+    condition"""
+    lower, diag, upper = fo.copy(), - 2 * fo, fo.copy()
+
+    # surface boundary condition
+    if problem_description["boundcond_surface"] == "dirichlet":
+        diag[..., 0], upper[..., 0] = 0, 0
+    else:
+        upper[..., 0] = 2 * fo[..., 0]
+        if problem_description["boundcond_surface"] == "robin":
+            diag[..., 0] -= (2 * fo[..., 0] * dx * h_surface /
+                             conductivity_surface)
+
+    # insulated back face
+    if problem_description["boundcond_back"] == "insulated":
+        lower[..., -1] = 2 * fo[..., -1]
 
+    return lower, diag, upper
 
-def matrix_A(problem_description, sample, t_step):
-    "Defines matrix A. Matrix of coefficient for the temperatures at t=n+1"
-    A = np.diagflat(- sample.fo.iloc[:, t_step].values[:-1] / 2, -1) +\
-        np.diagflat(1 + sample.fo.iloc[:, t_step].values[:]) +\
-        np.diagflat(- sample.fo.iloc[:, t_step].values[1:] / 2, 1)
 
-    # update edge values of A depending on the boundary conditions
-    if problem_description["boundcond_surface"] == "dirichlet":
-        A[0, 0] = 1
-        A[0, 1] = 0
-    # elif problem_description["boundcond_surface"] == "neunman":
-    #     pass
-    # elif problem_description["boundcond_surface"] == "robin":
-    #     pass
+def surface_source(fo_surface, dx, conductivity_surface, heat_flux):
+    """Returns the source term (scaled by dt) of the surface node due to a
+    heat flux into the surface through the ghost node (the part of the
+    surface heat flux that does not depend on the surface temperature)"""
+    return 2 * fo_surface * dx / conductivity_surface * heat_flux
 
-    if problem_description["boundcond_back"] == "insulated":
-        A[-1, -2] = - sample.fo.iloc[-2, t_step]
-        A[-1, -1] = 1 + sample.fo.iloc[-1, t_step]
-    # elif problem_description["boundcond_back"] == "conductive_losses":
-    #     pass
 
-    A = A.astype(float)
+def operator_at(problem_description, sample, t_step):
+    """Returns the tridiagonal operator of the sample with the Fourier
+    numbers and linearized surface losses at t=n"""
+    h_surface = None
+    if problem_description["boundcond_surface"] == "robin":
+        h_surface = calc_h_surface(problem_description, sample, t_step)
+    return tridiagonal_operator(
+        problem_description, sample.fo.iloc[:, t_step].values.astype(float),
+        sample.dx, sample.conductivity.iloc[0, t_step], h_surface)
+
+
+def matrix_A(problem_description, sample, t_step):
+    "Defines matrix A. Matrix of coefficient for the temperatures at t=n+1"
+    # every row uses the Fourier number of its own node
+    lower, diag, upper = operator_at(problem_description, sample, t_step)
+    A = np.diagflat(- lower[1:] / 2, -1) + np.diagflat(1 - diag / 2) +\
+        np.diagflat(- upper[:-1] / 2, 1)
 
     return A
 
@@ -65,51 +100,49 @@ def vector_b(problem_description, sample, t_step):
     """Defines vector b, which is calculated from matrix B of coefficients
     at temperature t=n and accounts for extra terms from the  boundary
     conditions"""
-    B = np.diagflat(sample.fo.iloc[:, t_step].values[:-1] / 2, -1) +\
-        np.diagflat(1 - sample.fo.iloc[:, t_step].values[:]) +\
-        np.diagflat(sample.fo.iloc[:, t_step].values[1:] / 2, 1)
+    lower, diag, upper = operator_at(problem_description, sample, t_step)
+    temperatures = sample.temperatures.iloc[:, t_step].values.astype(float)
 
     # calculate g_dot (source term - pyrolysis)
-    sample.omega_dots.iloc[:, t_step] = (sample.density.iloc[:, t_step] *
-                                         sample.pre_exp_factor *
-                                         np.exp(- sample.activation_energy /
-                                         sample. R /
-                                         sample.temperatures.iloc[:,
-                                                                  t_step]))
+    sample.omega_dots.iloc[:, t_step] = calc_reaction_rate(
+        sample, sample.temperatures.iloc[:, t_step].values,
+        sample.density.iloc[:, t_step].values)
 
     sample.g_dots.iloc[:, t_step] = (sample.omega_dots.iloc[:, t_step] *
                                      sample.heat_reaction)
 
-    b = B.dot(sample.temperatures.iloc[:, t_step]) +\
-        sample.upsilon.iloc[:, t_step] - (sample.g_dots.iloc[:, t_step] *
-                                          sample.dt /
-                                          sample.density.iloc[:, t_step] *
-                                          sample.heat_capacity.iloc[:,
-                                                                    t_step])
+    b = temperatures + apply_tridiagonal(lower, diag, upper,
+                                         temperatures) / 2 +\
+        sample.upsilon.iloc[:, t_step].values - (
+            sample.g_dots.iloc[:, t_step].values * sample.dt /
+            (sample.density.iloc[:, t_step].values *
+             sample.heat_capacity.iloc[:, t_step].values))
 
-    # update edge values of b depending on the boundary conditions
+    # update edge values of b depending on the boundary conditions (heat
+    # flux at the surface at t=n and t=n+1)
     if problem_description["boundcond_surface"] == "dirichlet":
-        b.iloc[0] = problem_description["temperature_surface"]
+        b[0] = problem_description["temperature_surface"]
     elif problem_description["boundcond_surface"] == "neunman":
-        pass
+        b[0] += surface_source(sample.fo.iloc[0, t_step], sample.dx,
+                               sample.conductivity.iloc[0, t_step],
+                               sample.nhf)
     elif problem_description["boundcond_surface"] == "robin":
-        pass
+        b[0] += surface_source(
+            sample.fo.iloc[0, t_step], sample.dx,
+            sample.conductivity.iloc[0, t_step],
+            sample.absorptivity * (sample.ihf[t_step] +
+                                   sample.ihf[t_step + 1]) / 2 +
+            calc_h_surface(problem_description, sample, t_step) *
+            sample.temperature_ambient)
 
-    if problem_description["boundcond_back"] == "insulated":
-        b.iloc[-1] = (sample.fo.iloc[-2, t_step] *
-                      sample.temperatures.iloc[-2, t_step] +
-                      (1 - sample.fo.iloc[-1, t_step]) *
-                      sample.temperatures.iloc[-1, t_step] +
-                      sample.upsilon.iloc[-1, t_step] - (
-                          sample.g_dots.iloc[-1, t_step] * sample.dt[-1]) /
-                      (sample.density.iloc[-1, t_step] *
-                       sample.heat_capacity.iloc[-1, t_step]))
-    elif problem_description["boundcond_back"] == "conductive_losses":
-        pass
+    return b.astype(float)
 
-    b = b.astype(float)
 
-    return b
+def calc_reaction_rate(sample, temperatures, density):
+    """Returns the Arrhenius reaction rate (omega_dot) in kg/m3s given the
+    temperatures and densities at the nodes as arrays"""
+    return density * sample.pre_exp_factor * np.exp(
+        - sample.activation_energy / sample.R / temperatures)
 
 
 def update_thermal_properties(problem_description, sample, t_step):
@@ -121,6 +154,38 @@ def update_thermal_properties(problem_description, sample, t_step):
             prop.iloc[:, t_step+1] = prop.iloc[:, t_step]
         elif problem_description["properties_type"
                                  ] == "temperature_dependent":
-            base, exponent = problem_description["property_name"]
+            base, exponent = problem_description[f"{property_name}_coeff"]
             prop.iloc[:, t_step+1] = base * (
-                sample.temperatures.iloc[:, t_step].values/300)**(exponent)
+                sample.temperatures.iloc[:, t_step+1].values/300)**(exponent)
+
+
+def solve_tridiagonal(lower, diag, upper, rhs):
+    """Solves a batch of tridiagonal systems (Thomas algorithm, vectorized
+    over the leading axes). lower[..., i] and upper[..., i] are the
+    coefficients of x[i-1] and x[i+1] in equation i (lower[..., 0] and
+    upper[..., -1] are not used)"""
+    lower, diag, upper, rhs = np.broadcast_arrays(lower, diag, upper, rhs)
+    n = rhs.shape[-1]
+    upper_prime = np.empty(rhs.shape)
+    rhs_prime = np.empty(rhs.shape)
+    upper_prime[..., 0] = upper[..., 0] / diag[..., 0]
+    rhs_prime[..., 0] = rhs[..., 0] / diag[..., 0]
+    for i in range(1, n):
+        denominator = diag[..., i] - lower[..., i] * upper_prime[..., i - 1]
+        upper_prime[..., i] = upper[..., i] / denominator
+        rhs_prime[..., i] = (rhs[..., i] - lower[..., i] *
+                             rhs_prime[..., i - 1]) / denominator
+    x = np.empty(rhs.shape)
+    x[..., -1] = rhs_prime[..., -1]
+    for i in range(n - 2, -1, -1):
+        x[..., i] = rhs_prime[..., i] - upper_prime[..., i] * x[..., i + 1]
+    return x
+
+
+def apply_tridiagonal(lower, diag, upper, x):
+    """Returns the product of a batch of tridiagonal matrices (same storage
+    as in solve_tridiagonal) and x, along the last axis"""
+    product = diag * x
+    product[..., 1:] += lower[..., 1:] * x[..., :-1]
+    product[..., :-1] += upper[..., :-1] * x[..., 1:]
+    return product
@@ -0,0 +1,147 @@
+"""
+Checkpoints of the direct solver.
+The state needed to continue a run (temperatures and properties at the
+current time step, time step index, time step size, the state of the
+probes and events, the running energy balance and the newton diagnostics)
+is written periodically to a compact binary file. The
+file is replaced atomically, so a killed job always leaves a complete
+checkpoint behind.
+"""
+import os
+import sys
+import json
+import numpy as np
+
+# version of the checkpoint file format
+checkpoint_version = 1
+
+
+def write_checkpoint(file_name, sample, t_step):
+    """Writes the state of the sample at time step t_step to file_name"""
+    state = {"version": checkpoint_version,
+             "t_step": t_step,
+             "time": sample.temporal_mesh[t_step],
+             "dt": sample.dt,
+             "x_divisions": sample.x_divisions,
+             "space_mesh": sample.space_mesh,
+             "steps": sample.temporal_mesh.shape[0],
+             "material": sample.material}
+    for property_name in ["temperatures", "conductivity", "density",
+                          "heat_capacity"]:
+        state[property_name] = getattr(sample, property_name).iloc[
+            :, t_step].values.astype(float)
+
+    # state of the probes, events and surface regression
+    if sample.surface_position is not None:
+        state["surface_position"] = sample.surface_position[t_step]
+    if sample.probes is not None:
+        state["probes_cursor"] = sample.probes.cursor
+        state["probes_temperatures"] = sample.probes.temperatures
+        state["probes_time_previous"] = sample.probes.time_previous
+        state["probes_values_previous"] = sample.probes.values_previous
+    if sample.events is not None:
+        state["events_log"] = json.dumps(sample.events.log)
+        state["events_time_previous"] = sample.events.time_previous
+        state["events_temperatures_previous"] = (
+            sample.events.temperatures_previous)
+        state["events_g_previous"] = sample.events.g_previous
+
+    # running energy balance and newton diagnostics
+    if "energy_balance" in sample.diagnostics:
+        state["energy_balance"] = json.dumps(
+            sample.diagnostics["energy_balance"])
+    if "newton_iterations" in sample.diagnostics:
+        state["newton_iterations"] = sample.diagnostics["newton_iterations"]
+        state["newton_not_converged"] = sample.diagnostics[
+            "newton_not_converged"]
+
+    # write to a temporary file and replace the previous checkpoint
+    file_temporary = f"{file_name}.tmp"
+    with open(file_temporary, "wb") as f:
+        np.savez(f, **state)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(file_temporary, file_name)
+
+
+def read_checkpoint(file_name):
+    """Returns the state stored in a checkpoint file as a dictionary"""
+    with np.load(file_name, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def restore_checkpoint(sample, checkpoint):
+    """Restores the state of a checkpoint in the sample, so that the solver
+    continues from the time step of the checkpoint"""
+    if (int(checkpoint["version"]) != checkpoint_version or
+            int(checkpoint["x_divisions"]) != sample.x_divisions or
+            int(checkpoint["steps"]) != sample.temporal_mesh.shape[0] or
+            not np.array_equal(checkpoint["dt"], sample.dt)):
+        print("Error, checkpoint does not match the problem description")
+        sys.exit(1)
+    t_step = int(checkpoint["t_step"])
+    for property_name in ["temperatures", "conductivity", "density",
+                          "heat_capacity"]:
+        getattr(sample, property_name).iloc[:, t_step] = checkpoint[
+            property_name]
+
+    if (sample.surface_position is not None and
+            "surface_position" in checkpoint):
+        sample.surface_position[t_step] = float(
+            checkpoint["surface_position"])
+        sample.dx = (sample.depth - sample.surface_position[t_step]) / (
+            sample.x_divisions - 1)
+        if sample.probes is not None:
+            sample.probes.update_mesh(sample.node_positions(t_step))
+    if sample.probes is not None and "probes_cursor" in checkpoint:
+        sample.probes.cursor = int(checkpoint["probes_cursor"])
+        sample.probes.temperatures = checkpoint["probes_temperatures"]
+        sample.probes.time_previous = float(
+            checkpoint["probes_time_previous"])
+        sample.probes.values_previous = checkpoint["probes_values_previous"]
+    if sample.events is not None and "events_log" in checkpoint:
+        sample.events.log = json.loads(str(checkpoint["events_log"]))
+        sample.events.time_previous = float(
+            checkpoint["events_time_previous"])
+        sample.events.temperatures_previous = checkpoint[
+            "events_temperatures_previous"]
+        sample.events.g_previous = checkpoint["events_g_previous"]
+    if "energy_balance" in checkpoint:
+        sample.diagnostics["energy_balance"] = json.loads(
+            str(checkpoint["energy_balance"]))
+    if "newton_iterations" in checkpoint:
+        sample.diagnostics["newton_iterations"] = checkpoint[
+            "newton_iterations"].copy()
+        sample.diagnostics["newton_not_converged"] = int(
+            checkpoint["newton_not_converged"])
+
+    sample.t_step_start = t_step
+
+
+def warm_start_profile(source, space_mesh):
+    """Returns the final temperature profile of another run (a solution
+    dictionary, also with compacted temperatures, or a checkpoint file),
+    interpolated from the depths of its nodes onto space_mesh. The other
+    run must be of a sample of the same depth whose surface has not
+    regressed"""
+    if isinstance(source, dict):
+        # DataFrame or scaled_field (the last time step is always stored)
+        sample = source["sample"]
+        temperatures = np.asarray(sample.temperatures.values,
+                                  dtype=float)[:, -1]
+        space_mesh_source = sample.space_mesh
+        regressed = (sample.surface_position is not None and
+                     sample.surface_position[-1] > 0)
+    else:
+        checkpoint = read_checkpoint(source)
+        temperatures = checkpoint["temperatures"]
+        space_mesh_source = checkpoint.get("space_mesh")
+        regressed = float(checkpoint.get("surface_position", 0)) > 0
+    if (space_mesh_source is None or
+            not np.isclose(space_mesh_source[-1], space_mesh[-1])):
+        print("Error, warm start from a sample of a different depth")
+        sys.exit(1)
+    if regressed:
+        print("Error, warm start from a sample whose surface regressed")
+        sys.exit(1)
+    return np.interp(space_mesh, space_mesh_source, temperatures)
@@ -0,0 +1,140 @@
+"""
+Energy balance of the direct solver.
+The sensible energy stored in the sample, the heat flux through the surface
+(the back face is insulated) and the heat absorbed by the reaction (g_dots)
+are accumulated at every time step (per unit area, in J/m2), so that the
+cumulative imbalance measures the energy that the discretization creates or
+destroys. Nodes are weighted with their control volume (half cells at the
+boundaries) and fluxes are integrated in time with the trapezoidal rule,
+with the heat transfer coefficient of the surface losses linearized at t=n
+as in the solver. The flux through a dirichlet surface is the one that
+keeps the surface half cell in balance. Only running sums are kept, so the
+balance is O(N) per time step. If the surface regresses, the energy of the
+material removed at the surface (relative to the ambient temperature) leaves
+the sample.
+"""
+import numpy as np
+
+# import from local project
+from classes_and_functions.calc_parameters import calc_h_surface
+
+
+class energy_balance():
+    """
+    Running energy balance of a 1-D sample. With an energy tolerance, the
+    run is flagged once the relative imbalance exceeds it (and stopped if
+    terminal).
+    """
+
+    def __init__(self, problem_description, sample, t_step):
+        """initializes the balance at time step t_step"""
+        self.problem_description = problem_description
+        self.boundcond_surface = problem_description["boundcond_surface"]
+        self.weights = np.full(sample.x_divisions, sample.dx)
+        self.weights[[0, -1]] = sample.dx / 2
+        self.tolerance = problem_description.get("energy_tolerance")
+        self.terminal = bool(problem_description.get("energy_terminal",
+                                                     False))
+
+        self.stored = 0.0
+        self.surface = 0.0
+        self.reaction = 0.0
+        self.regression = 0.0
+        self.imbalance = 0.0
+        self.relative_imbalance = 0.0
+        self.step_imbalance = 0.0
+        self.exceeded_time = None
+
+        # running sums of a run resumed from a checkpoint
+        if t_step > 0 and "energy_balance" in sample.diagnostics:
+            for name, value in sample.diagnostics["energy_balance"].items():
+                setattr(self, name, value)
+
+        # state at the previous time step (the only one kept)
+        (self.temperatures, self.capacity,
+         self.surface_flux) = self.state(sample, t_step)
+
+    def state(self, sample, t_step):
+        """Returns the temperatures, volumetric heat capacities and heat
+        flux into the surface (absorbed heat flux if robin, conductive flux
+        from the surface node if dirichlet) at time step t_step"""
+        temperatures = sample.temperatures.iloc[:, t_step].values
+        capacity = (sample.density.iloc[:, t_step].values *
+                    sample.heat_capacity.iloc[:, t_step].values)
+        if self.boundcond_surface == "neunman":
+            surface_flux = sample.nhf
+        elif self.boundcond_surface == "robin":
+            surface_flux = sample.absorptivity * sample.ihf[t_step]
+        else:
+            surface_flux = (sample.conductivity.iloc[0, t_step] *
+                            (temperatures[0] - temperatures[1]) / sample.dx)
+        return temperatures, capacity, surface_flux
+
+    def update(self, sample, t_step):
+        """Adds the time step from t_step to t_step + 1 to the balance.
+        Returns True if the tolerance is exceeded for the first time"""
+        dt = sample.dt[0]
+        temperatures, capacity, surface_flux = self.state(sample,
+                                                          t_step + 1)
+        stored = np.sum(self.weights * (self.capacity + capacity) / 2 *
+                        (temperatures - self.temperatures))
+        g_dots = np.zeros(sample.x_divisions)
+        if sample.heat_reaction != 0:
+            g_dots = np.nan_to_num(sample.g_dots.iloc[:, t_step].values)
+        reaction = np.sum(self.weights * g_dots) * dt
+        weights = self.weights
+        regression = 0.0
+        if sample.surface_position is not None:
+            # the control volumes shrink with the regressing surface
+            weights = np.full(sample.x_divisions, sample.dx)
+            weights[[0, -1]] = sample.dx / 2
+            stored += np.sum((weights - self.weights) * capacity *
+                             (temperatures - sample.temperature_ambient))
+            regression = (self.capacity[0] * (self.temperatures[0] -
+                                              sample.temperature_ambient) +
+                          capacity[0] * (temperatures[0] -
+                                         sample.temperature_ambient)) / 2 * (
+                sample.surface_position[t_step + 1] -
+                sample.surface_position[t_step])
+        if self.boundcond_surface == "dirichlet":
+            # the flux that keeps the surface half cell in balance
+            surface = (self.weights[0] * (self.capacity[0] + capacity[0]) /
+                       2 * (temperatures[0] - self.temperatures[0]) +
+                       (self.surface_flux + surface_flux) / 2 * dt +
+                       self.weights[0] * g_dots[0] * dt)
+        else:
+            surface = (self.surface_flux + surface_flux) / 2 * dt
+        if self.boundcond_surface == "robin":
+            # losses with the coefficient the solver used for this step
+            surface -= calc_h_surface(self.problem_description, sample,
+                                      t_step) * (
+                (self.temperatures[0] + temperatures[0]) / 2 -
+                sample.temperature_ambient) * dt
+
+        self.step_imbalance = stored - surface + reaction + regression
+        self.stored += stored
+        self.surface += surface
+        self.reaction += reaction
+        self.regression += regression
+        self.imbalance += self.step_imbalance
+        self.relative_imbalance = self.imbalance / max(
+            abs(self.stored), abs(self.surface) + abs(self.reaction) +
+            abs(self.regression), np.finfo(float).tiny)
+        self.temperatures, self.capacity, self.surface_flux = (
+            temperatures, capacity, surface_flux)
+        self.weights = weights
+
+        if (self.tolerance is not None and self.exceeded_time is None and
+                abs(self.relative_imbalance) > self.tolerance):
+            self.exceeded_time = sample.temporal_mesh[t_step + 1]
+            return True
+        return False
+
+    def summary(self):
+        """Returns the cumulative energies (J/m2) and the imbalance"""
+        return {"stored": self.stored, "surface": self.surface,
+                "reaction": self.reaction,
+                "regression": self.regression,
+                "imbalance": self.imbalance,
+                "relative_imbalance": self.relative_imbalance,
+                "exceeded_time": self.exceeded_time}
@@ -0,0 +1,118 @@
+"""
+Event detection for the solver.
+Events (e.g. ignition, back face temperature limit, critical mass loss rate)
+are defined as a quantity crossing a threshold. All the events are evaluated
+at the end of every time step and, when a crossing is detected, the time of
+the crossing is found between the two time steps. Terminal events stop the
+solver before time_total is reached.
+"""
+import numpy as np
+from scipy import optimize
+
+# import from local project
+from classes_and_functions.calc_parameters import calc_reaction_rate
+
+
+def surface_temperature(sample, temperatures, t_step):
+    """Returns the temperature of the exposed surface in K"""
+    return temperatures[0]
+
+
+def back_temperature(sample, temperatures, t_step):
+    """Returns the temperature of the back face in K"""
+    return temperatures[-1]
+
+
+def mass_loss_rate(sample, temperatures, t_step):
+    """Returns the mass loss rate per unit area in kg/m2s, integrating the
+    reaction rate over the depth of the sample (trapezoidal rule)"""
+    omega_dots = calc_reaction_rate(sample, temperatures,
+                                    sample.density.iloc[:, t_step].values)
+    return sample.dx * (np.sum(omega_dots) -
+                        (omega_dots[0] + omega_dots[-1]) / 2)
+
+
+# quantities that can be referred to by name in the event definitions
+event_quantities = {"surface_temperature": surface_temperature,
+                    "back_temperature": back_temperature,
+                    "mass_loss_rate": mass_loss_rate}
+
+event_directions = {"rising": 1, "falling": -1, "both": 0}
+
+
+class event_detector():
+    """
+    Evaluates all the events at every time step and keeps a log of the
+    events detected (name, time of the crossing and time step).
+    """
+
+    def __init__(self, events):
+        """initializes the detector from the list of event definitions"""
+        self.names = []
+        self.quantities = []
+        for event in events:
+            quantity = event["quantity"]
+            if not callable(quantity):
+                quantity = event_quantities[quantity]
+            self.quantities.append(quantity)
+            self.names.append(event.get("name", event["quantity"]
+                                        if isinstance(event["quantity"], str)
+                                        else quantity.__name__))
+        self.thresholds = np.array([event["threshold"] for event in events],
+                                   dtype=float)
+        self.directions = np.array([event_directions[
+            event.get("direction", "rising")] for event in events])
+        self.terminal = np.array([bool(event.get("terminal", True))
+                                  for event in events])
+
+        self.log = []
+        self.time_previous = None
+        self.temperatures_previous = None
+        self.g_previous = None
+
+    def evaluate(self, sample, temperatures, t_step):
+        """Returns the distance of every quantity to its threshold"""
+        return np.array([quantity(sample, temperatures, t_step)
+                         for quantity in self.quantities]) - self.thresholds
+
+    def find_crossing(self, sample, event, t, temperatures, t_step):
+        """Finds the time at which the event crosses its threshold, assuming
+        that the temperatures vary linearly between time steps"""
+        def g(fraction):
+            temperatures_fraction = (self.temperatures_previous + fraction *
+                                     (temperatures -
+                                      self.temperatures_previous))
+            return (self.quantities[event](sample, temperatures_fraction,
+                                           t_step) - self.thresholds[event])
+        g_start, g_end = g(0), g(1)
+        if g_start == 0:
+            fraction = 0
+        elif g_end == 0 or np.sign(g_start) == np.sign(g_end):
+            fraction = 1
+        else:
+            fraction = optimize.brentq(g, 0, 1, xtol=1e-12)
+        return self.time_previous + fraction * (t - self.time_previous)
+
+    def check(self, sample, t, temperatures, t_step):
+        """Evaluates the events for the temperatures at time t, logs the
+        events detected and returns True if a terminal event was detected"""
+        temperatures = np.asarray(temperatures, dtype=float)
+        g = self.evaluate(sample, temperatures, t_step)
+        terminate = False
+        if self.g_previous is not None:
+            rising = (self.g_previous < 0) & (g >= 0)
+            falling = (self.g_previous > 0) & (g <= 0)
+            detected = (((self.directions >= 0) & rising) |
+                        ((self.directions <= 0) & falling))
+            for event in np.flatnonzero(detected):
+                self.log.append({
+                    "name": self.names[event],
+                    "time": self.find_crossing(sample, event, t,
+                                               temperatures, t_step),
+                    "t_step": t_step,
+                    "terminal": bool(self.terminal[event])})
+            terminate = bool(np.any(detected & self.terminal))
+        self.time_previous = t
+        self.temperatures_previous = temperatures
+        self.g_previous = g
+        return terminate
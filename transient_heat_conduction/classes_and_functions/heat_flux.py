@@ -0,0 +1,87 @@
+"""
+Incident heat flux (ihf) at the exposed surface as a function of time.
+Supports constant, polynomial, sinusoidal and measured (time series) heat
+fluxes. Measured series are resampled onto the temporal mesh in a single
+vectorized call or evaluated on demand with a cursor based interpolator.
+"""
+import numpy as np
+
+
+def calc_ihf_polynomial(coefficients, times):
+    """Evaluates the polynomial a0x^0 + a1x^1 + .. + anx^n at the given times
+    (Horner's scheme, vectorized over the times)"""
+    times = np.asarray(times, dtype=float)
+    ihf = np.zeros_like(times)
+    for coeff in np.asarray(coefficients, dtype=float)[::-1]:
+        ihf = ihf * times + coeff
+    return ihf
+
+
+def load_ihf_series(ihf_coefficients):
+    """Returns the times and heat fluxes of a measured ihf. The input is
+    either an array of (time, flux) pairs or the name of a text file with
+    two columns (comma or white space separated)"""
+    if isinstance(ihf_coefficients, str):
+        with open(ihf_coefficients, "r") as f:
+            delimiter = "," if "," in f.readline() else None
+        try:
+            series = np.loadtxt(ihf_coefficients, delimiter=delimiter,
+                                ndmin=2)
+        except ValueError:
+            # file with a header line
+            series = np.loadtxt(ihf_coefficients, delimiter=delimiter,
+                                ndmin=2, skiprows=1)
+    else:
+        series = np.asarray(ihf_coefficients, dtype=float)
+    if series.ndim != 2 or series.shape[1] != 2:
+        raise ValueError("ihf time series needs two columns")
+    return series[:, 0], series[:, 1]
+
+
+class ihf_interpolator():
+    """
+    Linear interpolation of a measured heat flux. Arrays of times are
+    resampled at once, while single times are evaluated with a cursor that
+    is moved from the previous evaluation, so that evaluating successive
+    times (as the solver steps forward) does not require a search.
+    """
+
+    def __init__(self, times, fluxes):
+        """initializes the interpolator with the measured series"""
+        self.times = np.asarray(times, dtype=float)
+        self.fluxes = np.asarray(fluxes, dtype=float)
+        self.cursor = 0
+
+    def __call__(self, t):
+        """Returns the heat flux at time(s) t. The flux is held constant
+        outside the measured time range"""
+        if np.ndim(t) > 0:
+            return np.interp(t, self.times, self.fluxes)
+        if t <= self.times[0]:
+            self.cursor = 0
+            return self.fluxes[0]
+        if t >= self.times[-1]:
+            self.cursor = self.times.shape[0] - 2
+            return self.fluxes[-1]
+        while self.times[self.cursor + 1] < t:
+            self.cursor += 1
+        while self.times[self.cursor] > t:
+            self.cursor -= 1
+        fraction = ((t - self.times[self.cursor]) /
+                    (self.times[self.cursor + 1] - self.times[self.cursor]))
+        return (self.fluxes[self.cursor] + fraction *
+                (self.fluxes[self.cursor + 1] - self.fluxes[self.cursor]))
+
+
+def ihf_function(ihf_type, ihf_coefficients):
+    """Returns a function that evaluates the ihf (in W/m2) at a time or at
+    an array of times"""
+    if ihf_type == "constant":
+        return lambda t: np.zeros_like(t, dtype=float) + ihf_coefficients
+    elif ihf_type == "polynomial":
+        return lambda t: calc_ihf_polynomial(ihf_coefficients, t)
+    elif ihf_type == "sinusoidal":
+        amplitude, omega, phi = ihf_coefficients
+        return lambda t: amplitude * np.sin(omega * np.asarray(t) + phi)
+    elif ihf_type == "time_series":
+        return ihf_interpolator(*load_ihf_series(ihf_coefficients))
@@ -0,0 +1,77 @@
+"""
+Probes (thermocouples) placed at arbitrary depths in the sample.
+The interpolation weights against the spatial mesh are calculated once, so
+that during the time loop only the probe values are recorded (and linearly
+interpolated in time onto the requested sampling times).
+"""
+import numpy as np
+
+
+def calc_probe_weights(space_mesh, probe_depths):
+    """Returns, for each probe, the index of the node immediately before the
+    probe and the linear interpolation weight of the node after it"""
+    probe_depths = np.asarray(probe_depths, dtype=float)
+    indices = np.searchsorted(space_mesh, probe_depths, side="right") - 1
+    indices = np.clip(indices, 0, space_mesh.shape[0] - 2)
+    weights = (probe_depths - space_mesh[indices]) / (
+        space_mesh[indices + 1] - space_mesh[indices])
+
+    return indices, weights
+
+
+class probe_recorder():
+    """
+    Records the temperature at the probe depths as the solver steps forward
+    in time. Results are stored in a dense array of shape
+    (number of sampling times, number of probes).
+    """
+
+    def __init__(self, space_mesh, probe_depths, probe_times,
+                 temporal_mesh):
+        """initializes the probes and pre-calculates the spatial weights"""
+        self.depths = np.atleast_1d(np.asarray(probe_depths, dtype=float))
+        self.indices, self.weights = calc_probe_weights(space_mesh,
+                                                        self.depths)
+        if probe_times is None:
+            self.times = np.array(temporal_mesh, dtype=float)
+        else:
+            self.times = np.atleast_1d(np.asarray(probe_times, dtype=float))
+        self.temperatures = np.full((self.times.shape[0],
+                                     self.depths.shape[0]), np.nan)
+
+        # index of the next sampling time and values at the previous step
+        self.cursor = 0
+        self.time_previous = None
+        self.values_previous = None
+
+    def update_mesh(self, space_mesh):
+        """Recalculates the spatial weights for a moving mesh (probes in the
+        layer that has regressed record the surface temperature)"""
+        self.indices, self.weights = calc_probe_weights(space_mesh,
+                                                        self.depths)
+        self.weights = np.clip(self.weights, 0, 1)
+
+    def interpolate(self, temperatures):
+        """Returns the temperature at the probe depths given the temperature
+        at the nodes of the spatial mesh"""
+        temperatures = np.asarray(temperatures, dtype=float)
+        return ((1 - self.weights) * temperatures[self.indices] +
+                self.weights * temperatures[self.indices + 1])
+
+    def record(self, t, temperatures):
+        """Records the probe values at time t and fills every sampling time
+        between the previous recorded time and t"""
+        values = self.interpolate(temperatures)
+        end = np.searchsorted(self.times, t, side="right")
+        if end > self.cursor:
+            if self.time_previous is None:
+                self.temperatures[self.cursor:end] = values
+            else:
+                fraction = ((self.times[self.cursor:end] - self.time_previous)
+                            / (t - self.time_previous))
+                self.temperatures[self.cursor:end] = (
+                    self.values_previous + fraction[:, np.newaxis] *
+                    (values - self.values_previous))
+            self.cursor = end
+        self.time_previous = t
+        self.values_previous = values
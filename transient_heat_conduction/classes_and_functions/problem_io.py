@@ -0,0 +1,83 @@
+"""
+Serialization of problem descriptions and solutions to JSON.
+Problem descriptions contain tuples, numpy arrays and numpy scalars, which
+are converted to lists and floats. The canonical JSON (sorted keys) of a
+problem description identifies it (e.g. to find identical jobs).
+"""
+import json
+import hashlib
+import numpy as np
+
+
+def json_compatible(value, strict=True):
+    """Returns value with numpy arrays, numpy scalars and tuples converted
+    to lists and floats. Other objects (e.g. functions) raise a TypeError if
+    strict, or are converted to their string representation"""
+    if isinstance(value, dict):
+        return {str(key): json_compatible(item, strict)
+                for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [json_compatible(item, strict) for item in value]
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if strict:
+        raise TypeError(f"{type(value).__name__} can not be serialized")
+    return str(value)
+
+
+def problem_to_json(problem_description):
+    """Returns the canonical JSON of a problem description"""
+    return json.dumps(json_compatible(problem_description), sort_keys=True)
+
+
+def problem_from_json(text):
+    """Returns the problem description of a JSON text"""
+    problem_description = json.loads(text)
+    if isinstance(problem_description.get("temperature_initial"), list):
+        problem_description["temperature_initial"] = np.array(
+            problem_description["temperature_initial"], dtype=float)
+    return problem_description
+
+
+def problem_hash(problem_description):
+    """Returns the hash (sha256) of the canonical JSON of a problem
+    description"""
+    return hashlib.sha256(
+        problem_to_json(problem_description).encode()).hexdigest()
+
+
+def solution_to_json_compatible(solution):
+    """Returns the meshes, temperatures, probes, events and diagnostics of a
+    solution as a dictionary of lists and floats (NaN where the temperatures
+    were not calculated)"""
+    sample = solution["sample"]
+    result = {"problem_description": json_compatible(
+                  solution["problem_description"], strict=False),
+              "computing_time": solution["computing_time"],
+              "space_mesh": json_compatible(sample.space_mesh),
+              "temporal_mesh": json_compatible(sample.temporal_mesh),
+              "events": json_compatible(solution["events"], strict=False),
+              "diagnostics": json_compatible(solution["diagnostics"],
+                                             strict=False),
+              "probes": None}
+    if hasattr(sample, "temperatures_2d"):
+        result["lateral_mesh"] = json_compatible(sample.lateral_mesh)
+        result["output_times"] = json_compatible(sample.output_times)
+        result["temperatures_2d"] = json_compatible(sample.temperatures_2d)
+    elif sample.temperatures is None:
+        result["temperatures"] = None
+    else:
+        result["temperatures"] = json_compatible(sample.temperatures.values)
+    if solution["probes"] is not None:
+        result["probes"] = {
+            "depths": json_compatible(solution["probes"].depths),
+            "times": json_compatible(solution["probes"].times),
+            "temperatures": json_compatible(
+                solution["probes"].temperatures)}
+    return result
@@ -5,9 +5,19 @@ scheme.
 """
 
 import numpy as np
+import os
 import sys
 import pandas as pd
 
+# import from local project
+from classes_and_functions.probes import probe_recorder
+from classes_and_functions.events import (event_detector, event_quantities,
+                                          event_directions)
+from classes_and_functions.heat_flux import ihf_function, load_ihf_series
+from classes_and_functions.checkpoint import warm_start_profile
+from classes_and_functions.storage import (validate_storage, stored_fields,
+                                           rolling_field)
+
 
 class solid_sample():
     """
@@ -31,6 +41,11 @@ class solid_sample():
         if problem_description["problem_type"] not in ["direct", "inverse"]:
             print("Error, problem type not valid")
             sys.exit(1)
+        # validate geometry
+        if problem_description.get("geometry", "1d") not in [
+                "1d", "2d_planar", "2d_axisymmetric"]:
+            print("Error, geometry not valid")
+            sys.exit(1)
         # validate properties type
         if problem_description["properties_type"] not in [
                 "constant", "temperature_dependent"]:
@@ -114,7 +129,8 @@ class solid_sample():
         elif problem_description["boundcond_surface"] == "robin":
             if problem_description["ihf_type"] not in ["constant",
                                                        "polynomial",
-                                                       "sinusoidal"]:
+                                                       "sinusoidal",
+                                                       "time_series"]:
                 print("Error, ihf type not valid")
                 sys.exit(1)
             # constant ihf
@@ -146,6 +162,21 @@ class solid_sample():
                     print("Error, ihf coefficients not valid for sinusoidal"
                           " ihf")
                     exit_value = True
+            # measured ihf (time series)
+            elif problem_description["ihf_type"] == "time_series":
+                try:
+                    series_times, series_fluxes = load_ihf_series(
+                        problem_description["ihf_coefficients"])
+                except (ValueError, TypeError, OSError):
+                    print("Error, ihf coefficients not valid for time series"
+                          " ihf")
+                    sys.exit(1)
+                if (series_times.shape[0] < 2 or
+                        np.any(np.diff(series_times) <= 0) or
+                        not np.all(np.isfinite(series_fluxes))):
+                    print("Error, ihf coefficients not valid for time series"
+                          " ihf")
+                    exit_value = True
 
             # surface heat losses
             if problem_description[
@@ -175,11 +206,10 @@ class solid_sample():
             print("Error, back face boundary condition not valid")
             sys.exit(1)
         elif problem_description["boundcond_back"] == "conductive_losses":
-            try:
-                float(problem_description["conductivity_subs"])
-            except (ValueError, TypeError):
-                print("Error, conductivity of substrate material not valid")
-                exit_value = True
+            # the substrate (its temperature and thickness) is not modelled,
+            # so the heat conducted into it cannot be calculated
+            print("Error, conductive losses at the back face not available")
+            sys.exit(1)
         if exit_value:
             sys.exit(1)
 
@@ -208,6 +238,226 @@ class solid_sample():
         if exit_value:
             sys.exit(1)
 
+        # probes (thermocouples)
+        if problem_description.get("probe_depths") is not None:
+            try:
+                probe_depths = np.array(problem_description["probe_depths"],
+                                        dtype=float)
+            except (ValueError, TypeError):
+                print("Error, probe depths not valid")
+                sys.exit(1)
+            if (probe_depths.ndim > 1 or probe_depths.size == 0 or
+                    np.any(probe_depths < 0) or
+                    np.any(probe_depths > float(
+                        problem_description["depth"]))):
+                print("Error, probe depths not valid")
+                sys.exit(1)
+        if problem_description.get("probe_times") is not None:
+            if problem_description.get("probe_depths") is None:
+                print("Error, probe times given but no probe depths")
+                sys.exit(1)
+            try:
+                probe_times = np.array(problem_description["probe_times"],
+                                       dtype=float)
+            except (ValueError, TypeError):
+                print("Error, probe times not valid")
+                sys.exit(1)
+            if (probe_times.ndim > 1 or probe_times.size == 0 or
+                    np.any(probe_times < 0) or
+                    np.any(probe_times > float(
+                        problem_description["time_total"])) or
+                    np.any(np.diff(np.atleast_1d(probe_times)) <= 0)):
+                print("Error, probe times not valid")
+                sys.exit(1)
+        if problem_description.get("probes_only") not in [None, False, True]:
+            print("Error, probes only not valid")
+            sys.exit(1)
+        if (problem_description.get("probes_only") and
+                problem_description.get("probe_depths") is None):
+            print("Error, probes only given but no probe depths")
+            sys.exit(1)
+
+        # direct solution method
+        if problem_description.get("direct_method", "time_stepping") not in [
+                "time_stepping", "duhamel"]:
+            print("Error, direct method not valid")
+            sys.exit(1)
+        elif problem_description.get("direct_method") == "duhamel":
+            if (problem_description.get("geometry", "1d") != "1d" or
+                    problem_description["properties_type"] != "constant" or
+                    problem_description["material_type"] != "inert" or
+                    problem_description["boundcond_back"] != "insulated" or
+                    isinstance(problem_description["temperature_initial"],
+                               np.ndarray) or
+                    (problem_description["boundcond_surface"] == "robin" and
+                     (problem_description["surface_losses_type"] != "linear"
+                      or float(problem_description["h_total"]) <= 0))):
+                print("Error, duhamel method needs a 1-D inert sample with "
+                      "constant properties, uniform initial temperature, "
+                      "linear surface losses and an insulated back face")
+                sys.exit(1)
+            if problem_description.get("duhamel_step_response",
+                                       "analytical") not in ["analytical",
+                                                             "numerical"]:
+                print("Error, duhamel step response not valid")
+                sys.exit(1)
+            for property_name in ["events", "checkpoint_file",
+                                  "resume_from", "warm_start_from",
+                                  "nonlinear_solver", "time_integrator",
+                                  "energy_tolerance"]:
+                if problem_description.get(property_name) is not None:
+                    print(f"Error, {property_name} not available for the "
+                          "duhamel method")
+                    sys.exit(1)
+
+        # time steps between outputs
+        if problem_description.get("output_interval") is not None:
+            try:
+                output_interval = int(problem_description["output_interval"])
+            except (ValueError, TypeError):
+                print("Error, output interval not valid")
+                sys.exit(1)
+            if (output_interval != problem_description["output_interval"] or
+                    output_interval < 1):
+                print("Error, output interval not valid")
+                sys.exit(1)
+
+        # storage of the results
+        if problem_description.get("storage") is not None:
+            if problem_description.get("geometry", "1d") != "1d":
+                print("Error, storage policies are only available for 1-D "
+                      "samples")
+                sys.exit(1)
+            validate_storage(problem_description["storage"])
+
+        # energy balance
+        if problem_description.get("energy_tolerance") is not None:
+            if (not isinstance(problem_description["energy_tolerance"],
+                               (int, float)) or
+                    problem_description["energy_tolerance"] <= 0):
+                print("Error, energy tolerance not valid")
+                sys.exit(1)
+        if problem_description.get("energy_terminal") not in [None, True,
+                                                              False]:
+            print("Error, energy terminal not valid")
+            sys.exit(1)
+
+        # time step and non-linear solver
+        if problem_description.get("time_step") is not None:
+            try:
+                time_step = float(problem_description["time_step"])
+            except (ValueError, TypeError):
+                print("Error, time step not valid")
+                sys.exit(1)
+            if time_step <= 0 or time_step >= float(
+                    problem_description["time_total"]):
+                print("Error, time step not valid")
+                sys.exit(1)
+        if problem_description.get("nonlinear_solver", "lagged") not in [
+                "lagged", "newton"]:
+            print("Error, non-linear solver not valid")
+            sys.exit(1)
+        elif problem_description.get("nonlinear_solver") == "newton":
+            newton_tolerance = problem_description.get("newton_tolerance",
+                                                       1e-6)
+            newton_max_iterations = problem_description.get(
+                "newton_max_iterations", 20)
+            if (not isinstance(newton_tolerance, (int, float)) or
+                    newton_tolerance <= 0):
+                print("Error, newton tolerance not valid")
+                sys.exit(1)
+            if (not isinstance(newton_max_iterations, (int, np.integer)) or
+                    newton_max_iterations < 1):
+                print("Error, newton maximum iterations not valid")
+                sys.exit(1)
+            # the residual has no flux through the back face
+            if problem_description["boundcond_back"] != "insulated":
+                print("Error, newton solver only available with an "
+                      "insulated back face")
+                sys.exit(1)
+
+        if problem_description.get("time_integrator",
+                                   "crank_nicolson") not in [
+                                       "crank_nicolson", "tr_bdf2",
+                                       "rannacher"]:
+            print("Error, time integrator not valid")
+            sys.exit(1)
+        elif problem_description.get("time_integrator") in ["tr_bdf2",
+                                                            "rannacher"]:
+            if problem_description.get("nonlinear_solver") == "newton":
+                print("Error, newton solver only available with the "
+                      "crank_nicolson time integrator")
+                sys.exit(1)
+            startup_steps = problem_description.get("startup_steps", 2)
+            if (not isinstance(startup_steps, (int, np.integer)) or
+                    startup_steps < 0):
+                print("Error, startup steps not valid")
+                sys.exit(1)
+
+        # surface regression (moving mesh)
+        if problem_description.get("surface_regression") not in [None, True,
+                                                                 False]:
+            print("Error, surface regression not valid")
+            sys.exit(1)
+        elif problem_description.get("surface_regression"):
+            if (problem_description["material_type"] != "reactive" or
+                    problem_description.get("geometry", "1d") != "1d" or
+                    problem_description.get("direct_method") == "duhamel" or
+                    problem_description.get("nonlinear_solver") == "newton" or
+                    problem_description.get("time_integrator") in [
+                        "tr_bdf2", "rannacher"]):
+                print("Error, surface regression only available for 1-D "
+                      "reactive samples solved with the lagged "
+                      "crank_nicolson scheme")
+                sys.exit(1)
+
+        # checkpoints, restart and warm start
+        if problem_description.get("checkpoint_file") is not None:
+            checkpoint_interval = problem_description.get(
+                "checkpoint_interval")
+            if (not isinstance(checkpoint_interval, (int, np.integer)) or
+                    checkpoint_interval < 1):
+                print("Error, checkpoint interval not valid")
+                sys.exit(1)
+        for property_name in ["resume_from", "warm_start_from"]:
+            source = problem_description.get(property_name)
+            if property_name == "warm_start_from" and isinstance(source,
+                                                                 dict):
+                # solutions whose temperatures were not stored
+                if source["sample"].temperatures is None:
+                    print("Error, warm start solution has no temperatures")
+                    sys.exit(1)
+                continue
+            if source is None:
+                continue
+            if not (isinstance(source, str) and os.path.isfile(source)):
+                print(f"Error, {property_name} not valid")
+                sys.exit(1)
+
+        # events
+        if problem_description.get("events") is not None:
+            if not isinstance(problem_description["events"], (list, tuple)):
+                print("Error, events not valid")
+                sys.exit(1)
+            for event in problem_description["events"]:
+                if not isinstance(event, dict):
+                    print("Error, events not valid")
+                    sys.exit(1)
+                if not (callable(event.get("quantity")) or
+                        event.get("quantity") in event_quantities):
+                    print("Error, event quantity not valid")
+                    exit_value = True
+                try:
+                    float(event.get("threshold"))
+                except (ValueError, TypeError):
+                    print("Error, event threshold not valid")
+                    exit_value = True
+                if event.get("direction", "rising") not in event_directions:
+                    print("Error, event direction not valid")
+                    exit_value = True
+            if exit_value:
+                sys.exit(1)
+
     def assign_properties(self, problem_description):
         """Assigns properties given by the user to the sample class and
         calculates additional parameters"""
@@ -232,16 +482,26 @@ class solid_sample():
         diffusivity_0 = conductivity_0/density_0/heat_capacity_0
         self.dx = self.space_mesh[1] - self.space_mesh[0]
         self.dt = (1/6)*(self.dx**2/diffusivity_0)
+        if problem_description.get("time_step") is not None:
+            # time step given by the user (for the implicit solvers)
+            self.dt = base_array_space + float(
+                problem_description["time_step"])
         self.temporal_mesh = np.arange(0, self.time_total, self.dt[0])
 
         # values are stored in DataFrames where columns names are time stamps
-        self.conductivity = pd.DataFrame(columns=self.temporal_mesh)
+        # (float dtype so that numpy ufuncs can operate on the columns)
+        self.conductivity = pd.DataFrame(index=np.arange(self.x_divisions),
+                                         columns=self.temporal_mesh,
+                                         dtype=float)
         self.density = self.conductivity.copy(deep=True)
         self.heat_capacity = self.conductivity.copy(deep=True)
         self.fo = self.conductivity.copy(deep=True)
         self.upsilon = self.conductivity.copy(deep=True)
         self.temperatures = self.conductivity.copy(deep=True)
-        if not isinstance(problem_description[
+        if problem_description.get("warm_start_from") is not None:
+            temperature_initial_0 = warm_start_profile(
+                problem_description["warm_start_from"], self.space_mesh)
+        elif not isinstance(problem_description[
                 "temperature_initial"], np.ndarray):
             temperature_initial_0 = base_array_space + problem_description[
                 "temperature_initial"]
@@ -254,6 +514,41 @@ class solid_sample():
                                      temperature_initial_0)]:
             property_name.iloc[:, 0] = data
 
+        # position of the surface at every time step (only if the surface
+        # regresses, the nodes then follow the surface)
+        self.surface_position = None
+        if problem_description.get("surface_regression"):
+            self.surface_position = np.full(self.temporal_mesh.shape, np.nan)
+            self.surface_position[0] = 0
+
+        # first time step to be solved (not 0 if resumed from a checkpoint)
+        self.t_step_start = 0
+
+        # solver diagnostics (e.g. newton iterations per time step)
+        self.diagnostics = {}
+
+        # probes (thermocouples)
+        # ----------------------
+        self.probes = None
+        if problem_description.get("probe_times") is not None:
+            # probes are only sampled up to the last time of the mesh
+            if np.max(np.asarray(problem_description["probe_times"],
+                                 dtype=float)) > self.temporal_mesh[-1]:
+                print("Error, probe times after the last time step")
+                sys.exit(1)
+        if problem_description.get("probe_depths") is not None:
+            self.probes = probe_recorder(self.space_mesh,
+                                         problem_description["probe_depths"],
+                                         problem_description.get(
+                                             "probe_times"),
+                                         self.temporal_mesh)
+
+        # events
+        # ------
+        self.events = None
+        if problem_description.get("events") is not None:
+            self.events = event_detector(problem_description["events"])
+
         # heat transfer environment
         # -------------------------
         self.temperature_ambient = problem_description["temperature_ambient"]
@@ -266,49 +561,34 @@ class solid_sample():
             self.nhf = problem_description["nhf"]
         elif problem_description["boundcond_surface"] == "robin":
 
-            # incident heat flux
+            # incident heat flux (resampled onto the temporal mesh)
             self.ihf_coeffs = problem_description["ihf_coefficients"]
-            if problem_description["ihf_type"] == "constant":
-                self.ihf = np.zeros_like(
-                    self.temporal_mesh) + self.ihf_coeffs
-            elif problem_description["ihf_type"] == "polynomial":
-                ihf_terms = []
-                for exp, coeff in enumerate(self.ihf_coeffs):
-                    ihf_terms.append(coeff * self.temporal_mesh**exp)
-                    self.ihf = sum(ihf_terms)
-            elif problem_description["ihf_type"] == "sinusoidal":
-                self.ihf = self.ihf_coeffs[0] * np.sin(
-                    self.ihf_coeffs[1]*self.temporal_mesh + self.ihf_coeffs[2])
+            self.ihf_function = ihf_function(problem_description["ihf_type"],
+                                             self.ihf_coeffs)
+            self.ihf = self.ihf_function(self.temporal_mesh)
 
             # surface heat losses
             if problem_description["surface_losses_type"] == "linear":
                 self.h_total = problem_description["h_total"]
+                self.absorptivity = (
+                    1 if problem_description.get("absorptivity") is None
+                    else problem_description["absorptivity"])
             elif problem_description["surface_losses_type"] == "non-linear":
                 self.h_conv = problem_description["h_convective"]
                 self.absorptivity = problem_description["absorptivity"]
                 self.emissivity = problem_description["emissivity"]
                 self.stefan_boltz = 5.67e-8
 
-        # back face boundary condition
-        if problem_description["boundcond_back"] == "conductive_losses":
-            self.conductivity_subs = problem_description[
-                "conductivity_subs"]
-
         # pyrolysis
         # ---------
-        self.pre_exp_factor = 0
-        self.activation_energy = 0
-        self.heat_reaction = 0
-        self.reaction_order = 0
-        for prop, property_name in [
-                (self.pre_exp_factor, "pre_exp_factor"),
-                (self.activation_energy, "activation_energy"),
-                (self.heat_reaction, "heat_reaction"),
-                (self.reaction_order, "reaction_order")]:
-            if problem_description[property_name] is None:
-                prop = 0
+        for property_name in ["pre_exp_factor", "activation_energy",
+                              "heat_reaction", "reaction_order"]:
+            if (problem_description["material_type"] == "inert" or
+                    problem_description[property_name] is None):
+                setattr(self, property_name, 0)
             else:
-                prop = problem_description[property_name]
+                setattr(self, property_name,
+                        problem_description[property_name])
         self.omega_dots = self.conductivity.copy(deep=True)
         self.g_dots = self.conductivity.copy(deep=True)
         self.R = 8.314
@@ -317,3 +597,34 @@ class solid_sample():
         # -------------------
         self.indepth_absorptivity = problem_description[
             "in-depth_absorptivity"]
+
+        # if the probes are the only output, only the last two time steps of
+        # the fields are kept
+        if problem_description.get("probes_only"):
+            for field in stored_fields:
+                setattr(self, field, rolling_field(getattr(self, field)))
+
+    def truncate(self, t_step):
+        """Discards the time steps after t_step (used when the solver is
+        stopped before time_total is reached)"""
+        self.temporal_mesh = self.temporal_mesh[:t_step + 1]
+        for property_name in stored_fields:
+            field = getattr(self, property_name)
+            if isinstance(field, rolling_field):
+                field.truncate(t_step)
+            else:
+                setattr(self, property_name, field.iloc[:, :t_step + 1])
+        if hasattr(self, "ihf"):
+            self.ihf = self.ihf[:t_step + 1]
+        if self.surface_position is not None:
+            self.surface_position = self.surface_position[:t_step + 1]
+
+    def node_positions(self, t_step):
+        """Returns the positions of the nodes at time step t_step, measured
+        from the initial surface (the nodes follow a regressing surface,
+        equally spaced between the surface and the back face)"""
+        if self.surface_position is None:
+            return self.space_mesh
+        surface_position = self.surface_position[t_step]
+        return surface_position + self.space_mesh * (
+            1 - surface_position / self.depth)
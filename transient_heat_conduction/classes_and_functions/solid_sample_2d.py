@@ -0,0 +1,160 @@
+"""
+Defines the sample class for 2-D problems (planar or axisymmetric r-z).
+The sample is exposed at x=0 and insulated at x=depth. Laterally, it is
+symmetric at y=0 (or r=0, the axis) and either insulated or losing heat by
+convection at its side, y=width (or r=width, the radius).
+"""
+
+import numpy as np
+import sys
+
+# import from local project
+from classes_and_functions.solid_sample import solid_sample
+from classes_and_functions.heat_flux import ihf_function
+
+
+class solid_sample_2d(solid_sample):
+    """
+    Contains all the geometrical and thermophysical properties of a 2-D
+    sample as well as the description of the thermal environment. Input
+    common to 1-D problems is validated by solid_sample.
+    """
+
+    def validate_input(self, problem_description):
+        """validates the input provided by the user"""
+        super().validate_input(problem_description)
+
+        # validate numerical input of the lateral geometry
+        exit_value = False
+        for property_name in ["width", "y_divisions"]:
+            try:
+                float(problem_description.get(property_name))
+            except (ValueError, TypeError):
+                print(f"Error, {property_name} not valid")
+                exit_value = True
+        if exit_value:
+            sys.exit(1)
+
+        # validate the side boundary condition
+        if problem_description.get("boundcond_side", "insulated") not in [
+                "insulated", "convective"]:
+            print("Error, side boundary condition not valid")
+            sys.exit(1)
+        elif problem_description.get("boundcond_side") == "convective":
+            try:
+                float(problem_description.get("h_side"))
+            except (ValueError, TypeError):
+                print("Error, side heat transfer coefficient not valid")
+                sys.exit(1)
+
+        # validate the 2-D solver
+        if problem_description.get("solver_2d", "adi") not in ["adi",
+                                                               "sparse"]:
+            print("Error, 2-D solver not valid")
+            sys.exit(1)
+
+        # features only available for 1-D problems
+        if (problem_description["properties_type"] != "constant" or
+                problem_description["material_type"] != "inert" or
+                problem_description["boundcond_back"] != "insulated"):
+            print("Error, 2-D problems need constant properties, an inert"
+                  " material and an insulated back face")
+            sys.exit(1)
+        for property_name in ["probe_depths", "events", "checkpoint_file",
+                              "resume_from", "warm_start_from",
+                              "nonlinear_solver", "time_integrator",
+                              "energy_tolerance", "surface_regression"]:
+            if problem_description.get(property_name) is not None:
+                print(f"Error, {property_name} not available for 2-D"
+                      " problems")
+                sys.exit(1)
+
+        # validate initial temperature if 2-D array
+        temperature_initial = problem_description["temperature_initial"]
+        if (isinstance(temperature_initial, np.ndarray) and
+                temperature_initial.ndim == 2 and
+                temperature_initial.shape[1] != problem_description[
+                    "y_divisions"]):
+            print("Error, size of the initial temperature array not valid")
+            sys.exit(1)
+
+    def assign_properties(self, problem_description):
+        """Assigns properties given by the user to the sample class and
+        calculates additional parameters"""
+
+        # geometry
+        # -------
+        self.geometry = problem_description["geometry"]
+        self.depth = problem_description["depth"]
+        self.x_divisions = problem_description["x_divisions"]
+        self.space_mesh = np.linspace(0, self.depth, self.x_divisions)
+        self.width = problem_description["width"]
+        self.y_divisions = problem_description["y_divisions"]
+        self.lateral_mesh = np.linspace(0, self.width, self.y_divisions)
+        self.time_total = problem_description["time_total"]
+
+        # termophysical properties (constant)
+        # -----------------------------------
+        self.conductivity = problem_description["conductivity_coeff"][0]
+        self.density = problem_description["density_coeff"][0]
+        self.heat_capacity = problem_description["heat_capacity_coeff"][0]
+        diffusivity = self.conductivity / self.density / self.heat_capacity
+
+        self.dx = self.space_mesh[1] - self.space_mesh[0]
+        self.dy = self.lateral_mesh[1] - self.lateral_mesh[0]
+        self.dt = (1/6)*(min(self.dx, self.dy)**2/diffusivity)
+        if problem_description.get("time_step") is not None:
+            self.dt = float(problem_description["time_step"])
+        self.temporal_mesh = np.arange(0, self.time_total, self.dt)
+        self.fo_x = diffusivity * self.dt / self.dx**2
+        self.fo_y = diffusivity * self.dt / self.dy**2
+
+        # temperatures (depth x lateral) are stored every output interval
+        # (validated by solid_sample, every time step if None)
+        self.output_interval = int(problem_description.get(
+            "output_interval") or 1)
+        output_steps = np.arange(0, self.temporal_mesh.shape[0],
+                                 self.output_interval)
+        if output_steps[-1] != self.temporal_mesh.shape[0] - 1:
+            output_steps = np.append(output_steps,
+                                     self.temporal_mesh.shape[0] - 1)
+        self.output_steps = output_steps
+        self.output_times = self.temporal_mesh[output_steps]
+        self.temperatures_2d = np.zeros((output_steps.shape[0],
+                                         self.x_divisions, self.y_divisions))
+        temperature_initial = np.asarray(problem_description[
+            "temperature_initial"], dtype=float)
+        if temperature_initial.ndim == 1:
+            temperature_initial = temperature_initial[:, np.newaxis]
+        self.temperatures_2d[0] = temperature_initial
+
+        # heat transfer environment
+        # -------------------------
+        self.temperature_ambient = problem_description["temperature_ambient"]
+        if problem_description["boundcond_surface"] == "dirichlet":
+            self.temperature_surface = problem_description[
+                "temperature_surface"]
+        elif problem_description["boundcond_surface"] == "neunman":
+            self.nhf = problem_description["nhf"]
+        elif problem_description["boundcond_surface"] == "robin":
+            self.ihf_coeffs = problem_description["ihf_coefficients"]
+            self.ihf_function = ihf_function(problem_description["ihf_type"],
+                                             self.ihf_coeffs)
+            self.ihf = self.ihf_function(self.temporal_mesh)
+            if problem_description["surface_losses_type"] == "linear":
+                self.h_total = problem_description["h_total"]
+                self.absorptivity = (
+                    1 if problem_description.get("absorptivity") is None
+                    else problem_description["absorptivity"])
+            elif problem_description["surface_losses_type"] == "non-linear":
+                self.h_conv = problem_description["h_convective"]
+                self.absorptivity = problem_description["absorptivity"]
+                self.emissivity = problem_description["emissivity"]
+                self.stefan_boltz = 5.67e-8
+        self.h_side = 0
+        if problem_description.get("boundcond_side") == "convective":
+            self.h_side = problem_description["h_side"]
+
+        self.probes = None
+        self.events = None
+        self.diagnostics = {}
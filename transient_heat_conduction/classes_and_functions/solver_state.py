@@ -0,0 +1,21 @@
+"""
+State of the solver at a time step, as yielded by iter_solve.
+"""
+import numpy as np
+
+
+class solver_state():
+    """
+    State of the solver at a time step: time step index, time and
+    temperatures (1-D profile or 2-D field). The temperatures are a
+    read-only copy, so the state remains valid (and the solver cannot be
+    modified through it) while the solver continues.
+    """
+    __slots__ = ["t_step", "time", "temperatures"]
+
+    def __init__(self, sample, t_step, temperatures):
+        """initializes the state with a copy of the temperatures"""
+        self.t_step = t_step
+        self.time = sample.temporal_mesh[t_step]
+        self.temperatures = np.array(temperatures, dtype=float)
+        self.temperatures.flags.writeable = False
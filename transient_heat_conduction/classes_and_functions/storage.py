@@ -0,0 +1,257 @@
+"""
+Storage of the results of the direct solver.
+The solver calculates and keeps every field in float64 at every time step
+(only the last two time steps if the probes are the only output, see
+rolling_field). Once the run is finished, each field can be compacted
+following a storage policy: dtype (float64, float32 or int16 scaled
+between the minimum and maximum of the field), time decimation (every n-th
+time step plus the last one) or not stored at all. Solutions are saved to
+numpy npz files.
+"""
+import sys
+import json
+import numpy as np
+import pandas as pd
+from classes_and_functions.problem_io import json_compatible
+
+# fields of the 1-D sample that follow a storage policy
+stored_fields = ["temperatures", "conductivity", "density", "heat_capacity",
+                 "fo", "upsilon", "omega_dots", "g_dots"]
+
+# dtypes of the stored fields
+storage_dtypes = ["float64", "float32", "int16"]
+
+# largest integer of the scaled fields (the smallest one marks NaN)
+int16_max = np.iinfo(np.int16).max
+
+
+class scaled_field():
+    """
+    Field stored as int16, with temperatures (or properties) = offset +
+    scale * data. The scale is chosen so that the range of the field spans
+    the range of int16 (temperatures between 288 and 900 K are stored to
+    0.01 K).
+    """
+
+    def __init__(self, frame):
+        """scales the values of a DataFrame (nodes x time steps)"""
+        values = frame.values
+        finite = np.isfinite(values)
+        minimum = np.min(values[finite]) if finite.any() else 0
+        maximum = np.max(values[finite]) if finite.any() else 0
+        self.offset = (maximum + minimum) / 2
+        self.scale = (maximum - minimum) / (2 * int16_max) or 1
+        self.data = np.full(values.shape, -int16_max - 1, dtype=np.int16)
+        self.data[finite] = np.round(
+            (values[finite] - self.offset) / self.scale)
+        self.index = frame.index.values
+        self.columns = frame.columns.values
+
+    @property
+    def values(self):
+        """decoded values (float64, NaN where not calculated)"""
+        values = self.offset + self.scale * self.data.astype(float)
+        values[self.data == -int16_max - 1] = np.nan
+        return values
+
+    @property
+    def nbytes(self):
+        """memory used by the stored values"""
+        return self.data.nbytes
+
+    def to_frame(self):
+        """returns the decoded field as a DataFrame"""
+        return pd.DataFrame(self.values, index=self.index,
+                            columns=self.columns)
+
+
+class rolling_indexer():
+    """
+    Positional indexer of a rolling_field, field.iloc[nodes, t_step], with
+    t_step an integer (negative from the end of the temporal mesh).
+    """
+
+    def __init__(self, field):
+        """indexer of the field"""
+        self.field = field
+
+    def __getitem__(self, key):
+        """values of the nodes at a stored time step"""
+        nodes, t_step = key
+        return self.field.frame.iloc[nodes, self.field.column(t_step)]
+
+    def __setitem__(self, key, value):
+        """sets the values of the nodes at a time step (a time step after
+        the last one stored replaces the oldest one)"""
+        nodes, t_step = key
+        self.field.frame.iloc[nodes, self.field.column(t_step,
+                                                       write=True)] = value
+
+
+class rolling_field():
+    """
+    Field of which only the last two time steps are kept while the solver
+    steps forward, so that memory does not grow with the number of time
+    steps. Indexed as the DataFrames of the sample (field.iloc[nodes,
+    t_step]); once solved, values and columns are those of the last two
+    time steps.
+    """
+
+    def __init__(self, frame):
+        """keeps the first two time steps of a DataFrame (nodes x time
+        steps)"""
+        self.frame = frame.iloc[:, :2].copy()
+        self.frame.columns = [0, 1]
+        self.index = frame.index.values
+        self.times = np.asarray(frame.columns, dtype=float)
+        self.last = 0
+        self.iloc = rolling_indexer(self)
+
+    def column(self, t_step, write=False):
+        """Returns the column of the frame that stores t_step"""
+        if t_step < 0:
+            t_step += self.times.shape[0]
+        if write and self.last < t_step < self.times.shape[0]:
+            # the oldest time step is replaced
+            self.frame.iloc[:, t_step % 2] = np.nan
+            self.last = t_step
+        if not self.last - 1 <= t_step <= self.last or t_step < 0:
+            raise IndexError(f"time step {t_step} not stored (only the "
+                             "last two time steps are kept)")
+        return t_step % 2
+
+    def truncate(self, t_step):
+        """discards the time steps after t_step"""
+        self.times = self.times[:t_step + 1]
+        self.last = min(self.last, t_step)
+
+    @property
+    def t_steps(self):
+        """time steps stored (in order)"""
+        return np.arange(max(self.last - 1, 0), self.last + 1)
+
+    @property
+    def values(self):
+        """values of the time steps stored"""
+        return self.frame.values[:, self.t_steps % 2]
+
+    @property
+    def columns(self):
+        """times of the time steps stored"""
+        return self.times[self.t_steps]
+
+    @property
+    def nbytes(self):
+        """memory used by the stored values"""
+        return self.frame.values.nbytes
+
+    def to_frame(self):
+        """returns the time steps stored as a DataFrame"""
+        return pd.DataFrame(self.values, index=self.index,
+                            columns=self.columns)
+
+
+def validate_storage(storage):
+    """Validates the storage policies of the fields"""
+    if not isinstance(storage, dict):
+        print("Error, storage not valid")
+        sys.exit(1)
+    for field, policy in storage.items():
+        if field not in stored_fields or not isinstance(policy, dict):
+            print(f"Error, storage of {field} not valid")
+            sys.exit(1)
+        if (policy.get("dtype", "float64") not in storage_dtypes or
+                policy.get("store", True) not in [True, False]):
+            print(f"Error, storage of {field} not valid")
+            sys.exit(1)
+        decimation = policy.get("decimation", 1)
+        try:
+            valid = int(decimation) == decimation and decimation >= 1
+        except (ValueError, TypeError):
+            valid = False
+        if not valid:
+            print(f"Error, storage decimation of {field} not valid")
+            sys.exit(1)
+
+
+def compact_sample(sample, storage):
+    """Applies the storage policies to the fields of a solved sample. Fields
+    not stored are set to None, int16 fields are replaced by scaled_field
+    and the rest remain DataFrames"""
+    for field, policy in storage.items():
+        if not policy.get("store", True):
+            setattr(sample, field, None)
+            continue
+        frame = getattr(sample, field)
+        if isinstance(frame, rolling_field):
+            frame = frame.to_frame()
+        decimation = int(policy.get("decimation", 1))
+        if decimation > 1:
+            columns = np.arange(0, frame.shape[1], decimation)
+            if columns[-1] != frame.shape[1] - 1:
+                columns = np.append(columns, frame.shape[1] - 1)
+            frame = frame.iloc[:, columns]
+        dtype = policy.get("dtype", "float64")
+        if dtype == "int16":
+            frame = scaled_field(frame)
+        else:
+            frame = frame.astype(dtype)
+        setattr(sample, field, frame)
+
+
+def save_solution(file_name, solution):
+    """Saves the fields of the sample of a 1-D solution (as stored), its
+    meshes and the problem description to file_name (numpy npz file)"""
+    sample = solution["sample"]
+    state = {"space_mesh": sample.space_mesh,
+             "temporal_mesh": sample.temporal_mesh,
+             "computing_time": solution["computing_time"],
+             "problem_description": json.dumps(json_compatible(
+                 solution["problem_description"], strict=False)),
+             "events": json.dumps(json_compatible(solution["events"],
+                                                  strict=False))}
+    for field in stored_fields:
+        frame = getattr(sample, field)
+        if frame is None:
+            continue
+        if isinstance(frame, scaled_field):
+            state[f"{field}_offset"] = frame.offset
+            state[f"{field}_scale"] = frame.scale
+            state[field] = frame.data
+        else:
+            state[field] = frame.values
+        state[f"{field}_times"] = np.asarray(frame.columns, dtype=float)
+    if sample.probes is not None:
+        state["probe_depths"] = sample.probes.depths
+        state["probe_times"] = sample.probes.times
+        state["probe_temperatures"] = sample.probes.temperatures
+    with open(file_name, "wb") as f:
+        np.savez_compressed(f, **state)
+
+
+def load_solution(file_name):
+    """Returns the contents of a file written by save_solution as a
+    dictionary, with the fields as DataFrames (nodes x times)"""
+    with np.load(file_name, allow_pickle=False) as data:
+        state = {key: data[key] for key in data.files}
+    solution = {"space_mesh": state["space_mesh"],
+                "temporal_mesh": state["temporal_mesh"],
+                "computing_time": float(state["computing_time"]),
+                "problem_description": json.loads(
+                    str(state["problem_description"])),
+                "events": json.loads(str(state["events"]))}
+    for field in stored_fields:
+        if field not in state:
+            solution[field] = None
+            continue
+        values = state[field]
+        if f"{field}_scale" in state:
+            missing = values == -int16_max - 1
+            values = (state[f"{field}_offset"] +
+                      state[f"{field}_scale"] * values.astype(float))
+            values[missing] = np.nan
+        solution[field] = pd.DataFrame(values,
+                                       columns=state[f"{field}_times"])
+    for key in ["probe_depths", "probe_times", "probe_temperatures"]:
+        solution[key] = state.get(key)
+    return solution
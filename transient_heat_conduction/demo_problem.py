@@ -32,7 +32,8 @@ problem_description = {
     "boundcond_surface": "dirichlet",  # "dirichlet", "neunamn" or "robin"
     "temperature_surface": 800,  # surface temperature in K if dirichlet
     "nhf": None,  # Net Heat Flux in W/m2 if neunman
-    "ihf_type": "constant",  # "constant", "polynomial", "sinusoidal"
+    "ihf_type": "constant",  # "constant", "polynomial", "sinusoidal",
+                             # "time_series"
     "ihf_coefficients": 40000,  # W/m2
     "surface_losses_type": "non-linear",  # "linear" or "non-linear"
     "h_total": None,
@@ -40,8 +41,8 @@ problem_description = {
     "absorptivity": 0.9,
     "emissivity": 0.9,
 
-    "boundcond_back": "insulated",  # insulated or conductive_losses
-    "conductivity_subs": None,  # conductivity of substrate material in W/mK
+    "boundcond_back": "insulated",  # only insulated (conductive_losses n/a)
+    "conductivity_subs": None,  # not used
 
     # pyrolysis
     # ---------
@@ -55,8 +56,39 @@ problem_description = {
     # --------------------------------
     "in-depth_absorptivity": 0,
 
+    # time step and non-linear solver
+    # -------------------------------
+    "time_step": None,  # time step in s (None for 1/6 of the cell time)
+    "nonlinear_solver": None,  # "lagged" (if None) or "newton"
+    "time_integrator": None,  # "crank_nicolson" (if None), "tr_bdf2", ...
+
+    # probes (thermocouples)
+    # ----------------------
+    "probe_depths": None,  # depths in m, e.g. [0.005, 0.01]
+    "probe_times": None,  # sampling times in s (None for every time step)
+    "probes_only": None,  # if True, fields keep only the last two steps
+
+    # events
+    # ------
+    "events": None,  # e.g. [{"quantity": "surface_temperature",
+                     #         "threshold": 600, "terminal": True}]
+
+    # surface regression (reactive samples)
+    # -------------------------------------
+    "surface_regression": None,  # True to remove the mass lost at the surface
+
+    # energy balance
+    # --------------
+    "energy_tolerance": None,  # relative imbalance that flags the run
+
+    # storage of the results
+    # -----------------------
+    "storage": None,  # e.g. {"fo": {"store": False},
+                      #       "conductivity": {"decimation": 10}}
+
     # extra (checking validation)
     # --------------------------
+    # (robin needs a constant ihf and linear surface losses)
     "validation_case": True
     }
 
@@ -66,19 +98,20 @@ solution = main_solver(problem_description)
 
 # ------
 # plot temperatures if validation with analytical solutions is desired
+# (all the validation cases at once, with error metrics:
+# python -m validation_plots_analyticalsols.validation_report)
 # ------
 if problem_description["validation_case"]:
 
     # import extra libraries
     import matplotlib.pyplot as plt
-    from matplotlib import cm
     import os
     import numpy as np
     from validation_plots_analyticalsols.calc_analytical import (
         calc_dirichlet, calc_neunman, calc_robin)
 
     # create figure and format
-    cmap = cm.get_cmap('cividis', 10)
+    cmap = plt.get_cmap('cividis', 10)
     fig, ax = plt.subplots(figsize=(12, 8))
     ax.set_xlabel("Depht [m]", fontsize=16)
     ax.set_ylabel("Tempeature [K]", fontsize=16)
@@ -92,8 +125,10 @@ if problem_description["validation_case"]:
     if problem_description['boundcond_surface'] == "dirichlet":
         text = ("$T_{surf}$"
                 f" = {problem_description['temperature_surface']} K")
-    elif problem_description["boundcond_surface"] == "neunmnan":
-        text = ('NHF = {problem_description["nhf"]} kW/m2')
+    elif problem_description["boundcond_surface"] == "neunman":
+        text = f'NHF = {problem_description["nhf"]} W/m2'
+    elif problem_description["boundcond_surface"] == "robin":
+        text = f'IHF = {problem_description["ihf_coefficients"]} W/m2'
     ax.text(0.02, 500, text, fontsize=15)
 
     # plot analytical and numerical solutions at 8 different times
@@ -103,7 +138,7 @@ if problem_description["validation_case"]:
 
         # plot numerical
         ax.scatter(solution["sample"].space_mesh,
-                   solution["sample"].temperatures.loc[:, t],
+                   solution["sample"].temperatures.iloc[:, int(step)],
                    s=40, color=cmap(i/10), alpha=0.6,
                    label=f'{np.round(t,1)} seconds')
 
@@ -5,9 +5,16 @@ properties, the thermal environment and the initial condition.
 """
 import numpy as np
 
+# import from local project
+from classes_and_functions.checkpoint import write_checkpoint
+from classes_and_functions.energy_balance import energy_balance
+from direct_solution.surface_regression import sample_consumed
+
 
 def direct_solver(sample, problem_description, calc_Fo, calc_Upsilon,
-                  matrix_A, vector_b, update_thermal_properties):
+                  matrix_A, vector_b, update_thermal_properties,
+                  newton_step=None, integrator_step=None,
+                  regression_step=None):
     """
     Solves the direct heat transfer problem, determinig the temperature
     profile from the sample and environment conditions.
@@ -29,16 +36,85 @@ def direct_solver(sample, problem_description, calc_Fo, calc_Upsilon,
     calc_Upsilon: function
         Function that calculates the Upsilon parameter, defined in Appendix B.
 
+    newton_step: function
+        Function that solves one fully implicit time step with Newton's
+        method. Used instead of the lagged scheme if "nonlinear_solver" is
+        "newton".
+
+    integrator_step: function
+        Function that solves one time step with the time integrator of the
+        problem description, if "time_integrator" is not "crank_nicolson".
+
+    regression_step: function
+        Function that moves the surface of a regressing sample and returns
+        the change of the temperatures due to the motion of the nodes, if
+        "surface_regression" is True.
+
     Returns
     -------
     None
 
     """
-    # progress indicators
-    progress_indicators = [25, 50, 75]
+    for _ in direct_solver_steps(sample, problem_description, calc_Fo,
+                                 calc_Upsilon, matrix_A, vector_b,
+                                 update_thermal_properties, newton_step,
+                                 integrator_step, regression_step):
+        pass
+
+    return None
+
+
+def direct_solver_steps(sample, problem_description, calc_Fo, calc_Upsilon,
+                        matrix_A, vector_b, update_thermal_properties,
+                        newton_step=None, integrator_step=None,
+                        regression_step=None):
+    """
+    Generator that solves the direct heat transfer problem (see
+    direct_solver) one time step at a time, yielding the index of every
+    time step solved. The run can be stopped by closing the generator.
+    """
+    # progress indicators (those already passed if the run is resumed)
+    progress_indicators = [
+        percentage for percentage in [25, 50, 75]
+        if sample.time_total*percentage/100 >= sample.temporal_mesh[
+            sample.t_step_start]]
+
+    # record the initial temperatures at the probes and initialize events
+    # (unless the run is resumed from a checkpoint)
+    if sample.t_step_start == 0 and sample.probes is not None:
+        sample.probes.record(sample.temporal_mesh[0],
+                             sample.temperatures.iloc[:, 0].values)
+    if sample.t_step_start == 0 and sample.events is not None:
+        sample.events.check(sample, sample.temporal_mesh[0],
+                            sample.temperatures.iloc[:, 0].values, 0)
+
+    # checkpoints
+    checkpoint_file = problem_description.get("checkpoint_file")
+    checkpoint_interval = problem_description.get("checkpoint_interval")
+
+    # fully implicit scheme (newton iterations per time step, kept if the
+    # run is resumed from a checkpoint)
+    newton = problem_description.get("nonlinear_solver") == "newton"
+    if newton and "newton_iterations" not in sample.diagnostics:
+        sample.diagnostics["newton_iterations"] = np.zeros(
+            sample.temporal_mesh.shape[0] - 1, dtype=int)
+        sample.diagnostics["newton_not_converged"] = 0
+
+    # running energy balance
+    balance = energy_balance(problem_description, sample,
+                             sample.t_step_start)
+
+    # surface regression (the nodes follow the surface)
+    regression = bool(problem_description.get("surface_regression"))
+
+    # time integrator of the lagged scheme
+    crank_nicolson = problem_description.get(
+        "time_integrator", "crank_nicolson") == "crank_nicolson"
 
     # step forward over the temporal domain
-    for t_step, t in enumerate(sample.temporal_mesh[:-1]):
+    for t_step in range(sample.t_step_start,
+                        sample.temporal_mesh.shape[0] - 1):
+        t = sample.temporal_mesh[t_step]
 
         # print progress indicators
         for percentage in progress_indicators:
@@ -47,25 +123,86 @@ def direct_solver(sample, problem_description, calc_Fo, calc_Upsilon,
                 progress_indicators.remove(percentage)
                 break
 
-        # calculate Fo and Upsilon (for this time step)
-        calc_Fo(sample, t_step)
-        if problem_description["properties_type"] == "constant":
-            sample.upsilon.iloc[:, t_step] = np.zeros_like(
-                sample.fo.iloc[:, t_step].values)
-        elif problem_description[
-                "properties_type"] == "temperature_dependent":
-            calc_Upsilon(problem_description, sample, t_step)
-
-        # define  matrix A
-        A = matrix_A(problem_description, sample, t_step)
-
-        # define vector b
-        b = vector_b(problem_description, sample, t_step)
-
-        # calculate temperatures for the next time step
-        sample.temperatures.iloc[:, t_step + 1] = np.linalg.solve(A, b)
+        if newton:
+            # temperatures and properties at t=n+1 with newton iterations
+            iterations, converged = newton_step(problem_description, sample,
+                                                t_step)
+            sample.diagnostics["newton_iterations"][t_step] = iterations
+            if not converged:
+                sample.diagnostics["newton_not_converged"] += 1
+        else:
+            # calculate Fo and Upsilon (for this time step)
+            calc_Fo(sample, t_step)
+            if problem_description["properties_type"] == "constant":
+                sample.upsilon.iloc[:, t_step] = np.zeros_like(
+                    sample.fo.iloc[:, t_step].values)
+            elif problem_description[
+                    "properties_type"] == "temperature_dependent":
+                calc_Upsilon(problem_description, sample, t_step)
+
+            if crank_nicolson:
+                # define  matrix A
+                A = matrix_A(problem_description, sample, t_step)
+
+                # define vector b
+                b = vector_b(problem_description, sample, t_step)
+
+                # move the surface and the nodes
+                if regression:
+                    b += regression_step(problem_description, sample,
+                                         t_step)
+
+                # calculate temperatures for the next time step
+                sample.temperatures.iloc[:, t_step + 1] = np.linalg.solve(
+                    A, b)
+            else:
+                # temperatures for the next time step (TR-BDF2, Rannacher)
+                sample.temperatures.iloc[:, t_step + 1] = integrator_step(
+                    problem_description, sample, t_step)
+
+        # record the new temperatures at the probes
+        if sample.probes is not None:
+            if regression:
+                sample.probes.update_mesh(sample.node_positions(t_step + 1))
+            sample.probes.record(
+                sample.temporal_mesh[t_step + 1],
+                sample.temperatures.iloc[:, t_step + 1].values)
 
         # update thermal properties (to be used on the next time step)
-        update_thermal_properties(problem_description, sample, t_step)
-
-    return None
+        if not newton:
+            update_thermal_properties(problem_description, sample, t_step)
+
+        # energy balance (flag or stop the run if it exceeds the tolerance)
+        if balance.update(sample, t_step):
+            print(f" ... energy imbalance above tolerance at "
+                  f"{np.round(balance.exceeded_time, 2)} seconds")
+        sample.diagnostics["energy_balance"] = balance.summary()
+        if balance.exceeded_time is not None and balance.terminal:
+            sample.truncate(t_step + 1)
+            yield t_step + 1
+            return
+
+        # stop if the sample has been consumed
+        if regression and sample_consumed(sample, t_step + 1):
+            print(f" ... sample consumed at "
+                  f"{np.round(sample.temporal_mesh[t_step + 1], 2)} seconds")
+            sample.truncate(t_step + 1)
+            yield t_step + 1
+            return
+
+        # check for events and stop if a terminal event is detected
+        if sample.events is not None and sample.events.check(
+                sample, sample.temporal_mesh[t_step + 1],
+                sample.temperatures.iloc[:, t_step + 1].values, t_step + 1):
+            print(f" ... terminal event {sample.events.log[-1]['name']} at "
+                  f"{np.round(sample.events.log[-1]['time'], 2)} seconds")
+            sample.truncate(t_step + 1)
+            yield t_step + 1
+            return
+
+        # write a checkpoint every checkpoint interval
+        if (checkpoint_file is not None and
+                (t_step + 1) % checkpoint_interval == 0):
+            write_checkpoint(checkpoint_file, sample, t_step + 1)
+
+        yield t_step + 1
@@ -0,0 +1,203 @@
+"""
+Direct heat transfer problem in 2-D (planar or axisymmetric r-z).
+The Crank-Nicolson formulation of the 1-D solver is applied in both
+directions, either with alternating-direction implicit sweeps
+(Peaceman-Rachford), where every half step is a batch of tridiagonal solves,
+or with the sparse system of all the nodes, whose factorization is kept for
+as long as the matrix does not change.
+"""
+import numpy as np
+from scipy import sparse
+from scipy.sparse import linalg as sparse_linalg
+
+# import from local project
+from classes_and_functions.calc_parameters import (tridiagonal_operator,
+                                                   surface_source,
+                                                   solve_tridiagonal,
+                                                   apply_tridiagonal)
+
+
+def calc_h_surface_2d(problem_description, sample, temperature_surface):
+    """Returns the heat transfer coefficient of the surface losses along the
+    surface. Non-linear losses are linearized with the surface temperature
+    at t=n"""
+    if problem_description["surface_losses_type"] == "linear":
+        return np.zeros_like(temperature_surface) + sample.h_total
+    return sample.h_conv + sample.emissivity * sample.stefan_boltz * (
+        temperature_surface**2 + sample.temperature_ambient**2) * (
+            temperature_surface + sample.temperature_ambient)
+
+
+def operator_x(problem_description, sample, t_step, temperatures):
+    """Returns the tridiagonal coefficients, of shape (y_divisions,
+    x_divisions), of the operator along the depth (scaled by dt) for every
+    column of nodes (the operator of the 1-D solver), and the source term of
+    the surface boundary condition (at t=n+1/2)"""
+    fo = np.full((sample.y_divisions, sample.x_divisions), sample.fo_x)
+    source = np.zeros((sample.x_divisions, sample.y_divisions))
+    h_surface = None
+    if problem_description["boundcond_surface"] == "robin":
+        h_surface = calc_h_surface_2d(problem_description, sample,
+                                      temperatures[0])
+    lower, diag, upper = tridiagonal_operator(
+        problem_description, fo, sample.dx, sample.conductivity, h_surface)
+
+    # surface boundary condition
+    if problem_description["boundcond_surface"] == "neunman":
+        source[0] = surface_source(sample.fo_x, sample.dx,
+                                   sample.conductivity, sample.nhf)
+    elif problem_description["boundcond_surface"] == "robin":
+        source[0] = surface_source(
+            sample.fo_x, sample.dx, sample.conductivity,
+            sample.absorptivity * (sample.ihf[t_step] +
+                                   sample.ihf[t_step + 1]) / 2 +
+            h_surface * sample.temperature_ambient)
+
+    return lower, diag, upper, source
+
+
+def operator_y(problem_description, sample):
+    """Returns the tridiagonal coefficients, of shape (x_divisions,
+    y_divisions), of the lateral operator (scaled by dt) for every line of
+    nodes, and the source term of the side boundary condition"""
+    lower = np.full(sample.y_divisions, sample.fo_y)
+    diag = np.full(sample.y_divisions, -2 * sample.fo_y)
+    upper = np.full(sample.y_divisions, sample.fo_y)
+    source = np.zeros(sample.y_divisions)
+
+    # symmetry at y=0 (r=0)
+    if sample.geometry == "2d_axisymmetric":
+        ratio = sample.dy / 2 / sample.lateral_mesh[1:]
+        lower[1:] = sample.fo_y * (1 - ratio)
+        upper[1:] = sample.fo_y * (1 + ratio)
+        diag[0] = - 4 * sample.fo_y
+        upper[0] = 4 * sample.fo_y
+    else:
+        upper[0] = 2 * sample.fo_y
+
+    # side boundary condition (ghost node)
+    ghost = upper[-1]
+    lower[0] = 0
+    lower[-1] += ghost
+    upper[-1] = 0
+    diag[-1] -= ghost * 2 * sample.dy * sample.h_side / sample.conductivity
+    source[-1] = (ghost * 2 * sample.dy * sample.h_side *
+                  sample.temperature_ambient / sample.conductivity)
+
+    lower, diag, upper, source = [
+        np.tile(coefficient, (sample.x_divisions, 1))
+        for coefficient in [lower, diag, upper, source]]
+
+    # the surface nodes of a dirichlet boundary condition are fixed
+    if problem_description["boundcond_surface"] == "dirichlet":
+        for coefficient in [lower, diag, upper, source]:
+            coefficient[0] = 0
+
+    return lower, diag, upper, source
+
+
+def assemble_sparse(coefficients_x, coefficients_y):
+    """Returns the sparse operator of all the nodes (node (i, j) is stored at
+    i*y_divisions + j) given the coefficients of both directions"""
+    lower_x, diag_x, upper_x = [coefficient.T.ravel()
+                                for coefficient in coefficients_x]
+    lower_y, diag_y, upper_y = [coefficient.ravel()
+                                for coefficient in coefficients_y]
+    y_divisions = coefficients_y[0].shape[1]
+    return sparse.diags([lower_x[y_divisions:], lower_y[1:], diag_x + diag_y,
+                         upper_y[:-1], upper_x[:-y_divisions]],
+                        [-y_divisions, -1, 0, 1, y_divisions],
+                        format="csc")
+
+
+def direct_solver_2d(sample, problem_description):
+    """
+    Solves the direct heat transfer problem in 2-D, determinig the
+    temperature field from the sample and environment conditions.
+
+    Parameters
+    ----------
+    sample : CLASS
+        solid_sample_2d with the geometry and boundary conditions.
+
+    problem_description: DICT
+        Contains all the information used to create the sample class.
+
+    Returns
+    -------
+    None
+
+    """
+    for _ in direct_solver_2d_steps(sample, problem_description):
+        pass
+
+    return None
+
+
+def direct_solver_2d_steps(sample, problem_description):
+    """
+    Generator that solves the 2-D problem (see direct_solver_2d), yielding
+    the index of every time step whose temperature field is stored (every
+    output interval).
+    """
+    # progress indicators
+    progress_indicators = [25, 50, 75]
+
+    solver = problem_description.get("solver_2d", "adi")
+    dirichlet = problem_description["boundcond_surface"] == "dirichlet"
+    matrix_changes = (
+        problem_description["boundcond_surface"] == "robin" and
+        problem_description["surface_losses_type"] == "non-linear")
+    lower_y, diag_y, upper_y, source_y = operator_y(problem_description,
+                                                    sample)
+    factorization = None
+
+    temperatures = sample.temperatures_2d[0].copy()
+    output = 1
+    for t_step, t in enumerate(sample.temporal_mesh[:-1]):
+
+        # print progress indicators
+        for percentage in progress_indicators:
+            if t > (sample.time_total*percentage/100):
+                print(f" ... progress {percentage}%")
+                progress_indicators.remove(percentage)
+                break
+
+        lower_x, diag_x, upper_x, source_x = operator_x(
+            problem_description, sample, t_step, temperatures)
+        source = source_x + source_y
+
+        if solver == "adi":
+            # half step implicit along the depth (one system per column)
+            rhs = (temperatures + apply_tridiagonal(
+                lower_y, diag_y, upper_y, temperatures) / 2 + source / 2)
+            if dirichlet:
+                rhs[0] = sample.temperature_surface
+            temperatures_half = solve_tridiagonal(
+                - lower_x / 2, 1 - diag_x / 2, - upper_x / 2, rhs.T).T
+
+            # half step implicit along the lateral direction (one per line)
+            rhs = (temperatures_half + apply_tridiagonal(
+                lower_x, diag_x, upper_x, temperatures_half.T).T / 2 +
+                source / 2)
+            temperatures = solve_tridiagonal(- lower_y / 2, 1 - diag_y / 2,
+                                             - upper_y / 2, rhs)
+
+        elif solver == "sparse":
+            if factorization is None or matrix_changes:
+                operator = assemble_sparse((lower_x, diag_x, upper_x),
+                                           (lower_y, diag_y, upper_y))
+                identity = sparse.identity(operator.shape[0], format="csc")
+                factorization = sparse_linalg.splu(identity - operator / 2)
+            rhs = (temperatures.ravel() + operator.dot(temperatures.ravel()) /
+                   2 + source.ravel())
+            if dirichlet:
+                rhs[:sample.y_divisions] = sample.temperature_surface
+            temperatures = factorization.solve(rhs).reshape(
+                temperatures.shape)
+
+        # store the temperatures every output interval
+        if t_step + 1 == sample.output_steps[output]:
+            sample.temperatures_2d[output] = temperatures
+            output += 1
+            yield t_step + 1
@@ -0,0 +1,197 @@
+"""
+Direct heat transfer problem solved with Duhamel's theorem.
+For an inert slab with constant properties and a linear surface boundary
+condition (dirichlet, neunman or robin with linear losses), the temperature
+rise is the convolution of the response to a unit step of the surface
+forcing with the history of the forcing. The step response is calculated
+once (from the series solution of the slab or with one Crank-Nicolson
+solve) and the convolutions are carried out with FFTs.
+"""
+import numpy as np
+from scipy import linalg, optimize, signal
+
+# decay exponent after which the terms of the series are neglected
+series_cutoff = 50
+
+
+def calc_forcing(problem_description, sample, ihf=None):
+    """Returns the surface forcing averaged over every time step (t=n to
+    t=n+1). For the robin boundary condition, the forcing is the absorbed
+    heat flux plus the losses to the ambient at the initial temperature.
+    ihf can be an array of heat flux histories (histories x time steps)"""
+    temperature_initial = problem_description["temperature_initial"]
+    if problem_description["boundcond_surface"] == "dirichlet":
+        forcing = np.full(sample.temporal_mesh.shape[0] - 1,
+                          sample.temperature_surface - temperature_initial,
+                          dtype=float)
+    elif problem_description["boundcond_surface"] == "neunman":
+        forcing = np.full(sample.temporal_mesh.shape[0] - 1, sample.nhf,
+                          dtype=float)
+    elif problem_description["boundcond_surface"] == "robin":
+        ihf = sample.ihf if ihf is None else np.asarray(ihf, dtype=float)
+        forcing = (sample.absorptivity * (ihf[..., :-1] + ihf[..., 1:]) / 2
+                   + sample.h_total * (sample.temperature_ambient -
+                                       temperature_initial))
+    return forcing
+
+
+def step_response_analytical(problem_description, sample, depths):
+    """Returns the temperature rise at the depths (depths x time steps) for
+    a unit step of the surface forcing, from the series solution of a slab
+    insulated at its back face"""
+    conductivity = sample.conductivity.iloc[0, 0]
+    diffusivity = conductivity / (sample.density.iloc[0, 0] *
+                                  sample.heat_capacity.iloc[0, 0])
+    xi = np.asarray(depths, dtype=float)[:, np.newaxis] / sample.depth
+    fo = diffusivity * sample.temporal_mesh / sample.depth**2
+    number_terms = int(np.sqrt(series_cutoff / fo[1]) / np.pi) + 2
+
+    if problem_description["boundcond_surface"] == "dirichlet":
+        response = np.ones((xi.shape[0], fo.shape[0]))
+        eigenvalues = (2 * np.arange(number_terms) + 1) * np.pi / 2
+        coefficients = 2 / eigenvalues
+        modes = [np.sin(eigenvalue * xi) for eigenvalue in eigenvalues]
+    elif problem_description["boundcond_surface"] == "neunman":
+        response = (sample.depth / conductivity) * (fo + 1/3 - xi +
+                                                    xi**2 / 2)
+        eigenvalues = np.arange(1, number_terms + 1) * np.pi
+        coefficients = (2 * sample.depth / conductivity / eigenvalues**2)
+        modes = [np.cos(eigenvalue * xi) for eigenvalue in eigenvalues]
+    elif problem_description["boundcond_surface"] == "robin":
+        biot = sample.h_total * sample.depth / conductivity
+        response = np.full((xi.shape[0], fo.shape[0]), 1 / sample.h_total)
+        # roots of eigenvalue*tan(eigenvalue) = biot, one per interval
+        eigenvalues = np.array([optimize.brentq(
+            lambda x: x * np.sin(x) - biot * np.cos(x), n * np.pi,
+            n * np.pi + np.pi / 2) for n in range(number_terms)])
+        coefficients = (4 * np.sin(eigenvalues) / (
+            2 * eigenvalues + np.sin(2 * eigenvalues)) / sample.h_total)
+        modes = [np.cos(eigenvalue * (1 - xi)) for eigenvalue in eigenvalues]
+
+    for eigenvalue, coefficient, mode in zip(eigenvalues, coefficients,
+                                             modes):
+        # only the times where the term is not negligible
+        cutoff = np.searchsorted(fo, series_cutoff / eigenvalue**2,
+                                 side="right")
+        response[:, :cutoff] -= coefficient * mode * np.exp(
+            - eigenvalue**2 * fo[:cutoff])
+    response[:, 0] = 0
+
+    return response
+
+
+def step_response_numerical(problem_description, sample):
+    """Returns the temperature rise at the nodes (nodes x time steps) for a
+    unit step of the surface forcing, solved with the Crank-Nicolson
+    scheme of the time stepping solver (constant tridiagonal matrices)"""
+    n = sample.x_divisions
+    conductivity = sample.conductivity.iloc[0, 0]
+    fo = (conductivity * sample.dt[0] / (sample.density.iloc[0, 0] *
+                                         sample.heat_capacity.iloc[0, 0] *
+                                         sample.dx**2))
+
+    # matrices A (banded storage) and B as (lower, diag, upper)
+    banded = np.zeros((3, n))
+    banded[0, 1:], banded[1], banded[2, :-1] = - fo / 2, 1 + fo, - fo / 2
+    lower, diag, upper = (np.full(n, fo / 2), np.full(n, 1 - fo),
+                          np.full(n, fo / 2))
+    banded[2, -2], lower[-1] = - fo, fo
+    forcing = np.zeros(n)
+    if problem_description["boundcond_surface"] == "dirichlet":
+        banded[1, 0], banded[0, 1] = 1, 0
+        diag[0], upper[0] = 0, 0
+        forcing[0] = 1
+    else:
+        flux_factor = fo * sample.dx / conductivity
+        banded[0, 1], upper[0] = - fo, fo
+        forcing[0] = 2 * flux_factor
+        if problem_description["boundcond_surface"] == "robin":
+            banded[1, 0] += flux_factor * sample.h_total
+            diag[0] -= flux_factor * sample.h_total
+
+    response = np.zeros((n, sample.temporal_mesh.shape[0]))
+    for t_step in range(sample.temporal_mesh.shape[0] - 1):
+        rise = response[:, t_step]
+        b = diag * rise + forcing
+        b[1:] += lower[1:] * rise[:-1]
+        b[:-1] += upper[:-1] * rise[1:]
+        response[:, t_step + 1] = linalg.solve_banded((1, 1), banded, b)
+
+    return response
+
+
+def calc_duhamel(step_response, forcing):
+    """Returns the temperature rise (forcing histories x depths x time steps)
+    given the step response (depths x time steps) and the histories of the
+    forcing averaged over every time step (histories x time steps - 1),
+    with FFT based convolution"""
+    forcing = np.atleast_2d(forcing)
+    increments = np.diff(step_response, axis=-1)
+    rise = np.zeros((forcing.shape[0], step_response.shape[0],
+                     step_response.shape[1]))
+    rise[:, :, 1:] = signal.fftconvolve(
+        forcing[:, np.newaxis, :], increments[np.newaxis, :, :],
+        axes=-1)[:, :, :forcing.shape[1]]
+    return rise
+
+
+def calc_flux_histories(sample, problem_description, ihf_histories):
+    """Returns the temperatures (histories x depths x time steps) at the
+    depths of the step response of the sample for many ihf histories
+    (histories x time steps, on the temporal mesh of the sample)"""
+    forcing = calc_forcing(problem_description, sample, ihf_histories)
+    return problem_description["temperature_initial"] + calc_duhamel(
+        sample.step_response, forcing)
+
+
+def duhamel_solver(sample, problem_description):
+    """
+    Solves the direct heat transfer problem with Duhamel's theorem. If
+    probes are defined only the temperatures at the probes are calculated,
+    otherwise the full temperature profile is.
+
+    Parameters
+    ----------
+    sample : CLASS
+        Class that contains all the information regarding the geometry and
+        boundary conditions.
+
+    problem_description: DICT
+        Contains all the information used to create the sample class.
+
+    Returns
+    -------
+    None
+
+    """
+    depths = (sample.space_mesh if sample.probes is None
+              else sample.probes.depths)
+    if problem_description.get("duhamel_step_response",
+                               "analytical") == "analytical":
+        sample.step_response = step_response_analytical(
+            problem_description, sample, depths)
+    else:
+        sample.step_response = step_response_numerical(problem_description,
+                                                       sample)
+        if sample.probes is not None:
+            sample.step_response = (
+                (1 - sample.probes.weights[:, np.newaxis]) *
+                sample.step_response[sample.probes.indices] +
+                sample.probes.weights[:, np.newaxis] *
+                sample.step_response[sample.probes.indices + 1])
+    sample.step_response_depths = depths
+
+    temperatures = calc_flux_histories(
+        sample, problem_description,
+        getattr(sample, "ihf", np.zeros_like(sample.temporal_mesh)))[0]
+    if sample.probes is None:
+        sample.temperatures.iloc[:, :] = temperatures
+    else:
+        sample.probes.temperatures = np.array([
+            np.interp(sample.probes.times, sample.temporal_mesh, probe)
+            for probe in temperatures]).T
+        sample.probes.temperatures[
+            sample.probes.times > sample.temporal_mesh[-1]] = np.nan
+        sample.probes.cursor = sample.probes.times.shape[0]
+
+    return None
@@ -0,0 +1,150 @@
+"""
+Fully implicit time step of the direct solver.
+Conductivity, density and heat capacity as functions of temperature, the
+re-radiation losses of the surface and the Arrhenius source are all treated
+implicitly: the Crank-Nicolson equations of the control volumes around the
+nodes are solved at every time step with Newton's method. The Jacobian is
+tridiagonal and is calculated by finite differences, perturbing every third
+node at once (three evaluations of the residual per iteration).
+"""
+import numpy as np
+from scipy import linalg
+
+# import from local project
+from classes_and_functions.calc_parameters import calc_reaction_rate
+
+
+def calc_property(problem_description, property_name, temperatures):
+    """Returns the conductivity, density or heat capacity at the
+    temperatures, X(T) = Xo(T/300)^exp if temperature dependent"""
+    base, exponent = problem_description[f"{property_name}_coeff"]
+    if problem_description["properties_type"] == "constant":
+        return np.full_like(temperatures, base, dtype=float)
+    return base * (temperatures / 300)**exponent
+
+
+def calc_surface_flux(problem_description, sample, temperature_surface, t):
+    """Returns the net heat flux into the surface in W/m2 at time t"""
+    if problem_description["boundcond_surface"] == "neunman":
+        return sample.nhf
+    absorbed = sample.absorptivity * sample.ihf_function(t)
+    if problem_description["surface_losses_type"] == "linear":
+        return absorbed - sample.h_total * (temperature_surface -
+                                            sample.temperature_ambient)
+    return absorbed - sample.h_conv * (
+        temperature_surface - sample.temperature_ambient) - (
+            sample.emissivity * sample.stefan_boltz * (
+                temperature_surface**4 - sample.temperature_ambient**4))
+
+
+def calc_conduction(problem_description, sample, temperatures, t):
+    """Returns the net heat conducted into the control volume of every node,
+    including the heat flux at the surface, in W/m2 (the back face is
+    insulated, no flux leaves the last control volume)"""
+    conductivity = calc_property(problem_description, "conductivity",
+                                 temperatures)
+    flux = ((conductivity[:-1] + conductivity[1:]) / 2 *
+            np.diff(temperatures) / sample.dx)
+    conduction = np.zeros_like(temperatures)
+    conduction[:-1] += flux
+    conduction[1:] -= flux
+    if problem_description["boundcond_surface"] in ["neunman", "robin"]:
+        conduction[0] += calc_surface_flux(problem_description, sample,
+                                           temperatures[0], t)
+    return conduction
+
+
+def calc_source(problem_description, sample, temperatures):
+    """Returns the heat absorbed by the pyrolysis reaction in W/m3"""
+    return sample.heat_reaction * calc_reaction_rate(
+        sample, temperatures, calc_property(problem_description, "density",
+                                            temperatures))
+
+
+def calc_jacobian(residual_function, temperatures, residual):
+    """Returns the tridiagonal Jacobian of the residual in banded storage
+    (as used by scipy.linalg.solve_banded)"""
+    n = temperatures.shape[0]
+    jacobian = np.zeros((3, n))
+    increments = 1e-7 * np.maximum(np.abs(temperatures), 1)
+    for color in range(3):
+        nodes = np.arange(color, n, 3)
+        perturbed = temperatures.copy()
+        perturbed[nodes] += increments[nodes]
+        difference = residual_function(perturbed) - residual
+        jacobian[1, nodes] = difference[nodes] / increments[nodes]
+        upper = nodes[nodes >= 1]
+        jacobian[0, upper] = difference[upper - 1] / increments[upper]
+        lower = nodes[nodes <= n - 2]
+        jacobian[2, lower] = difference[lower + 1] / increments[lower]
+    return jacobian
+
+
+def newton_step(problem_description, sample, t_step):
+    """
+    Calculates the temperatures and properties at t_step + 1 with Newton's
+    method. Returns the number of iterations and whether the iterations
+    converged (maximum correction below newton_tolerance, in K).
+    """
+    tolerance = problem_description.get("newton_tolerance", 1e-6)
+    iterations_max = problem_description.get("newton_max_iterations", 20)
+    t_old = sample.temporal_mesh[t_step]
+    t_new = sample.temporal_mesh[t_step + 1]
+    dt = t_new - t_old
+
+    # width of the control volumes (half at the boundaries)
+    widths = np.full(sample.x_divisions, sample.dx)
+    widths[[0, -1]] = sample.dx / 2
+
+    temperatures_old = sample.temperatures.iloc[:, t_step].values.astype(
+        float)
+    conduction_old = calc_conduction(problem_description, sample,
+                                     temperatures_old, t_old)
+    source_old = calc_source(problem_description, sample, temperatures_old)
+
+    def residual_function(temperatures_new):
+        temperatures_mid = (temperatures_old + temperatures_new) / 2
+        capacity = (calc_property(problem_description, "density",
+                                  temperatures_mid) *
+                    calc_property(problem_description, "heat_capacity",
+                                  temperatures_mid))
+        residual = (widths * capacity * (temperatures_new -
+                                         temperatures_old) / dt -
+                    (calc_conduction(problem_description, sample,
+                                     temperatures_new, t_new) +
+                     conduction_old) / 2 +
+                    widths * (calc_source(problem_description, sample,
+                                          temperatures_new) +
+                              source_old) / 2)
+        if problem_description["boundcond_surface"] == "dirichlet":
+            residual[0] = temperatures_new[0] - sample.temperature_surface
+        return residual
+
+    temperatures_new = temperatures_old.copy()
+    converged = False
+    for iteration in range(1, iterations_max + 1):
+        residual = residual_function(temperatures_new)
+        jacobian = calc_jacobian(residual_function, temperatures_new,
+                                 residual)
+        correction = linalg.solve_banded((1, 1), jacobian, - residual)
+        temperatures_new += correction
+        if np.max(np.abs(correction)) < tolerance:
+            converged = True
+            break
+
+    # store temperatures, properties at t=n+1 and parameters at t=n
+    sample.temperatures.iloc[:, t_step + 1] = temperatures_new
+    for property_name in ["conductivity", "density", "heat_capacity"]:
+        getattr(sample, property_name).iloc[:, t_step + 1] = calc_property(
+            problem_description, property_name, temperatures_new)
+    sample.fo.iloc[:, t_step] = (
+        sample.conductivity.iloc[:, t_step].values * dt /
+        (sample.density.iloc[:, t_step].values *
+         sample.heat_capacity.iloc[:, t_step].values * sample.dx**2))
+    sample.upsilon.iloc[:, t_step] = 0
+    sample.omega_dots.iloc[:, t_step] = calc_reaction_rate(
+        sample, temperatures_old, sample.density.iloc[:, t_step].values)
+    sample.g_dots.iloc[:, t_step] = (sample.omega_dots.iloc[:, t_step] *
+                                     sample.heat_reaction)
+
+    return iteration, converged
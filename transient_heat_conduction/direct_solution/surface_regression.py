@@ -0,0 +1,47 @@
+"""
+Surface regression of reactive samples.
+The mass lost by pyrolysis is removed at the exposed surface, which recedes
+at the rate (mass loss rate per unit area) / (density at the surface). The
+equations are solved in the Landau transformed coordinate
+xi = (x - s(t)) / (depth - s(t)), so the nodes stay equally spaced between
+the surface and the back face and the system remains tridiagonal. Moving the
+nodes adds the term v dT/dx to the time derivative at every node, with the
+node velocity v = ds/dt (1 - xi).
+"""
+import numpy as np
+
+# fraction of the depth below which the sample is considered consumed
+minimum_thickness = 0.01
+
+
+def regression_step(problem_description, sample, t_step):
+    """Moves the surface from t_step to t_step + 1 (explicit, with the
+    reaction rates at t=n) and sets the spacing of the new mesh. Returns the
+    change of the temperatures due to the motion of the nodes, to be added
+    to vector b"""
+    omega_dots = sample.omega_dots.iloc[:, t_step].values
+    mass_loss_rate = sample.dx * (np.sum(omega_dots) -
+                                  (omega_dots[0] + omega_dots[-1]) / 2)
+    regression_rate = mass_loss_rate / sample.density.iloc[0, t_step]
+
+    # temperature change of the nodes moving through the temperature field
+    velocity = regression_rate * (1 - sample.space_mesh / sample.depth)
+    node_motion = sample.dt * velocity * np.gradient(
+        sample.temperatures.iloc[:, t_step].values, sample.dx)
+    if problem_description["boundcond_surface"] == "dirichlet":
+        node_motion[0] = 0
+
+    # new position of the surface and spacing of the nodes
+    sample.surface_position[t_step + 1] = (sample.surface_position[t_step] +
+                                           regression_rate * sample.dt[0])
+    sample.dx = (sample.depth - sample.surface_position[t_step + 1]) / (
+        sample.x_divisions - 1)
+
+    return node_motion
+
+
+def sample_consumed(sample, t_step):
+    """Returns True if the remaining thickness at t_step is below the
+    minimum thickness"""
+    return (sample.depth - sample.surface_position[t_step] <
+            minimum_thickness * sample.depth)
@@ -0,0 +1,111 @@
+"""
+Time integrators of the direct solver.
+Crank-Nicolson (matrix_A and vector_b) is only A-stable: large time steps
+after a discontinuity of the boundary data (e.g. the step of a dirichlet
+boundary condition at t=0) give oscillations that are hardly damped. The
+integrators below are built on the same tridiagonal operator and are
+L-stable (TR-BDF2) or damp the start-up (Rannacher: implicit Euler half
+steps for the first time steps, Crank-Nicolson afterwards).
+"""
+import numpy as np
+
+# import from local project
+from classes_and_functions.calc_parameters import (calc_h_surface,
+                                                   calc_reaction_rate,
+                                                   operator_at,
+                                                   surface_source,
+                                                   solve_tridiagonal,
+                                                   apply_tridiagonal)
+
+# stage of TR-BDF2 (fraction of the time step of the trapezoidal stage)
+gamma = 2 - np.sqrt(2)
+
+
+def source_1d(problem_description, sample, t_step, t):
+    """Returns the source term (scaled by dt) at time t: heat flux at the
+    surface, Upsilon and heat of the pyrolysis reaction (both at t=n)"""
+    sample.omega_dots.iloc[:, t_step] = calc_reaction_rate(
+        sample, sample.temperatures.iloc[:, t_step].values,
+        sample.density.iloc[:, t_step].values)
+    sample.g_dots.iloc[:, t_step] = (sample.omega_dots.iloc[:, t_step] *
+                                     sample.heat_reaction)
+    source = (sample.upsilon.iloc[:, t_step].values -
+              sample.g_dots.iloc[:, t_step].values * sample.dt /
+              (sample.density.iloc[:, t_step].values *
+               sample.heat_capacity.iloc[:, t_step].values))
+
+    if problem_description["boundcond_surface"] == "neunman":
+        source[0] += surface_source(sample.fo.iloc[0, t_step], sample.dx,
+                                    sample.conductivity.iloc[0, t_step],
+                                    sample.nhf)
+    elif problem_description["boundcond_surface"] == "robin":
+        source[0] += surface_source(
+            sample.fo.iloc[0, t_step], sample.dx,
+            sample.conductivity.iloc[0, t_step],
+            sample.absorptivity * sample.ihf_function(t) +
+            calc_h_surface(problem_description, sample, t_step) *
+            sample.temperature_ambient)
+
+    return source
+
+
+def theta_step(operator, temperatures, source_old, source_new, fraction,
+               theta, temperature_surface=None):
+    """Returns the temperatures after a fraction of the time step with the
+    theta scheme (1/2 Crank-Nicolson, 1 implicit Euler)"""
+    lower, diag, upper = operator
+    rhs = (temperatures + fraction * (1 - theta) * apply_tridiagonal(
+        lower, diag, upper, temperatures) + fraction * (
+            theta * source_new + (1 - theta) * source_old))
+    if temperature_surface is not None:
+        rhs[0] = temperature_surface
+    return solve_tridiagonal(- fraction * theta * lower,
+                             1 - fraction * theta * diag,
+                             - fraction * theta * upper, rhs)
+
+
+def integrator_step(problem_description, sample, t_step):
+    """
+    Returns the temperatures at t_step + 1 with the time integrator of the
+    problem description ("tr_bdf2" or "rannacher"). Fo and Upsilon at t_step
+    must have been calculated.
+    """
+    operator = operator_at(problem_description, sample, t_step)
+    temperatures = sample.temperatures.iloc[:, t_step].values.astype(float)
+    t_old = sample.temporal_mesh[t_step]
+    t_new = sample.temporal_mesh[t_step + 1]
+    temperature_surface = (
+        sample.temperature_surface
+        if problem_description["boundcond_surface"] == "dirichlet" else None)
+    source_old = source_1d(problem_description, sample, t_step, t_old)
+    source_new = source_1d(problem_description, sample, t_step, t_new)
+
+    if problem_description["time_integrator"] == "rannacher":
+        # implicit Euler half steps for the first time steps
+        if t_step < problem_description.get("startup_steps", 2):
+            source_half = source_1d(problem_description, sample, t_step,
+                                    (t_old + t_new) / 2)
+            temperatures = theta_step(operator, temperatures, source_old,
+                                      source_half, 1 / 2, 1,
+                                      temperature_surface)
+            return theta_step(operator, temperatures, source_half,
+                              source_new, 1 / 2, 1, temperature_surface)
+        return theta_step(operator, temperatures, source_old, source_new, 1,
+                          1 / 2, temperature_surface)
+
+    elif problem_description["time_integrator"] == "tr_bdf2":
+        # trapezoidal stage up to t=n+gamma
+        source_stage = source_1d(problem_description, sample, t_step,
+                                 t_old + gamma * (t_new - t_old))
+        temperatures_stage = theta_step(operator, temperatures, source_old,
+                                        source_stage, gamma, 1 / 2,
+                                        temperature_surface)
+        # BDF2 stage from t=n and t=n+gamma up to t=n+1
+        lower, diag, upper = operator
+        weight = (1 - gamma) / (2 - gamma)
+        rhs = (temperatures_stage - (1 - gamma)**2 * temperatures) / (
+            gamma * (2 - gamma)) + weight * source_new
+        if temperature_surface is not None:
+            rhs[0] = temperature_surface
+        return solve_tridiagonal(- weight * lower, 1 - weight * diag,
+                                 - weight * upper, rhs)
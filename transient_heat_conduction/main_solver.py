@@ -9,7 +9,9 @@ Constant or variable properties.
 Homogenous solid.
 
 """
+import sys
 import time
+import asyncio
 import numpy as np
 import datetime
 
@@ -18,7 +20,18 @@ from classes_and_functions.solid_sample import solid_sample
 from classes_and_functions.calc_parameters import (calc_Fo, calc_Upsilon,
                                                    matrix_A, vector_b,
                                                    update_thermal_properties)
-from direct_solution.direct_solver import direct_solver
+from classes_and_functions.solid_sample_2d import solid_sample_2d
+from classes_and_functions.checkpoint import (read_checkpoint,
+                                              restore_checkpoint)
+from classes_and_functions.solver_state import solver_state
+from classes_and_functions.storage import compact_sample
+from direct_solution.direct_solver import direct_solver, direct_solver_steps
+from direct_solution.direct_solver_2d import (direct_solver_2d,
+                                              direct_solver_2d_steps)
+from direct_solution.newton_solver import newton_step
+from direct_solution.time_integrators import integrator_step
+from direct_solution.surface_regression import regression_step
+from direct_solution.duhamel_solver import duhamel_solver
 
 
 def main_solver(problem_description):
@@ -44,6 +57,23 @@ def main_solver(problem_description):
             "depth": depth of the sample in m.
             "x_divisions": number of divisions to create spatial mesh
             "time_total": total time for the analysis in seconds
+            "geometry": optional. "1d" (default), "2d_planar" or
+                "2d_axisymmetric". 2-D problems need constant properties, an
+                inert material and an insulated back face (probes, events,
+                checkpoints, warm starts, the nonlinear solver, time
+                integrators, the energy balance, surface regression and
+                storage policies are not available), and take:
+                "width": half width (planar, symmetric at y=0) or radius
+                    (axisymmetric) of the sample in m
+                "y_divisions": number of divisions of the lateral mesh
+                "boundcond_side": "insulated" (default) or "convective"
+                    if "convective": "h_side": heat transfer coefficient to
+                    the ambient at the side in W/m2K
+                "solver_2d": "adi" (default), alternating direction implicit
+                    sweeps, or "sparse", sparse system of all the nodes
+                "output_interval": time steps between stored temperature
+                    fields (default 1). For 1-D problems, only used by
+                    iter_solve (time steps between yielded states)
 
             thermophysical properties
             -------------------------
@@ -71,7 +101,8 @@ def main_solver(problem_description):
             elif "neunman":
                 "nhf": constant Net Heat Flux in W/m2.
             elif "robin":
-                "ihf_type": "constant", "polynomial", "sinusoidal"
+                "ihf_type": "constant", "polynomial", "sinusoidal",
+                    "time_series"
                 if "constant":
                     "ihf_coefficients": ihf in W/m2
                 elif "polynomial":
@@ -80,21 +111,24 @@ def main_solver(problem_description):
                 elif "sinusoidal":
                     "ihf_coefficients": amplitud, angular frequency and phase
                     angle (A, omega, phi)
+                elif "time_series":
+                    "ihf_coefficients": measured ihf as an array of (time,
+                    ihf) pairs in s and W/m2, or the name of a text file with
+                    these two columns. Linearly interpolated in time.
 
                 "surface_losses_type": "linear", "non-linear"
                     if "linear":
                         "h_total": total (constant) heat transfer coefficient
+                        absorptivity: surface absorptivity (1 if None)
                     if "non-linear":
                         "h_convective": convective heat transfer coefficient
                         in W/m2K
                         absorptivity: surface absorptivity (constant)
                         emissivity: surface emissivity (constant)
 
-            "boundcond_back": "insulated" or "conductive_losses":
-                if "insulated": no additional parameters required.
-                elif "conductive_losses": null contact resistance assumed.
-                    "conductivity_subs": thermal conductivity of substrate
-                    material in W/mK
+            "boundcond_back": "insulated": no additional parameters
+                required. "conductive_losses" is not available (the
+                substrate is not modelled); "conductivity_subs" is not used.
 
             pyrolysis:
             ---------
@@ -103,49 +137,180 @@ def main_solver(problem_description):
                 accomodates for a single order, first order in fuel
                 Arrhenius type reacion.
                 "pre_exp_factor": pre-exponential factor in 1/s 10^-6
-                "activation_energy": activation energy in kJ/mol
-                "heat_reaction": heat of reaction in kJ/kg
+                "activation_energy": activation energy in J/mol
+                "heat_reaction": heat of reaction in J/kg (positive if
+                endothermic)
                 "reaction_order": reaction order.
 
             in-depth absorption of radiation:
             ------------
             "in-depth_absorptivity": value in 1/m
 
+            direct solution method:
+            -----------------------
+            "direct_method": optional. "time_stepping" (default) or
+                "duhamel". Duhamel's theorem (convolution of the response to
+                a unit step of the surface forcing with its history, using
+                FFTs) is available for inert, 1-D samples with constant
+                properties, uniform initial temperature, insulated back face
+                and dirichlet, neunman or robin (linear losses) surface
+                boundary conditions. If probes are defined, only the probe
+                temperatures are calculated. Events, checkpoints, warm
+                starts, the nonlinear solver, time integrators and the
+                energy balance are not available.
+            "duhamel_step_response": optional. "analytical" (default), from
+                the series solution of the slab, or "numerical", from one
+                Crank-Nicolson solve.
+
+            time step and non-linear solver:
+            --------------------------------
+            "time_step": optional. time step in s. If not given, it is 1/6 of
+                the diffusion time of a cell (initial properties).
+            "nonlinear_solver": optional. "lagged" (default), properties and
+                surface losses evaluated at the previous time step, or
+                "newton", the Crank-Nicolson equations with properties,
+                re-radiation and reaction at the new time step solved with
+                Newton iterations (time stepping method only). Allows larger
+                time steps for strongly non-linear problems.
+            "newton_tolerance": optional. maximum temperature correction in K
+                at convergence (1e-6 if None)
+            "newton_max_iterations": optional. maximum number of iterations
+                per time step (20 if None)
+            "time_integrator": optional. "crank_nicolson" (default),
+                "tr_bdf2" (L-stable, no oscillations after discontinuities of
+                the boundary data with large time steps) or "rannacher"
+                (Crank-Nicolson started with implicit Euler half steps).
+                Only for the lagged non-linear solver.
+            "startup_steps": optional. number of time steps solved with
+                implicit Euler half steps by "rannacher" (2 if None)
+
+            probes (thermocouples):
+            -----------------------
+            "probe_depths": optional. depths in m at which the temperature is
+                recorded as the solver steps forward in time.
+            "probe_times": optional. increasing times in s at which the probes
+                are sampled (linear interpolation between time steps), up to
+                the last time of the temporal mesh. If not given, probes are
+                sampled at every time step.
+            "probes_only": optional. if True, the probes are the only output
+                of the run: the fields of the sample (temperatures,
+                properties, reaction rates) keep only the last two time
+                steps while the solver steps forward, so memory does not
+                grow with the number of time steps (False if None).
+
+            checkpoints:
+            ------------
+            "checkpoint_file": optional. file where the state of the solver
+                is written (atomically) every checkpoint interval
+            "checkpoint_interval": number of time steps between checkpoints
+            "resume_from": optional. checkpoint file of the same problem
+                description. The run continues from the time step of the
+                checkpoint (fields before it are not stored)
+            "warm_start_from": optional. solution dictionary or checkpoint
+                file of another run of the same depth (rejected otherwise,
+                or if its surface regressed). Its final temperature profile,
+                interpolated at the depths of the nodes, is used as the
+                initial temperature
+
+            surface regression:
+            -------------------
+            "surface_regression": optional. if True, the mass lost by a
+                reactive sample is removed at the exposed surface, which
+                recedes at (mass loss rate) / (density at the surface). The
+                nodes follow the surface (Landau transformed coordinate,
+                sample.surface_position holds the position of the surface at
+                every time step and sample.node_positions(t_step) the
+                positions of the nodes). The run stops if the sample is
+                consumed. Only for the lagged crank_nicolson scheme.
+
+            energy balance:
+            ---------------
+            The stored energy, the heat through the surface and the heat of
+            reaction are accumulated at every time step of the 1-D time
+            stepping solvers (diagnostics["energy_balance"]).
+            "energy_tolerance": optional. relative energy imbalance above
+                which the run is flagged (time in "exceeded_time")
+            "energy_terminal": optional. if True, the solver stops when the
+                energy tolerance is exceeded (False if None)
+
+            storage:
+            --------
+            "storage": optional. storage policies of the fields of 1-D
+                samples, applied once the problem is solved (the solver
+                always calculates in float64). Dict of field name
+                ("temperatures", "conductivity", "density", "heat_capacity",
+                "fo", "upsilon", "omega_dots" or "g_dots") to a dict with:
+                "dtype": optional. "float64" (default), "float32" or "int16"
+                    (scaled between the minimum and maximum of the field,
+                    stored as a scaled_field, decoded with to_frame())
+                "decimation": optional. only every n-th time step (and the
+                    last one) is stored (1 if None)
+                "store": optional. if False, the field is discarded (None)
+                Solutions are saved with save_solution (storage module).
+                Compacted solutions can warm start other runs if their
+                temperatures are stored. Not available for mesh studies.
+
+            events:
+            -------
+            "events": optional. list of events, each one a dict with:
+                "quantity": "surface_temperature", "back_temperature",
+                    "mass_loss_rate" or a function f(sample, temperatures,
+                    t_step) returning a float
+                "threshold": value of the quantity that defines the event
+                "direction": optional. "rising" (default), "falling" or "both"
+                "terminal": optional. if True (default), the solver stops
+                    when the event is detected
+                "name": optional. name used in the log of events
+
     Returns
     -------
     solution: DICT
         Contains the description of the problem as well as the full
         temperature profile discretized over the calculated spatial and
-        temporal grids.
+        temporal grids (for 2-D problems, sample.temperatures_2d holds the
+        fields, depth x lateral, at sample.output_times). If probes are
+        defined, "probes" contains the probe_recorder with the depths, the
+        sampling times and the array of probe temperatures (sampling times x
+        probes). If events are defined, "events" contains the list of events
+        detected, each with its name, time of the crossing and time step.
+        "diagnostics" contains the diagnostics of the solver (for the newton
+        solver, the iterations of every time step and the number of time
+        steps that did not converge; for the time stepping solvers, the
+        cumulative energy balance in J/m2: stored, surface, reaction,
+        regression, imbalance and relative_imbalance).
 
     """
 
     time_start = time.time()
 
-    # create solid sample class
-    sample = solid_sample(problem_description)
-
-    # validate input from the user
-    sample.validate_input(problem_description)
-
-    # assign properties
-    sample.assign_properties(problem_description)
+    # create, validate and assign the solid sample
+    sample = prepare_sample(problem_description)
 
     # call the respective algorithm
     print(f"Solving {problem_description['problem_type']} problem")
-    if problem_description["problem_type"] == "direct":
+    if problem_description["problem_type"] == "direct" and isinstance(
+            sample, solid_sample_2d):
+        direct_solver_2d(sample, problem_description)
+    elif (problem_description["problem_type"] == "direct" and
+          problem_description.get("direct_method") == "duhamel"):
+        duhamel_solver(sample, problem_description)
+    elif problem_description["problem_type"] == "direct":
         direct_solver(sample, problem_description, calc_Fo, calc_Upsilon,
-                      matrix_A, vector_b, update_thermal_properties)
+                      matrix_A, vector_b, update_thermal_properties,
+                      newton_step=newton_step,
+                      integrator_step=integrator_step,
+                      regression_step=regression_step)
     elif problem_description["problem_type"] == "inverse":
         pass
 
+    # compact the stored fields
+    if problem_description.get("storage") is not None:
+        compact_sample(sample, problem_description["storage"])
+
     computing_time = time.time() - time_start
     print(f"Time taken for {problem_description['problem_type']}"
           f" problem: {np.round(computing_time/60, 2)} minutes")
-    solution = {"sample": sample,
-                "problem_description": problem_description,
-                "computing_time": computing_time,
-                "type": problem_description["problem_type"]}
+    solution = build_solution(problem_description, sample, computing_time)
 
     # store all the results generated as a pickle
     now = datetime.datetime.today()
@@ -155,3 +320,138 @@ def main_solver(problem_description):
     print(file_name)
 
     return solution
+
+
+def prepare_sample(problem_description):
+    """Returns the sample of the problem, validated and with the properties
+    assigned (restored from a checkpoint if the run is resumed)"""
+    # create solid sample class
+    if problem_description.get("geometry", "1d") in ["2d_planar",
+                                                     "2d_axisymmetric"]:
+        sample = solid_sample_2d(problem_description)
+    else:
+        sample = solid_sample(problem_description)
+
+    # validate input from the user
+    sample.validate_input(problem_description)
+
+    # assign properties
+    sample.assign_properties(problem_description)
+
+    # continue from a checkpoint
+    if problem_description.get("resume_from") is not None:
+        restore_checkpoint(sample, read_checkpoint(
+            problem_description["resume_from"]))
+
+    return sample
+
+
+def build_solution(problem_description, sample, computing_time):
+    """Returns the solution dictionary of a solved sample"""
+    return {"sample": sample,
+            "problem_description": problem_description,
+            "computing_time": computing_time,
+            "probes": sample.probes,
+            "events": (None if sample.events is None
+                       else sample.events.log),
+            "diagnostics": sample.diagnostics,
+            "type": problem_description["problem_type"]}
+
+
+def iter_solve(problem_description):
+    """
+    Solves the direct heat transfer problem step by step, so that the
+    results can be consumed while the solver runs (plotting, fitting,
+    stopping early by closing the generator).
+
+    Parameters
+    ----------
+    problem_description : DICT
+        Same as for main_solver. "output_interval" is the number of time
+        steps between yielded states (for 2-D problems, the stored fields).
+
+    Yields
+    ------
+    state : solver_state
+        Read-only copy of the initial state, of the state every output
+        interval and of the last time step (the sample is only returned
+        with the solution).
+
+    Returns
+    -------
+    solution : DICT
+        Same as main_solver, as the value of the StopIteration exception
+        (e.g. solution = yield from iter_solve(problem_description)).
+
+    """
+    time_start = time.time()
+    sample = prepare_sample(problem_description)
+    if problem_description["problem_type"] != "direct":
+        print("Error, iter_solve only solves direct problems")
+        sys.exit(1)
+
+    if isinstance(sample, solid_sample_2d):
+        yield solver_state(sample, 0, sample.temperatures_2d[0])
+        for output, t_step in enumerate(direct_solver_2d_steps(
+                sample, problem_description), start=1):
+            yield solver_state(sample, t_step, sample.temperatures_2d[output])
+    else:
+        yield solver_state(sample, sample.t_step_start,
+                           sample.temperatures.iloc[
+                               :, sample.t_step_start].values)
+        if problem_description.get("direct_method") == "duhamel":
+            duhamel_solver(sample, problem_description)
+            t_steps = range(1, sample.temporal_mesh.shape[0])
+        else:
+            t_steps = direct_solver_steps(
+                sample, problem_description, calc_Fo, calc_Upsilon,
+                matrix_A, vector_b, update_thermal_properties,
+                newton_step=newton_step, integrator_step=integrator_step,
+                regression_step=regression_step)
+        output_interval = problem_description.get("output_interval") or 1
+        for t_step in t_steps:
+            if (t_step % output_interval == 0 or
+                    t_step == sample.temporal_mesh.shape[0] - 1):
+                yield solver_state(sample, t_step, sample.temperatures.iloc[
+                    :, t_step].values)
+
+    if problem_description.get("storage") is not None:
+        compact_sample(sample, problem_description["storage"])
+    return build_solution(problem_description, sample,
+                          time.time() - time_start)
+
+
+async def async_iter_solve(problem_description, executor=None,
+                           solution=None):
+    """
+    Asynchronous iterator over the states of iter_solve. The solver steps in
+    an executor (the default thread pool if None), so the event loop is not
+    blocked while the next state is calculated. If a dictionary is given as
+    solution, it is updated with the solution (same as main_solver) once
+    the run finishes.
+    """
+    loop = asyncio.get_running_loop()
+    states = iter_solve(problem_description)
+
+    def next_state():
+        """returns the next state, or the solution once the run finishes"""
+        try:
+            return False, next(states)
+        except StopIteration as stop:
+            return True, stop.value
+
+    try:
+        while True:
+            finished, value = await loop.run_in_executor(executor,
+                                                         next_state)
+            if finished:
+                if solution is not None:
+                    solution.update(value)
+                break
+            yield value
+    finally:
+        try:
+            states.close()
+        except ValueError:
+            # still stepping in the executor (cancelled consumer)
+            pass
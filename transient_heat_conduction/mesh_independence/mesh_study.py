@@ -0,0 +1,253 @@
+"""
+Mesh independence study.
+Solves the same problem over successively refined spatial meshes, applies
+Richardson extrapolation to the selected outputs, calculates the grid
+convergence index (GCI) and recommends the coarsest mesh whose error is
+within the tolerance given by the user.
+"""
+import sys
+import numpy as np
+
+# import from local project
+from main_solver import main_solver
+
+
+def interpolate_in_time(sample, values, evaluation_time):
+    """Returns the values (array over the temporal mesh) at the evaluation
+    time, which must be within the temporal mesh (to round-off)"""
+    tolerance = 1e-9 * sample.time_total
+    if not (sample.temporal_mesh[0] - tolerance <= evaluation_time <=
+            sample.temporal_mesh[-1] + tolerance):
+        print("Error, mesh study evaluation time outside the simulated time")
+        sys.exit(1)
+    return np.interp(evaluation_time, sample.temporal_mesh, values)
+
+
+def surface_temperature(solution, evaluation_time):
+    """Returns the surface temperature at the evaluation time"""
+    sample = solution["sample"]
+    return interpolate_in_time(
+        sample, sample.temperatures.iloc[0, :].values, evaluation_time)
+
+
+def back_temperature(solution, evaluation_time):
+    """Returns the back face temperature at the evaluation time"""
+    sample = solution["sample"]
+    return interpolate_in_time(
+        sample, sample.temperatures.iloc[-1, :].values, evaluation_time)
+
+
+def probes(solution, evaluation_time):
+    """Returns the probe temperatures (all probes and sampling times)"""
+    return solution["probes"].temperatures
+
+
+# outputs that can be referred to by name
+study_outputs = {"surface_temperature": surface_temperature,
+                 "back_temperature": back_temperature,
+                 "probes": probes}
+
+
+def refined_problem(problem_description, x_divisions):
+    """Returns a copy of the problem description with the given number of
+    divisions (the initial temperature is interpolated if it is an array)"""
+    problem_refined = dict(problem_description)
+    problem_refined["x_divisions"] = x_divisions
+    if isinstance(problem_description["temperature_initial"], np.ndarray):
+        problem_refined["temperature_initial"] = np.interp(
+            np.linspace(0, problem_description["depth"], x_divisions),
+            np.linspace(0, problem_description["depth"],
+                        problem_description["x_divisions"]),
+            problem_description["temperature_initial"])
+    return problem_refined
+
+
+def calc_richardson(values, refinement_ratio, formal_order=2):
+    """
+    Richardson extrapolation of an output calculated over successively
+    refined meshes (values[0] is the coarsest). Returns the observed order,
+    the extrapolated value and the GCI of the finest mesh (Roache's factor
+    of safety: 1.25 for three or more meshes, 3 for two meshes).
+    """
+    values = [np.asarray(value, dtype=float) for value in values]
+    fine, medium = values[-1], values[-2]
+    order = formal_order
+    factor_safety = 3
+    if len(values) >= 3:
+        factor_safety = 1.25
+        difference_coarse = np.linalg.norm(values[-3] - medium)
+        difference_fine = np.linalg.norm(medium - fine)
+        if difference_fine > 0 and difference_coarse > 0:
+            order = np.log(difference_coarse /
+                           difference_fine) / np.log(refinement_ratio)
+        # the observed order is not used if convergence is not monotonic
+        if not np.isfinite(order) or order <= 0:
+            order = formal_order
+    extrapolated = fine + (fine - medium) / (refinement_ratio**order - 1)
+    gci = factor_safety * np.linalg.norm(fine - medium) / (
+        np.linalg.norm(fine) * (refinement_ratio**order - 1))
+
+    return order, extrapolated, gci
+
+
+def mesh_study(problem_description, outputs=("surface_temperature",),
+               levels=3, refinement_ratio=2, tolerance=0.01,
+               previous_results=None, evaluation_time=None):
+    """
+    Runs the mesh independence study.
+
+    Parameters
+    ----------
+    problem_description : DICT
+        Description of the heat transfer problem (see main_solver). Its
+        "x_divisions" defines the coarsest mesh.
+
+    outputs : LIST
+        Outputs to be compared between meshes. Either names in study_outputs
+        or functions f(solution, evaluation_time) returning a float or an
+        array. Time dependent outputs are evaluated at the evaluation time.
+        "probes" needs the "probe_times" of the problem (the time step
+        changes with the mesh).
+
+    levels : INT
+        Number of meshes (2 or more).
+
+    refinement_ratio : INT
+        Ratio between the mesh sizes of successive meshes. An integer so
+        that the nodes of coarser meshes are also nodes of finer meshes.
+
+    tolerance : FLOAT
+        Relative error (with respect to the extrapolated value) accepted.
+
+    previous_results : DICT
+        Results of a previous study of the same problem. The outputs of the
+        meshes already solved are reused instead of solving them again.
+
+    evaluation_time : FLOAT
+        Time in s at which time dependent outputs are compared (the last
+        time of the coarsest mesh if None, or the one of the previous
+        results). Times outside the simulated time of any mesh are rejected.
+
+    Returns
+    -------
+    results : DICT
+        x_divisions of every mesh, the outputs, observed order, extrapolated
+        values, GCI, relative errors of every mesh and the recommended
+        x_divisions.
+
+    """
+    # validate the study parameters
+    if int(levels) < 2:
+        print("Error, mesh study needs at least two meshes")
+        sys.exit(1)
+    if int(refinement_ratio) != refinement_ratio or refinement_ratio < 2:
+        print("Error, refinement ratio not valid")
+        sys.exit(1)
+    output_functions = {}
+    for output in outputs:
+        if callable(output):
+            output_functions[output.__name__] = output
+        elif output in study_outputs:
+            output_functions[output] = study_outputs[output]
+        else:
+            print(f"Error, mesh study output {output} not valid")
+            sys.exit(1)
+    # the time step changes with the mesh, so the probes are only comparable
+    # at the same sampling times
+    if ("probes" in output_functions and
+            problem_description.get("probe_times") is None):
+        print("Error, mesh study of the probes needs probe times")
+        sys.exit(1)
+    # the outputs are read from the full fields of every solution
+    if problem_description.get("storage") is not None:
+        print("Error, storage policies not available for the mesh study")
+        sys.exit(1)
+    if (problem_description.get("probes_only") and
+            list(output_functions) != ["probes"]):
+        print("Error, mesh study of the fields not available with probes "
+              "only")
+        sys.exit(1)
+
+    # time at which the outputs are compared
+    if evaluation_time is not None:
+        try:
+            evaluation_time = float(evaluation_time)
+        except (ValueError, TypeError):
+            print("Error, mesh study evaluation time not valid")
+            sys.exit(1)
+        if not 0 <= evaluation_time <= problem_description["time_total"]:
+            print("Error, mesh study evaluation time outside the simulated "
+                  "time")
+            sys.exit(1)
+
+    x_divisions_coarse = problem_description["x_divisions"]
+    x_divisions = [(x_divisions_coarse - 1) * refinement_ratio**level + 1
+                   for level in range(levels)]
+
+    # outputs calculated in a previous study (at its evaluation time)
+    solved = {}
+    if previous_results is not None:
+        if evaluation_time not in [None,
+                                   previous_results["evaluation_time"]]:
+            print("Error, evaluation time differs from the previous results")
+            sys.exit(1)
+        evaluation_time = previous_results["evaluation_time"]
+        for level, divisions in enumerate(previous_results["x_divisions"]):
+            solved[divisions] = (
+                {name: values[level] for name, values
+                 in previous_results["outputs"].items()
+                 if name in output_functions},
+                previous_results["computing_time"][level])
+
+    # solve the problem over every mesh (coarsest first)
+    for divisions in x_divisions:
+        if (divisions in solved and
+                len(solved[divisions][0]) == len(output_functions)):
+            continue
+        print(f"Mesh study: solving with {divisions} divisions")
+        solution = main_solver(refined_problem(problem_description,
+                                               divisions))
+        if evaluation_time is None:
+            evaluation_time = solution["sample"].temporal_mesh[-1]
+        solved[divisions] = (
+            {name: function(solution, evaluation_time)
+             for name, function in output_functions.items()},
+            solution["computing_time"])
+
+    # Richardson extrapolation and errors of every mesh
+    results = {"x_divisions": x_divisions,
+               "evaluation_time": evaluation_time,
+               "computing_time": [solved[divisions][1]
+                                  for divisions in x_divisions],
+               "outputs": {}, "observed_order": {}, "extrapolated": {},
+               "gci": {}, "relative_errors": {}}
+    accepted = np.ones(levels, dtype=bool)
+    orders = []
+    for name in output_functions:
+        values = [solved[divisions][0][name] for divisions in x_divisions]
+        order, extrapolated, gci = calc_richardson(values, refinement_ratio)
+        errors = np.array([np.linalg.norm(np.asarray(value) - extrapolated) /
+                           np.linalg.norm(extrapolated) for value in values])
+        results["outputs"][name] = values
+        results["observed_order"][name] = order
+        results["extrapolated"][name] = extrapolated
+        results["gci"][name] = gci
+        results["relative_errors"][name] = errors
+        accepted &= errors <= tolerance
+        orders.append((order, errors[-1]))
+
+    # recommend the coarsest mesh within the tolerance. If none is, estimate
+    # the mesh needed from the error of the finest mesh and observed order
+    if np.any(accepted):
+        results["recommended_x_divisions"] = x_divisions[
+            np.flatnonzero(accepted)[0]]
+    else:
+        dx_fine = problem_description["depth"] / (x_divisions[-1] - 1)
+        dx_needed = min(dx_fine * (tolerance / error)**(1 / order)
+                        for order, error in orders if error > 0)
+        results["recommended_x_divisions"] = int(
+            np.ceil(problem_description["depth"] / dx_needed)) + 1
+    print("Mesh study: recommended x_divisions "
+          f"{results['recommended_x_divisions']}")
+
+    return results
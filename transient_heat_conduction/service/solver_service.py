@@ -0,0 +1,381 @@
+"""
+Local solver service.
+A long-lived HTTP server (localhost) that solves problem descriptions sent
+by several clients with a pool of warm worker processes (main_solver already
+imported), so that every job does not pay the start-up cost of Python and
+its imports and the number of concurrent solvers is bounded.
+
+Jobs are queued by priority (higher first, then in order of submission).
+A problem description identical to one that is queued or running is not
+solved twice: the job id of the first one is returned. Results are
+retrieved by job id and kept until deleted, for at most retention seconds
+after the job finishes and only the last max_finished of them (older
+finished jobs are removed). If a worker process dies, its jobs fail and the
+pool of workers is recreated for the next ones.
+
+Endpoints (JSON bodies):
+    POST /jobs           {"problem_description": {...}, "priority": 0}
+                         returns {"job_id", "status", "duplicate"}
+    GET /jobs/<id>       status of the job ("queued", "running", "done",
+                         "failed" or "cancelled") and its solution (or
+                         error). ?wait=seconds waits for the job to finish
+    DELETE /jobs/<id>    cancels a queued job or deletes a finished one
+    GET /status          number of workers, queued and running jobs
+"""
+import io
+import sys
+import json
+import time
+import uuid
+import heapq
+import functools
+import threading
+import contextlib
+import multiprocessing
+import urllib.parse
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from main_solver import main_solver
+from classes_and_functions.problem_io import (problem_to_json,
+                                              problem_from_json,
+                                              problem_hash,
+                                              solution_to_json_compatible)
+
+# statuses of finished jobs
+finished_statuses = ["done", "failed", "cancelled"]
+
+
+def warm_worker():
+    """Runs in every worker process when it starts (main_solver and its
+    dependencies are imported with this module)"""
+    return None
+
+
+def solve_job(problem_json):
+    """Solves a problem description (JSON) in a worker process. Returns the
+    status and the solution, or the error printed by the validation"""
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            solution = main_solver(problem_from_json(problem_json))
+    except SystemExit:
+        errors = [line for line in output.getvalue().splitlines()
+                  if line.startswith("Error")]
+        return {"status": "failed",
+                "error": errors[-1] if errors else "solver exited"}
+    return {"status": "done",
+            "solution": solution_to_json_compatible(solution)}
+
+
+class solver_service():
+    """
+    Queue of jobs, pool of warm workers and HTTP server. Jobs can be
+    submitted (submit) before the service is started (start); they are
+    dispatched by priority once the workers are available.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, workers=2, retention=3600,
+                 max_finished=1000):
+        """creates the queue and the HTTP server (port 0 for any free
+        port). Finished jobs are kept for retention seconds, at most
+        max_finished of them"""
+        self.workers = workers
+        self.retention = retention
+        self.max_finished = max_finished
+        self.jobs = {}
+        self.queue = []
+        self.in_flight = {}
+        self.sequence = 0
+        self.condition = threading.Condition()
+        self.slots = threading.Semaphore(workers)
+        self.closing = False
+        self.pool = None
+        self.threads = []
+        self.server = ThreadingHTTPServer((host, port), service_handler)
+        self.server.service = self
+        self.url = (f"http://{self.server.server_address[0]}:"
+                    f"{self.server.server_address[1]}")
+
+    def start(self):
+        """Starts the worker processes, waits until they are warm and starts
+        the dispatcher and the HTTP server"""
+        self.pool = self.new_pool()
+        for future in [self.pool.submit(warm_worker)
+                       for _ in range(self.workers)]:
+            future.result()
+        for target in [self.dispatch, self.server.serve_forever]:
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def new_pool(self):
+        """Returns a pool of worker processes (started when used)"""
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_worker)
+
+    def restart_pool(self, pool):
+        """Replaces the pool if it is the current one and is broken (a
+        worker died). Every job of a broken pool fails, so only the first
+        of them replaces it"""
+        with self.condition:
+            if self.pool is not pool or self.closing:
+                return
+            self.pool = self.new_pool()
+        pool.shutdown(wait=False)
+
+    def prune(self):
+        """Removes the finished jobs older than the retention and the oldest
+        beyond max_finished (call holding the condition)"""
+        finished = sorted((job["finished"], job_id)
+                          for job_id, job in self.jobs.items()
+                          if job["status"] in finished_statuses)
+        expired = time.time() - self.retention
+        excess = len(finished) - self.max_finished
+        for index, (time_finished, job_id) in enumerate(finished):
+            if time_finished >= expired and index >= excess:
+                break
+            del self.jobs[job_id]
+
+    def shutdown(self):
+        """Stops the HTTP server, the dispatcher and the workers"""
+        self.server.shutdown()
+        self.server.server_close()
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+        self.slots.release()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def submit(self, problem_description, priority=0):
+        """Queues a problem description. Returns the job id, its status and
+        whether an identical job was already queued or running"""
+        problem_json = problem_to_json(problem_description)
+        key = problem_hash(problem_description)
+        with self.condition:
+            self.prune()
+            if key in self.in_flight:
+                job_id = self.in_flight[key]
+                return {"job_id": job_id,
+                        "status": self.jobs[job_id]["status"],
+                        "duplicate": True}
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {"status": "queued", "priority": priority,
+                                 "hash": key, "problem_json": problem_json,
+                                 "submitted": time.time(), "started": None,
+                                 "finished": None, "result": None,
+                                 "event": threading.Event()}
+            self.in_flight[key] = job_id
+            heapq.heappush(self.queue, (-priority, self.sequence, job_id))
+            self.sequence += 1
+            self.condition.notify_all()
+        return {"job_id": job_id, "status": "queued", "duplicate": False}
+
+    def job(self, job_id, wait=None):
+        """Returns the status of a job and its solution (or error) once
+        finished, after waiting up to wait seconds for it to finish. None if
+        the job does not exist"""
+        with self.condition:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if wait is not None:
+            job["event"].wait(wait)
+        with self.condition:
+            summary = {"job_id": job_id, "status": job["status"],
+                       "priority": job["priority"],
+                       "submitted": job["submitted"],
+                       "started": job["started"],
+                       "finished": job["finished"]}
+            if job["result"] is not None:
+                summary.update(job["result"])
+                summary["status"] = job["status"]
+        return summary
+
+    def delete(self, job_id):
+        """Cancels a queued job or deletes a finished one. Returns False if
+        the job is running or does not exist"""
+        with self.condition:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] == "running":
+                return False
+            if job["status"] == "queued":
+                # removed from the queue when dispatched
+                job["status"] = "cancelled"
+                job["finished"] = time.time()
+                del self.in_flight[job["hash"]]
+                job["event"].set()
+            else:
+                del self.jobs[job_id]
+        return True
+
+    def status(self):
+        """Returns the number of workers, queued and running jobs"""
+        with self.condition:
+            self.prune()
+            statuses = [job["status"] for job in self.jobs.values()]
+        return {"workers": self.workers,
+                "queued": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "finished": len(statuses) - statuses.count("queued") -
+                statuses.count("running")}
+
+    def dispatch(self):
+        """Sends the queued job of highest priority to the workers whenever
+        one of them is free"""
+        while True:
+            self.slots.acquire()
+            with self.condition:
+                while True:
+                    while not self.queue and not self.closing:
+                        self.condition.wait()
+                    if self.closing:
+                        return
+                    _, _, job_id = heapq.heappop(self.queue)
+                    job = self.jobs.get(job_id)
+                    if job is not None and job["status"] == "queued":
+                        break
+                job["status"] = "running"
+                job["started"] = time.time()
+            pool = self.pool
+            try:
+                future = pool.submit(solve_job, job["problem_json"])
+            except BrokenProcessPool:
+                # broken before the failed jobs recreated it
+                self.restart_pool(pool)
+                pool = self.pool
+                future = pool.submit(solve_job, job["problem_json"])
+            future.add_done_callback(
+                functools.partial(self.finish, job_id, pool))
+
+    def finish(self, job_id, pool, future):
+        """Stores the result of a job and frees its worker (the pool is
+        recreated if a worker died)"""
+        try:
+            result = future.result()
+        except BrokenProcessPool as error:
+            result = {"status": "failed", "error": repr(error)}
+            self.restart_pool(pool)
+        except Exception as error:
+            result = {"status": "failed", "error": repr(error)}
+        with self.condition:
+            job = self.jobs[job_id]
+            job["status"] = result["status"]
+            job["result"] = result
+            job["finished"] = time.time()
+            del self.in_flight[job["hash"]]
+            self.prune()
+        job["event"].set()
+        self.slots.release()
+
+
+class service_handler(BaseHTTPRequestHandler):
+    """HTTP requests of the solver service"""
+
+    def send_json(self, code, content):
+        """sends a JSON response"""
+        body = json.dumps(content).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def job_id(self):
+        """job id in the path (None for other paths)"""
+        path = urllib.parse.urlparse(self.path).path.strip("/").split("/")
+        if len(path) == 2 and path[0] == "jobs":
+            return path[1]
+        return None
+
+    def do_POST(self):
+        """submits a job"""
+        if urllib.parse.urlparse(self.path).path.strip("/") != "jobs":
+            self.send_json(404, {"error": "not found"})
+            return
+        try:
+            request = json.loads(self.rfile.read(
+                int(self.headers.get("Content-Length", 0))))
+            response = self.server.service.submit(
+                request["problem_description"],
+                priority=float(request.get("priority", 0)))
+        except (ValueError, KeyError, TypeError) as error:
+            self.send_json(400, {"error": f"request not valid: {error}"})
+            return
+        self.send_json(202, response)
+
+    def do_GET(self):
+        """returns the status of the service or of a job"""
+        url = urllib.parse.urlparse(self.path)
+        if url.path.strip("/") == "status":
+            self.send_json(200, self.server.service.status())
+            return
+        wait = urllib.parse.parse_qs(url.query).get("wait")
+        if wait is not None:
+            try:
+                wait = float(wait[0])
+            except ValueError:
+                wait = None
+            # seconds to wait, finite and not negative
+            if wait is None or not 0 <= wait < float("inf"):
+                self.send_json(400, {"error": "wait not valid"})
+                return
+        job = None
+        if self.job_id() is not None:
+            job = self.server.service.job(self.job_id(), wait=wait)
+        if job is None:
+            self.send_json(404, {"error": "not found"})
+        else:
+            self.send_json(200, job)
+
+    def do_DELETE(self):
+        """cancels or deletes a job"""
+        if (self.job_id() is None or
+                not self.server.service.delete(self.job_id())):
+            self.send_json(409, {"error": "job running or not found"})
+        else:
+            self.send_json(200, {"job_id": self.job_id(),
+                                 "deleted": True})
+
+    def log_message(self, format, *args):
+        """requests are not logged"""
+        return None
+
+
+def submit_job(url, problem_description, priority=0):
+    """Submits a problem description to the service at url. Returns the job
+    id, its status and whether it was a duplicate"""
+    request = urllib.request.Request(
+        f"{url}/jobs", method="POST",
+        data=json.dumps({"problem_description": json.loads(
+            problem_to_json(problem_description)),
+            "priority": priority}).encode(),
+        headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def job_result(url, job_id, timeout=60):
+    """Waits up to timeout seconds for a job of the service at url and
+    returns its status and solution (or error)"""
+    with urllib.request.urlopen(
+            f"{url}/jobs/{job_id}?wait={timeout}",
+            timeout=timeout + 10) as response:
+        return json.loads(response.read())
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    service = solver_service(port=port, workers=workers).start()
+    print(f"Solver service at {service.url} with {workers} workers")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        service.shutdown()
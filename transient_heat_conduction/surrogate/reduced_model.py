@@ -0,0 +1,343 @@
+"""
+Reduced order model (POD/Galerkin).
+Snapshots of the temperature profile are collected from direct solver runs
+over a training sweep of the parameters. The dominant modes (proper
+orthogonal decomposition) form a basis onto which the Crank-Nicolson
+operator of the direct solver (calc_parameters.tridiagonal_operator) is
+projected. For linear problems (constant
+properties, inert material, linear surface boundary condition, insulated
+back face) the operator is affine in the parameters, so the projection of
+every term is calculated once and a query only assembles and solves a
+small dense system (as many unknowns as modes) at every time step.
+"""
+import sys
+import json
+import itertools
+import numpy as np
+from scipy import linalg
+
+# import from local project
+from main_solver import main_solver
+from classes_and_functions.calc_parameters import tridiagonal_operator
+
+# parameters of the training sweep and the problem description keys they
+# replace (properties replace the base value of the coefficients)
+surrogate_parameters = {"conductivity": "conductivity_coeff",
+                        "density": "density_coeff",
+                        "heat_capacity": "heat_capacity_coeff",
+                        "h_total": "h_total",
+                        "absorptivity": "absorptivity",
+                        "nhf": "nhf",
+                        "temperature_surface": "temperature_surface",
+                        "temperature_initial": "temperature_initial",
+                        "temperature_ambient": "temperature_ambient"}
+
+
+def parameter_problem(problem_description, parameters):
+    """Returns a copy of the problem description with the values of the
+    parameters"""
+    problem = dict(problem_description)
+    for name, value in parameters.items():
+        key = surrogate_parameters[name]
+        if key.endswith("_coeff"):
+            problem[key] = (float(value), None)
+        else:
+            problem[key] = float(value)
+    return problem
+
+
+def parameter_grid(parameter_values):
+    """Returns the list of parameter dictionaries of the grid defined by
+    the values of every parameter"""
+    names = list(parameter_values)
+    return [dict(zip(names, point)) for point in itertools.product(
+        *[np.atleast_1d(parameter_values[name]) for name in names])]
+
+
+def operator_terms(problem_description, x_divisions):
+    """Returns the matrices of the operator of the direct solver
+    (tridiagonal_operator) for a unit Fourier number, node spacing and
+    surface conductivity: the conduction term and the surface losses term
+    per unit heat transfer coefficient (zero unless robin)"""
+    fo = np.ones(x_divisions)
+    matrices = []
+    for h_surface in [0, 1]:
+        lower, diag, upper = tridiagonal_operator(problem_description, fo, 1,
+                                                  1, h_surface)
+        matrices.append(np.diagflat(lower[1:], -1) + np.diagflat(diag) +
+                        np.diagflat(upper[:-1], 1))
+    return matrices[0], matrices[1] - matrices[0]
+
+
+class reduced_model():
+    """
+    POD/Galerkin reduced order model. Contains the basis, the projected
+    terms of the operator and the errors measured against the direct
+    solver at the validation parameters.
+    """
+
+    def __init__(self, basis, reduced_terms, nominal, space_mesh,
+                 temporal_mesh, ihf=None, validation_points=None,
+                 validation_errors=None):
+        """initializes the model"""
+        self.basis = basis
+        self.reduced_terms = reduced_terms
+        self.nominal = nominal
+        self.space_mesh = space_mesh
+        self.temporal_mesh = temporal_mesh
+        self.ihf = ihf
+        self.validation_points = validation_points
+        self.validation_errors = validation_errors
+        self.modes = basis.shape[1]
+
+    def values(self, parameters):
+        """Returns the values of all the parameters (nominal values for
+        those not given)"""
+        values = dict(self.nominal["values"])
+        for name, value in parameters.items():
+            if name not in surrogate_parameters:
+                raise ValueError(f"parameter {name} not valid")
+            values[name] = float(value)
+        return values
+
+    def solve_reduced(self, parameters):
+        """Returns the coefficients of the modes (modes x time steps) and
+        the initial temperature for the parameters"""
+        values = self.values(parameters)
+        terms = self.reduced_terms
+        boundcond_surface = self.nominal["boundcond_surface"]
+        dx = self.space_mesh[1] - self.space_mesh[0]
+        dt = self.temporal_mesh[1] - self.temporal_mesh[0]
+        fo = values["conductivity"] * dt / (
+            values["density"] * values["heat_capacity"] * dx**2)
+        flux_factor = 2 * fo * dx / values["conductivity"]
+
+        # reduced matrices of t=n+1 (A) and t=n (B), and constant source
+        operator = fo * terms["diffusion"]
+        offset = fo * terms["diffusion_uniform"]
+        surface = terms["surface"]
+        forcing = np.zeros(self.temporal_mesh.shape[0] - 1)
+        if boundcond_surface == "robin":
+            losses_factor = fo * dx * values["h_total"] / values[
+                "conductivity"]
+            operator = operator + losses_factor * terms["losses"]
+            offset = offset + losses_factor * terms["losses_uniform"]
+            forcing = flux_factor * (
+                values["absorptivity"] * (self.ihf[:-1] + self.ihf[1:]) / 2 +
+                values["h_total"] * values["temperature_ambient"])
+        elif boundcond_surface == "neunman":
+            forcing += flux_factor * values["nhf"]
+        A = np.eye(self.modes) - operator / 2
+        B = np.eye(self.modes) + operator / 2
+        if boundcond_surface == "dirichlet":
+            B -= np.outer(surface, surface)
+            offset = offset - surface
+            forcing += values["temperature_surface"]
+        source = values["temperature_initial"] * offset
+
+        # step forward. The small dense system is solved once for the
+        # matrix and source terms, so every step is a matrix-vector product
+        step_matrix, step_source, step_surface = np.split(
+            linalg.solve(A, np.column_stack([B, source, surface])),
+            [self.modes, self.modes + 1], axis=1)
+        coefficients = np.zeros((self.modes, self.temporal_mesh.shape[0]))
+        for t_step in range(self.temporal_mesh.shape[0] - 1):
+            coefficients[:, t_step + 1] = (
+                step_matrix @ coefficients[:, t_step] + step_source[:, 0] +
+                forcing[t_step] * step_surface[:, 0])
+        return coefficients, values["temperature_initial"]
+
+    def solve(self, parameters, depths=None):
+        """Returns the temperatures (nodes x time steps, or depths x time
+        steps if depths are given) for the parameters"""
+        coefficients, temperature_initial = self.solve_reduced(parameters)
+        if depths is None:
+            basis = self.basis
+        else:
+            basis = np.array([np.interp(depths, self.space_mesh, mode)
+                              for mode in self.basis.T]).T
+        return temperature_initial + basis @ coefficients
+
+    def error_estimate(self, parameters):
+        """Returns the estimate of the maximum error in K for the
+        parameters, interpolated (inverse distance weighting, with the
+        parameters scaled by their range) from the errors at the validation
+        parameters"""
+        if self.validation_points is None:
+            return np.nan
+        values = self.values(parameters)
+        names = list(self.nominal["sweep"])
+        point = np.array([values[name] for name in names])
+        scale = np.ptp(self.validation_points, axis=0)
+        scale[scale == 0] = 1
+        distances = np.linalg.norm((self.validation_points - point) / scale,
+                                   axis=1)
+        if np.any(distances == 0):
+            return float(self.validation_errors[np.argmin(distances)])
+        weights = 1 / distances**2
+        return float(np.sum(weights * self.validation_errors) /
+                     np.sum(weights))
+
+    def save(self, file_name):
+        """Saves the model to file_name (numpy npz file)"""
+        state = {"basis": self.basis, "space_mesh": self.space_mesh,
+                 "temporal_mesh": self.temporal_mesh,
+                 "nominal": json.dumps(self.nominal)}
+        for term, value in self.reduced_terms.items():
+            state[f"term_{term}"] = value
+        for name in ["ihf", "validation_points", "validation_errors"]:
+            if getattr(self, name) is not None:
+                state[name] = getattr(self, name)
+        with open(file_name, "wb") as f:
+            np.savez(f, **state)
+
+    @classmethod
+    def load(cls, file_name):
+        """Returns the model saved in file_name"""
+        with np.load(file_name, allow_pickle=False) as data:
+            state = {key: data[key] for key in data.files}
+        reduced_terms = {key[len("term_"):]: value
+                         for key, value in state.items()
+                         if key.startswith("term_")}
+        return cls(state["basis"], reduced_terms,
+                   json.loads(str(state["nominal"])), state["space_mesh"],
+                   state["temporal_mesh"], state.get("ihf"),
+                   state.get("validation_points"),
+                   state.get("validation_errors"))
+
+
+def train_reduced_model(problem_description, training_parameters,
+                        validation_parameters=None, modes=10,
+                        energy=1 - 1e-10):
+    """
+    Trains a reduced order model from direct solver snapshots.
+
+    Parameters
+    ----------
+    problem_description : DICT
+        Description of the nominal problem (see main_solver): 1-D, constant
+        properties, inert, uniform initial temperature, insulated back face
+        and dirichlet, neunman or robin (linear losses) surface boundary
+        condition. Its time step ("time_step" or the default) is the time
+        step of the reduced model.
+
+    training_parameters : DICT
+        Values of every parameter of the sweep (names in
+        surrogate_parameters). The direct solver is run over the grid of
+        all the combinations. The incident heat flux scales with the
+        absorptivity.
+
+    validation_parameters : DICT
+        Values of the parameters at which the errors of the reduced model
+        are measured against the direct solver (grid of all the
+        combinations). If None, the midpoints of the training values.
+
+    modes : INT
+        Maximum number of modes.
+
+    energy : FLOAT
+        Fraction of the energy of the snapshots (sum of the squared singular
+        values) captured by the modes kept.
+
+    Returns
+    -------
+    model : reduced_model
+
+    """
+    # validate the problem and the sweep
+    if (problem_description.get("geometry", "1d") != "1d" or
+            problem_description["properties_type"] != "constant" or
+            problem_description["material_type"] != "inert" or
+            problem_description["boundcond_back"] != "insulated" or
+            isinstance(problem_description["temperature_initial"],
+                       np.ndarray) or
+            (problem_description["boundcond_surface"] == "robin" and
+             problem_description["surface_losses_type"] != "linear")):
+        print("Error, reduced model needs a 1-D inert sample with constant "
+              "properties, uniform initial temperature, linear surface "
+              "losses and an insulated back face")
+        sys.exit(1)
+    if problem_description.get("probes_only"):
+        print("Error, reduced model needs the temperature fields (probes "
+              "only not available)")
+        sys.exit(1)
+    for name in training_parameters:
+        if name not in surrogate_parameters:
+            print(f"Error, reduced model parameter {name} not valid")
+            sys.exit(1)
+    if validation_parameters is None:
+        validation_parameters = {}
+        for name, values in training_parameters.items():
+            values = np.sort(np.atleast_1d(np.asarray(values, dtype=float)))
+            validation_parameters[name] = (
+                (values[:-1] + values[1:]) / 2 if values.shape[0] > 1
+                else values)
+
+    # nominal values of the parameters and time step of the model
+    boundcond_surface = problem_description["boundcond_surface"]
+    nominal_values = {}
+    for name, key in surrogate_parameters.items():
+        value = problem_description.get(key)
+        if key.endswith("_coeff"):
+            value = value[0]
+        if name == "absorptivity" and value is None:
+            value = 1
+        nominal_values[name] = None if value is None else float(value)
+    time_step = problem_description.get("time_step")
+    if time_step is None:
+        dx = problem_description["depth"] / (
+            problem_description["x_divisions"] - 1)
+        time_step = (1/6)*(dx**2/nominal_values["conductivity"] *
+                           nominal_values["density"] *
+                           nominal_values["heat_capacity"])
+    problem_training = dict(problem_description, time_step=time_step)
+
+    # snapshots of the training sweep (temperature rise over the initial)
+    snapshots = []
+    for parameters in parameter_grid(training_parameters):
+        solution = main_solver(parameter_problem(problem_training,
+                                                 parameters))
+        sample = solution["sample"]
+        snapshots.append(sample.temperatures.values - parameter_problem(
+            problem_training, parameters)["temperature_initial"])
+    snapshots = np.hstack(snapshots)
+
+    # POD basis (left singular vectors)
+    vectors, singular_values, _ = np.linalg.svd(snapshots,
+                                                full_matrices=False)
+    captured = np.cumsum(singular_values**2) / np.sum(singular_values**2)
+    modes = min(modes, int(np.searchsorted(captured, energy)) + 1)
+    basis = vectors[:, :modes]
+    print(f"Reduced model: {modes} modes, captured energy "
+          f"{captured[modes - 1]}")
+
+    # projection of the terms of the operator
+    diffusion, losses = operator_terms(problem_description,
+                                       sample.x_divisions)
+    reduced_terms = {"diffusion": basis.T @ diffusion @ basis,
+                     "diffusion_uniform": basis.T @ diffusion.sum(axis=1),
+                     "losses": basis.T @ losses @ basis,
+                     "losses_uniform": basis.T @ losses.sum(axis=1),
+                     "surface": basis[0].copy()}
+    nominal = {"boundcond_surface": boundcond_surface,
+               "values": nominal_values,
+               "sweep": list(training_parameters)}
+    model = reduced_model(basis, reduced_terms, nominal, sample.space_mesh,
+                          sample.temporal_mesh,
+                          getattr(sample, "ihf", None))
+
+    # errors against the direct solver at the validation parameters
+    points, errors = [], []
+    for parameters in parameter_grid(validation_parameters):
+        solution = main_solver(parameter_problem(problem_training,
+                                                 parameters))
+        errors.append(np.max(np.abs(
+            solution["sample"].temperatures.values -
+            model.solve(parameters))))
+        values = model.values(parameters)
+        points.append([values[name] for name in nominal["sweep"]])
+    model.validation_points = np.array(points)
+    model.validation_errors = np.array(errors)
+    print(f"Reduced model: maximum validation error {np.max(errors)} K")
+
+    return model
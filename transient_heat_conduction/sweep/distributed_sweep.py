@@ -0,0 +1,394 @@
+"""
+Distributed sweep through a shared filesystem.
+A sweep (a base problem description and a list of changes to it) is written
+to a work directory as one task file per problem. Workers on any machine
+that sees the directory claim tasks by renaming them atomically from
+pending/ to running/ (only one rename succeeds), keep the modification time
+of the running file as a heartbeat while they solve, and write the compact
+solution (storage policies, compressed npz) and a summary to results/.
+Tasks whose heartbeat stops (crashed workers) are renamed back to pending/
+by any worker or by the coordinator, which tracks the progress and merges
+the results. No broker is needed.
+
+Work directory:
+    sweep.json                          base problem and task ids
+    pending/<task_id>.json              tasks waiting for a worker
+    running/<task_id>.<worker_id>.json  tasks being solved
+    results/<task_id>.json (.npz)       summary (and solution) of the task
+
+Run the workers and the coordinator from the transient_heat_conduction
+directory:
+    python -m sweep.distributed_sweep worker <work_directory>
+    python -m sweep.distributed_sweep coordinator <work_directory>
+"""
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import threading
+import contextlib
+import numpy as np
+
+# import from local project
+from main_solver import main_solver
+from classes_and_functions.problem_io import (json_compatible,
+                                              problem_from_json)
+from classes_and_functions.storage import save_solution, load_solution
+
+# fields discarded from the solutions unless the base problem description
+# has its own storage policies
+default_storage = {"fo": {"store": False}, "upsilon": {"store": False},
+                   "omega_dots": {"store": False},
+                   "g_dots": {"store": False}}
+
+
+def sweep_paths(work_directory):
+    """Returns the pending, running and results directories"""
+    return [os.path.join(work_directory, directory)
+            for directory in ["pending", "running", "results"]]
+
+
+def write_atomically(file_name, text):
+    """Writes text to file_name through a temporary file, so that readers
+    never see a partial file"""
+    file_temporary = f"{file_name}.{uuid.uuid4().hex}.tmp"
+    with open(file_temporary, "w") as f:
+        f.write(text)
+    os.replace(file_temporary, file_name)
+
+
+def filesystem_time(work_directory):
+    """Returns the current time of the shared filesystem (modification
+    times are compared against it, not against the clock of the node)"""
+    file_name = os.path.join(work_directory, "running",
+                             f".clock.{uuid.uuid4().hex}")
+    with open(file_name, "w"):
+        pass
+    now = os.stat(file_name).st_mtime
+    os.remove(file_name)
+    return now
+
+
+def create_sweep(work_directory, problem_description, problem_updates,
+                 storage=None):
+    """
+    Writes the tasks of a sweep to the work directory.
+
+    Parameters
+    ----------
+    work_directory : STR
+        directory on the shared filesystem (created if it does not exist).
+
+    problem_description : DICT
+        base problem description (1-D samples only, since the solutions are
+        saved with storage policies).
+
+    problem_updates : LIST
+        changes to the base problem description (dicts), one per task.
+
+    storage : DICT
+        storage policies of the solutions (default_storage if None and the
+        base problem description has none).
+
+    Returns
+    -------
+    task_ids : LIST
+        ids of the tasks, in the order of the problem updates.
+
+    """
+    if os.path.exists(os.path.join(work_directory, "sweep.json")):
+        print("Error, work directory already contains a sweep")
+        sys.exit(1)
+    # solutions are saved with their storage policies (1-D samples only)
+    for problem_update in problem_updates:
+        if dict(problem_description, **problem_update).get(
+                "geometry", "1d") != "1d":
+            print("Error, sweeps are only available for 1-D samples")
+            sys.exit(1)
+    for directory in sweep_paths(work_directory):
+        os.makedirs(directory, exist_ok=True)
+    if storage is None:
+        storage = problem_description.get("storage") or default_storage
+
+    task_ids = [f"{index:06d}" for index in range(len(problem_updates))]
+    for task_id, problem_update in zip(task_ids, problem_updates):
+        task = {"task_id": task_id, "attempts": 0,
+                "problem_update": json_compatible(problem_update),
+                "problem_description": json_compatible(dict(
+                    problem_description, **problem_update,
+                    storage=storage))}
+        write_atomically(os.path.join(work_directory, "pending",
+                                      f"{task_id}.json"), json.dumps(task))
+    write_atomically(os.path.join(work_directory, "sweep.json"), json.dumps(
+        {"problem_description": json_compatible(problem_description),
+         "storage": storage, "task_ids": task_ids}))
+    return task_ids
+
+
+def claim_task(work_directory, worker_id):
+    """Claims the first pending task that no other worker claims first.
+    Returns the name of its running file (None if there are no pending
+    tasks)"""
+    pending, running, _ = sweep_paths(work_directory)
+    for file_name in sorted(os.listdir(pending)):
+        if not file_name.endswith(".json"):
+            continue
+        task_id = file_name[:-len(".json")]
+        running_file = os.path.join(running, f"{task_id}.{worker_id}.json")
+        try:
+            os.rename(os.path.join(pending, file_name), running_file)
+        except FileNotFoundError:
+            # claimed by another worker
+            continue
+        os.utime(running_file)
+        return running_file
+    return None
+
+
+def reclaim_stale_tasks(work_directory, stale_timeout):
+    """Moves the running tasks whose heartbeat is older than stale_timeout
+    seconds back to pending (or discards them if their result exists).
+    Returns the ids of the tasks reclaimed"""
+    pending, running, results = sweep_paths(work_directory)
+    now = filesystem_time(work_directory)
+    reclaimed = []
+    for file_name in os.listdir(running):
+        if not file_name.endswith(".json"):
+            continue
+        running_file = os.path.join(running, file_name)
+        task_id = file_name.split(".")[0]
+        try:
+            if now - os.stat(running_file).st_mtime < stale_timeout:
+                continue
+            if os.path.exists(os.path.join(results, f"{task_id}.json")):
+                # the worker stopped after writing the result
+                os.remove(running_file)
+            else:
+                os.rename(running_file,
+                          os.path.join(pending, f"{task_id}.json"))
+                reclaimed.append(task_id)
+        except FileNotFoundError:
+            # finished or reclaimed by another process
+            continue
+    return reclaimed
+
+
+def heartbeat(running_file, interval, stop):
+    """Updates the modification time of the running file until stopped"""
+    while not stop.wait(interval):
+        try:
+            os.utime(running_file)
+        except FileNotFoundError:
+            return
+
+
+def solve_task(work_directory, running_file, worker_id, max_attempts,
+               heartbeat_interval):
+    """Solves a claimed task and writes its solution and summary"""
+    _, _, results = sweep_paths(work_directory)
+    with open(running_file) as f:
+        task = json.load(f)
+    task_id = task["task_id"]
+    task["attempts"] += 1
+    write_atomically(running_file, json.dumps(task))
+
+    summary = {"task_id": task_id, "worker_id": worker_id,
+               "attempts": task["attempts"],
+               "problem_update": task["problem_update"]}
+    if task["attempts"] > max_attempts:
+        summary.update(status="failed", error="maximum attempts exceeded")
+    else:
+        stop = threading.Event()
+        thread = threading.Thread(target=heartbeat, daemon=True, args=(
+            running_file, heartbeat_interval, stop))
+        thread.start()
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                solution = main_solver(problem_from_json(json.dumps(
+                    task["problem_description"])))
+            file_temporary = os.path.join(results,
+                                          f"{task_id}.{worker_id}.npz")
+            save_solution(file_temporary, solution)
+            os.replace(file_temporary,
+                       os.path.join(results, f"{task_id}.npz"))
+            summary.update(status="done",
+                           computing_time=solution["computing_time"],
+                           events=json_compatible(solution["events"],
+                                                  strict=False))
+        except SystemExit:
+            errors = [line for line in output.getvalue().splitlines()
+                      if line.startswith("Error")]
+            summary.update(status="failed",
+                           error=errors[-1] if errors else "solver exited")
+        except Exception as error:
+            summary.update(status="failed", error=repr(error))
+        finally:
+            stop.set()
+            thread.join()
+    write_atomically(os.path.join(results, f"{task_id}.json"),
+                     json.dumps(summary))
+    try:
+        os.remove(running_file)
+    except FileNotFoundError:
+        # reclaimed while solving (the result is kept)
+        pass
+    return summary
+
+
+def run_worker(work_directory, worker_id=None, stale_timeout=60,
+               heartbeat_interval=5, max_attempts=3, poll_interval=1,
+               wait_for_running=True):
+    """
+    Solves tasks of the sweep until none are left.
+
+    Parameters
+    ----------
+    work_directory : STR
+        work directory of the sweep.
+
+    worker_id : STR
+        id of the worker (host name and process id if None).
+
+    stale_timeout : FLOAT
+        seconds without heartbeat after which a running task is reclaimed.
+
+    heartbeat_interval : FLOAT
+        seconds between heartbeats (well below stale_timeout).
+
+    max_attempts : INT
+        number of times a task is claimed before it is reported failed.
+
+    poll_interval : FLOAT
+        seconds between checks of the pending tasks when none is available.
+
+    wait_for_running : BOOL
+        if True, the worker waits while other workers solve tasks (they may
+        crash and their tasks be reclaimed) instead of exiting.
+
+    Returns
+    -------
+    solved : INT
+        number of tasks the worker finished.
+
+    """
+    if worker_id is None:
+        worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    worker_id = worker_id.replace(".", "-")
+    _, running, _ = sweep_paths(work_directory)
+    solved = 0
+    while True:
+        reclaim_stale_tasks(work_directory, stale_timeout)
+        running_file = claim_task(work_directory, worker_id)
+        if running_file is not None:
+            solve_task(work_directory, running_file, worker_id, max_attempts,
+                       heartbeat_interval)
+            solved += 1
+        elif wait_for_running and any(
+                file_name.endswith(".json")
+                for file_name in os.listdir(running)):
+            time.sleep(poll_interval)
+        else:
+            return solved
+
+
+def sweep_progress(work_directory, stale_timeout=None):
+    """Returns the number of pending, running, done and failed tasks
+    (reclaiming stale tasks first if stale_timeout is given)"""
+    if stale_timeout is not None:
+        reclaim_stale_tasks(work_directory, stale_timeout)
+    pending, running, results = sweep_paths(work_directory)
+    progress = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+    for directory, status in [(pending, "pending"), (running, "running")]:
+        progress[status] = len([file_name
+                                for file_name in os.listdir(directory)
+                                if file_name.endswith(".json")])
+    for file_name in os.listdir(results):
+        if file_name.endswith(".json"):
+            with open(os.path.join(results, file_name)) as f:
+                progress[json.load(f)["status"]] += 1
+    return progress
+
+
+def merge_results(work_directory, file_name=None):
+    """
+    Merges the results of the sweep.
+
+    Parameters
+    ----------
+    work_directory : STR
+        work directory of the sweep.
+
+    file_name : STR
+        if given, the merged results are also written to this file (numpy
+        npz, arrays of every task prefixed by its id, and the summaries as
+        JSON).
+
+    Returns
+    -------
+    merged : DICT
+        for every task id, its summary (status, problem update, attempts,
+        computing time, events or error) and, if solved, the solution as
+        loaded by load_solution (None if not finished).
+
+    """
+    _, _, results = sweep_paths(work_directory)
+    with open(os.path.join(work_directory, "sweep.json")) as f:
+        task_ids = json.load(f)["task_ids"]
+    merged = {}
+    arrays = {}
+    for task_id in task_ids:
+        summary_file = os.path.join(results, f"{task_id}.json")
+        if not os.path.exists(summary_file):
+            merged[task_id] = None
+            continue
+        with open(summary_file) as f:
+            merged[task_id] = json.load(f)
+        if merged[task_id]["status"] == "done":
+            solution_file = os.path.join(results, f"{task_id}.npz")
+            merged[task_id]["solution"] = load_solution(solution_file)
+            with np.load(solution_file, allow_pickle=False) as data:
+                for key in data.files:
+                    arrays[f"{task_id}/{key}"] = data[key]
+    if file_name is not None:
+        summaries = {task_id: (None if summary is None else {
+            key: value for key, value in summary.items()
+            if key != "solution"}) for task_id, summary in merged.items()}
+        with open(file_name, "wb") as f:
+            np.savez_compressed(f, summaries=json.dumps(summaries), **arrays)
+    return merged
+
+
+def run_coordinator(work_directory, stale_timeout=60, poll_interval=5,
+                    file_name=None, timeout=None):
+    """Reports the progress of the sweep (reclaiming stale tasks) until
+    every task is finished, then merges the results (see merge_results).
+    Returns None if the timeout (in s) is reached first"""
+    time_start = time.time()
+    progress_previous = None
+    while True:
+        progress = sweep_progress(work_directory, stale_timeout)
+        if progress != progress_previous:
+            print(" ... " + ", ".join(f"{count} {status}" for status, count
+                                      in progress.items()))
+            progress_previous = progress
+        if progress["pending"] == 0 and progress["running"] == 0:
+            return merge_results(work_directory, file_name)
+        if timeout is not None and time.time() - time_start > timeout:
+            return None
+        time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ["worker", "coordinator"]:
+        print("Usage: python -m sweep.distributed_sweep "
+              "worker|coordinator <work_directory>")
+        sys.exit(1)
+    if sys.argv[1] == "worker":
+        print(f"Tasks solved: {run_worker(sys.argv[2])}")
+    else:
+        run_coordinator(sys.argv[2], file_name=os.path.join(
+            sys.argv[2], "merged.npz"))
@@ -0,0 +1,479 @@
+"""
+Uncertainty propagation.
+Samples of the uncertain inputs (thermophysical properties, surface
+properties and heat flux) are drawn with quasi-Monte Carlo (Sobol, Latin
+hypercube) or Monte Carlo sampling and solved in batches: all the samples of
+a batch are advanced together at every time step with batched tridiagonal
+solves. Only the statistics of the requested outputs are kept (running mean
+and variance, P-square quantiles), updated after every batch, and sampling
+stops once the estimates are stable.
+"""
+import sys
+import numpy as np
+from scipy import stats
+from scipy.stats import qmc
+
+# import from local project
+from classes_and_functions.solid_sample import solid_sample
+from classes_and_functions.heat_flux import ihf_function
+from classes_and_functions.calc_parameters import (tridiagonal_operator,
+                                                   surface_source,
+                                                   solve_tridiagonal,
+                                                   apply_tridiagonal)
+
+# inputs that can be uncertain (h_surface is h_total for linear losses and
+# h_convective for non-linear losses, ihf_factor multiplies the ihf)
+uncertain_inputs = ["conductivity", "density", "heat_capacity",
+                    "absorptivity", "emissivity", "h_surface", "ihf_factor"]
+
+# outputs whose statistics can be calculated (temperatures at the end of
+# the run, time at which the surface reaches the ignition temperature)
+study_outputs = ["ignition_time", "surface_temperature", "back_temperature"]
+
+stefan_boltz = 5.67e-8
+R = 8.314
+
+
+def make_distribution(specification):
+    """Returns a frozen scipy distribution, given as ("normal", mean, std),
+    ("lognormal", median, sigma), ("uniform", low, high), ("triangular",
+    low, mode, high) or as any object with a ppf method"""
+    if hasattr(specification, "ppf"):
+        return specification
+    kind, *parameters = specification
+    if kind == "normal":
+        mean, std = parameters
+        return stats.norm(mean, std)
+    elif kind == "lognormal":
+        median, sigma = parameters
+        return stats.lognorm(sigma, scale=median)
+    elif kind == "uniform":
+        low, high = parameters
+        return stats.uniform(low, high - low)
+    elif kind == "triangular":
+        low, mode, high = parameters
+        return stats.triang((mode - low) / (high - low), loc=low,
+                            scale=high - low)
+    raise ValueError(f"distribution {kind} not valid")
+
+
+def unit_sampler(sampling, dimensions, seed=None):
+    """Returns a function that draws n points in the unit hypercube, the
+    sequence continuing from one call to the next"""
+    if sampling == "sobol":
+        return qmc.Sobol(dimensions, scramble=True, rng=seed).random
+    elif sampling == "lhs":
+        return qmc.LatinHypercube(dimensions, rng=seed).random
+    elif sampling == "random":
+        generator = np.random.default_rng(seed)
+        return lambda n: generator.random((n, dimensions))
+
+
+class running_moments():
+    """
+    Mean and variance of a stream of values, updated with batches of values
+    (parallel form of Welford's algorithm). Non-finite values are ignored.
+    """
+
+    def __init__(self):
+        """initializes the moments with no values"""
+        self.count = 0
+        self.mean = np.nan
+        self.m2 = 0.0
+
+    def update(self, values):
+        """Adds a batch of values"""
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        mean_batch = values.mean()
+        m2_batch = np.sum((values - mean_batch)**2)
+        if self.count == 0:
+            self.count, self.mean, self.m2 = values.size, mean_batch, m2_batch
+            return
+        count = self.count + values.size
+        delta = mean_batch - self.mean
+        self.mean += delta * values.size / count
+        self.m2 += m2_batch + delta**2 * self.count * values.size / count
+        self.count = count
+
+    @property
+    def variance(self):
+        """Sample variance"""
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def standard_error(self):
+        """Standard error of the mean"""
+        return np.sqrt(self.variance / self.count) if self.count > 1 \
+            else np.nan
+
+
+class p2_quantile():
+    """
+    Estimate of a quantile of a stream of values with the P-square
+    algorithm (Jain and Chlamtac, 1985): five markers whose heights are
+    adjusted with parabolic interpolation, without storing the values.
+    Non-finite values are ignored.
+    """
+
+    def __init__(self, p):
+        """initializes the markers for the p quantile"""
+        self.p = p
+        self.heights = []
+        self.positions = np.arange(1, 6, dtype=float)
+        self.desired = np.array([1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5])
+        self.increments = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    def add(self, value):
+        """Adds a single value"""
+        if len(self.heights) < 5:
+            self.heights.append(value)
+            if len(self.heights) == 5:
+                self.heights = np.sort(np.array(self.heights))
+            return
+        q, n = self.heights, self.positions
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = np.searchsorted(q, value, side="right") - 1
+        n[k + 1:] += 1
+        self.desired += self.increments
+
+        # adjust the heights of the middle markers
+        for i in [1, 2, 3]:
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (
+                    d <= -1 and n[i - 1] - n[i] < -1):
+                d = int(np.sign(d))
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) /
+                    (n[i + 1] - n[i]) +
+                    (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) /
+                    (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    # linear interpolation if the parabola is not monotonic
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def update(self, values):
+        """Adds a batch of values"""
+        for value in np.asarray(values, dtype=float).ravel():
+            if np.isfinite(value):
+                self.add(value)
+
+    @property
+    def value(self):
+        """Current estimate of the quantile"""
+        if len(self.heights) < 5:
+            return (np.quantile(self.heights, self.p) if self.heights
+                    else np.nan)
+        return self.heights[2]
+
+
+def solve_batch(problem_description, mesh, inputs, outputs,
+                ignition_temperature=None):
+    """
+    Solves the samples of a batch together (lagged Crank-Nicolson scheme of
+    the direct solver, with its tridiagonal operator, one system per sample
+    at every time step). inputs contains arrays (one value per sample) of
+    the uncertain inputs. Returns the outputs (one value per sample),
+    without storing the temperature fields.
+    """
+    samples = next(iter(inputs.values())).shape[0]
+    space_mesh, temporal_mesh = mesh["space_mesh"], mesh["temporal_mesh"]
+    dx = space_mesh[1] - space_mesh[0]
+    dt = temporal_mesh[1] - temporal_mesh[0]
+    boundcond_surface = problem_description["boundcond_surface"]
+    temperature_ambient = problem_description["temperature_ambient"]
+
+    # properties of every sample (base values as columns, samples x 1)
+    coefficients = {}
+    for property_name in ["conductivity", "density", "heat_capacity"]:
+        base, exponent = problem_description[f"{property_name}_coeff"]
+        coefficients[property_name] = (
+            inputs.get(property_name, np.full(samples, float(base)))[
+                :, np.newaxis],
+            0 if exponent is None else float(exponent))
+
+    def properties(temperatures):
+        return [base * (temperatures / 300)**exponent
+                for base, exponent in coefficients.values()]
+
+    # surface boundary condition of every sample
+    if boundcond_surface == "robin":
+        linear = problem_description["surface_losses_type"] == "linear"
+        absorptivity_nominal = problem_description.get("absorptivity")
+        if absorptivity_nominal is None:
+            absorptivity_nominal = 1
+        absorptivity = inputs.get("absorptivity",
+                                  np.full(samples, absorptivity_nominal))
+        h_surface = inputs.get("h_surface", np.full(samples, float(
+            problem_description["h_total" if linear else "h_convective"])))
+        emissivity = (0 if linear else inputs.get(
+            "emissivity", np.full(samples, float(
+                problem_description["emissivity"]))))
+        ihf = (inputs.get("ihf_factor", np.ones(samples))[:, np.newaxis] *
+               mesh["ihf"][np.newaxis, :])
+
+    # pyrolysis
+    reactive = problem_description["material_type"] == "reactive"
+    if reactive:
+        pre_exp_factor, activation_energy, heat_reaction = [
+            float(problem_description[property_name]) for property_name in
+            ["pre_exp_factor", "activation_energy", "heat_reaction"]]
+
+    temperatures = np.zeros((samples, space_mesh.shape[0])) + \
+        problem_description["temperature_initial"]
+    results = {output: np.full(samples, np.inf) for output in outputs}
+
+    for t_step in range(temporal_mesh.shape[0] - 1):
+        conductivity, density, heat_capacity = properties(temperatures)
+        fo = conductivity * dt / (density * heat_capacity * dx**2)
+        source = np.zeros_like(temperatures)
+
+        # dk/dT (dT/dx)^2 term of temperature dependent conductivity (Upsilon)
+        base, exponent = coefficients["conductivity"]
+        if exponent != 0:
+            source += (exponent * base / 300 * (temperatures / 300)**(
+                exponent - 1) * np.gradient(temperatures, dx, axis=1)**2 *
+                dt / (density * heat_capacity))
+        # heat of the pyrolysis reaction
+        if reactive:
+            source -= (heat_reaction * density * pre_exp_factor * np.exp(
+                - activation_energy / R / temperatures) * dt /
+                (density * heat_capacity))
+
+        # surface boundary condition, losses linearized at t=n
+        h_total = None
+        if boundcond_surface == "neunman":
+            source[:, 0] += surface_source(fo[:, 0], dx, conductivity[:, 0],
+                                           problem_description["nhf"])
+        elif boundcond_surface == "robin":
+            temperature_surface = temperatures[:, 0]
+            h_total = h_surface + emissivity * stefan_boltz * (
+                temperature_surface**2 + temperature_ambient**2) * (
+                    temperature_surface + temperature_ambient)
+            source[:, 0] += surface_source(
+                fo[:, 0], dx, conductivity[:, 0],
+                absorptivity * (ihf[:, t_step] + ihf[:, t_step + 1]) / 2 +
+                h_total * temperature_ambient)
+        lower, diag, upper = tridiagonal_operator(
+            problem_description, fo, dx, conductivity[:, 0], h_total)
+
+        rhs = (temperatures + apply_tridiagonal(lower, diag, upper,
+                                                temperatures) / 2 + source)
+        if boundcond_surface == "dirichlet":
+            rhs[:, 0] = problem_description["temperature_surface"]
+        temperatures_new = solve_tridiagonal(- lower / 2, 1 - diag / 2,
+                                             - upper / 2, rhs)
+
+        # time at which the surface reaches the ignition temperature
+        if "ignition_time" in outputs:
+            ignited = ((temperatures_new[:, 0] >= ignition_temperature) &
+                       np.isinf(results["ignition_time"]))
+            results["ignition_time"][ignited] = temporal_mesh[t_step] + dt * (
+                np.clip((ignition_temperature - temperatures[ignited, 0]) /
+                        (temperatures_new[ignited, 0] -
+                         temperatures[ignited, 0]), 0, 1))
+            if (list(outputs) == ["ignition_time"] and
+                    np.all(np.isfinite(results["ignition_time"]))):
+                break
+        temperatures = temperatures_new
+
+    if "surface_temperature" in outputs:
+        results["surface_temperature"] = temperatures[:, 0]
+    if "back_temperature" in outputs:
+        results["back_temperature"] = temperatures[:, -1]
+
+    return results
+
+
+def uncertainty_study(problem_description, uncertain,
+                      outputs=("back_temperature",),
+                      quantiles=(0.05, 0.5, 0.95), sampling="sobol",
+                      batch_size=64, max_samples=4096, tolerance=0.01,
+                      ignition_temperature=None, seed=None):
+    """
+    Propagates the uncertainty of the inputs to the outputs.
+
+    Parameters
+    ----------
+    problem_description : DICT
+        Description of the heat transfer problem (see main_solver), with the
+        nominal values of the inputs. 1-D direct problems with an insulated
+        back face. The time step is the one of the nominal problem (or
+        "time_step"), common to all the samples.
+
+    uncertain : DICT
+        Distribution of every uncertain input (names in uncertain_inputs),
+        as ("normal", mean, std), ("lognormal", median, sigma), ("uniform",
+        low, high), ("triangular", low, mode, high) or a frozen scipy
+        distribution. Inputs are sampled independently.
+
+    outputs : LIST
+        Names in study_outputs.
+
+    quantiles : LIST
+        Probabilities of the quantiles estimated for every output.
+
+    sampling : STR
+        "sobol" (scrambled), "lhs" (Latin hypercube, per batch) or "random".
+
+    batch_size : INT
+        Number of samples solved together (a power of two for "sobol").
+
+    max_samples : INT
+        Maximum number of samples (rounded up to a multiple of the batch
+        size for "sobol", so that every batch keeps the balance of the
+        sequence).
+
+    tolerance : FLOAT
+        Sampling stops when, for every output, the standard error of the
+        mean and the change of the quantiles over the last batch are below
+        tolerance times the mean.
+
+    ignition_temperature : FLOAT
+        Surface temperature in K that defines ignition (for
+        "ignition_time"). Samples that do not ignite are not included in the
+        statistics of the ignition time.
+
+    seed : INT
+        Seed of the sampler.
+
+    Returns
+    -------
+    results : DICT
+        Number of samples, whether the statistics converged, the statistics
+        of every output (mean, variance, standard error, quantiles and
+        number of values), the history of the means and standard errors
+        after every batch and, for "ignition_time", the fraction of samples
+        that ignited.
+
+    """
+    # validate the problem and the study parameters
+    sample = solid_sample(problem_description)
+    sample.validate_input(problem_description)
+    if (problem_description["problem_type"] != "direct" or
+            problem_description.get("geometry", "1d") != "1d" or
+            problem_description["boundcond_back"] != "insulated"):
+        print("Error, uncertainty study needs a 1-D direct problem with an "
+              "insulated back face")
+        sys.exit(1)
+    distributions = {}
+    for input_name, specification in uncertain.items():
+        if input_name not in uncertain_inputs or (
+                input_name in ["absorptivity", "h_surface", "ihf_factor",
+                               "emissivity"] and
+                problem_description["boundcond_surface"] != "robin") or (
+                input_name == "emissivity" and problem_description[
+                    "surface_losses_type"] != "non-linear"):
+            print(f"Error, uncertain input {input_name} not valid")
+            sys.exit(1)
+        try:
+            distributions[input_name] = make_distribution(specification)
+        except (ValueError, TypeError):
+            print(f"Error, distribution of {input_name} not valid")
+            sys.exit(1)
+    if len(distributions) == 0:
+        print("Error, uncertainty study needs uncertain inputs")
+        sys.exit(1)
+    for output in outputs:
+        if output not in study_outputs:
+            print(f"Error, uncertainty study output {output} not valid")
+            sys.exit(1)
+    if "ignition_time" in outputs and ignition_temperature is None:
+        print("Error, ignition time needs an ignition temperature")
+        sys.exit(1)
+    if sampling not in ["sobol", "lhs", "random"]:
+        print("Error, sampling not valid")
+        sys.exit(1)
+    if int(batch_size) != batch_size or batch_size < 2:
+        print("Error, batch size not valid")
+        sys.exit(1)
+    if sampling == "sobol":
+        if batch_size & (batch_size - 1) != 0:
+            print("Error, batch size of sobol sampling must be a power of "
+                  "two")
+            sys.exit(1)
+        max_samples = -(-max_samples // batch_size) * batch_size
+
+    # meshes of the nominal problem
+    space_mesh = np.linspace(0, problem_description["depth"],
+                             problem_description["x_divisions"])
+    dt = problem_description.get("time_step")
+    if dt is None:
+        diffusivity = problem_description["conductivity_coeff"][0] / (
+            problem_description["density_coeff"][0] *
+            problem_description["heat_capacity_coeff"][0])
+        dt = (1/6)*((space_mesh[1] - space_mesh[0])**2/diffusivity)
+    temporal_mesh = np.arange(0, problem_description["time_total"], dt)
+    mesh = {"space_mesh": space_mesh, "temporal_mesh": temporal_mesh}
+    if problem_description["boundcond_surface"] == "robin":
+        mesh["ihf"] = ihf_function(problem_description["ihf_type"],
+                                   problem_description["ihf_coefficients"])(
+                                       temporal_mesh)
+
+    draw = unit_sampler(sampling, len(distributions), seed)
+    moments = {output: running_moments() for output in outputs}
+    estimators = {output: [p2_quantile(p) for p in quantiles]
+                  for output in outputs}
+    history = []
+    samples, ignited = 0, 0
+    converged = False
+
+    while samples < max_samples and not converged:
+        # draw the batch and solve it
+        points = draw(min(batch_size, max_samples - samples))
+        inputs = {input_name: distribution.ppf(points[:, dimension])
+                  for dimension, (input_name, distribution)
+                  in enumerate(distributions.items())}
+        values = solve_batch(problem_description, mesh, inputs, outputs,
+                             ignition_temperature)
+        samples += points.shape[0]
+        print(f"Uncertainty study: {samples} samples solved")
+
+        # update the statistics and check their convergence
+        converged = True
+        for output in outputs:
+            quantiles_previous = np.array([estimator.value for estimator
+                                           in estimators[output]])
+            moments[output].update(values[output])
+            for estimator in estimators[output]:
+                estimator.update(values[output])
+            quantiles_current = np.array([estimator.value for estimator
+                                          in estimators[output]])
+            scale = tolerance * abs(moments[output].mean)
+            converged &= bool(
+                moments[output].standard_error <= scale and
+                np.all(np.abs(quantiles_current - quantiles_previous) <=
+                       scale))
+        if "ignition_time" in outputs:
+            ignited += np.count_nonzero(np.isfinite(values["ignition_time"]))
+        history.append({"samples": samples,
+                        "mean": {output: moments[output].mean
+                                 for output in outputs},
+                        "standard_error": {output:
+                                           moments[output].standard_error
+                                           for output in outputs}})
+
+    results = {"samples": samples, "converged": converged,
+               "statistics": {}, "history": history}
+    for output in outputs:
+        results["statistics"][output] = {
+            "mean": moments[output].mean,
+            "variance": moments[output].variance,
+            "standard_error": moments[output].standard_error,
+            "quantiles": {p: estimator.value for p, estimator
+                          in zip(quantiles, estimators[output])},
+            "count": moments[output].count}
+    if "ignition_time" in outputs:
+        results["ignition_fraction"] = ignited / samples
+
+    return results
@@ -1,12 +1,22 @@
 """
 Functions to calculate the analytical solutions to the heat diffusion
-equation for validation
+equation for validation (semi-infinite solid with constant properties).
+The time t can be a float, which returns the temperature profile, or an
+array of times, which returns the temperatures as nodes x times.
 """
 
+import sys
 import numpy as np
 from scipy import special
 
 
+def depth_and_time(s, t):
+    """Returns the depths of the nodes and the times, shaped so that they
+    broadcast to nodes x times (nodes only if t is a float)"""
+    t = np.asarray(t, dtype=float)
+    return s.space_mesh.reshape((-1,) + (1,) * t.ndim), t
+
+
 def calc_dirichlet(solution, t):
     """Analytical solution for a dirichlet boundary condition"""
     s = solution["sample"]
@@ -14,10 +24,11 @@ def calc_dirichlet(solution, t):
                    s.heat_capacity.iloc[0, 0])
     temperature_initial = solution["problem_description"][
         "temperature_initial"]
+    x, t = depth_and_time(s, t)
 
     temperature_profile = (s.temperature_surface + (
         temperature_initial - s.temperature_surface) * special.erf(
-            s.space_mesh / 2 / np.sqrt(diffusivity * t)))
+            x / 2 / np.sqrt(diffusivity * t)))
 
     return temperature_profile
 
@@ -30,29 +41,48 @@ def calc_neunman(solution, t):
     temperature_initial = solution["problem_description"][
         "temperature_initial"]
     q = solution["problem_description"]["nhf"]
+    x, t = depth_and_time(s, t)
 
     temperature_profile = (temperature_initial + (2 * q /
                                                   s.conductivity.iloc[0, 0]) *
                            np.sqrt(diffusivity * t / np.pi) * np.exp(
-                               - s.space_mesh**2 / (4 * diffusivity * t)) -
-                           (q * s.space_mesh / s.conductivity.iloc[0, 0]) *
-                           special.erfc(s.space_mesh / 2 / np.sqrt(
+                               - x**2 / (4 * diffusivity * t)) -
+                           (q * x / s.conductivity.iloc[0, 0]) *
+                           special.erfc(x / 2 / np.sqrt(
                                diffusivity * t)))
 
     return temperature_profile
 
 
 def calc_robin(solution, t):
-    """Analytical solution for a robin boundary condition"""
+    """Analytical solution for a robin boundary condition with a constant
+    incident heat flux and linear losses, equivalent to convection to the
+    temperature T_amb + absorptivity * ihf / h_total. The term
+    exp(h x / k + h^2 alpha t / k^2) erfc(eta + h sqrt(alpha t) / k) is
+    evaluated as exp(-eta^2) erfcx(eta + h sqrt(alpha t) / k) to avoid
+    overflow"""
+    problem_description = solution["problem_description"]
+    if (problem_description["surface_losses_type"] != "linear" or
+            problem_description["ihf_type"] != "constant"):
+        print("Error, robin analytical solution needs a constant incident "
+              "heat flux and linear surface losses")
+        sys.exit(1)
     s = solution["sample"]
-    diffusivity = (s.conductivity.iloc[0, 0] / s.density.iloc[0, 0] /
+    conductivity = s.conductivity.iloc[0, 0]
+    diffusivity = (conductivity / s.density.iloc[0, 0] /
                    s.heat_capacity.iloc[0, 0])
     temperature_initial = solution["problem_description"][
         "temperature_initial"]
-    h = solution["problem_description"]["h_convective"]
+    h = s.h_total
+    temperature_effective = (s.temperature_ambient + s.absorptivity *
+                             solution["problem_description"][
+                                 "ihf_coefficients"] / h)
+    x, t = depth_and_time(s, t)
 
-    temperature_profile = 0
+    eta = x / 2 / np.sqrt(diffusivity * t)
+    temperature_profile = temperature_initial + (
+        temperature_effective - temperature_initial) * (
+            special.erfc(eta) - np.exp(- eta**2) * special.erfcx(
+                eta + h * np.sqrt(diffusivity * t) / conductivity))
 
     return temperature_profile
-    
-    
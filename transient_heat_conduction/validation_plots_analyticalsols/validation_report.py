@@ -0,0 +1,243 @@
+"""
+Validation report.
+Solves every boundary condition with an analytical solution (dirichlet,
+neunman and robin with linear losses) with every direct method
+(Crank-Nicolson, TR-BDF2 and Duhamel) in parallel, compares the numerical
+temperatures with the analytical ones at every node and time step (as
+arrays, nodes x times), and writes a single HTML report with the error
+metrics and the plots of every case. Long time series are decimated for
+plotting keeping the minimum and maximum of every bucket, so oscillations
+and peaks of the error remain visible.
+
+Run from the transient_heat_conduction directory:
+    python -m validation_plots_analyticalsols.validation_report
+"""
+import io
+import sys
+import time
+import base64
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib import colormaps
+
+# import from local project
+from main_solver import main_solver
+from validation_plots_analyticalsols.calc_analytical import (
+    calc_dirichlet, calc_neunman, calc_robin)
+
+# problem shared by all the cases (semi-infinite for the total time)
+base_problem = {
+    "material": "pmma", "problem_type": "direct",
+    "depth": 0.03, "x_divisions": 61, "time_total": 300,
+    "properties_type": "constant",
+    "conductivity_coeff": (0.2, None), "density_coeff": (1196, None),
+    "heat_capacity_coeff": (1549, None),
+    "temperature_ambient": 288, "temperature_initial": 288,
+    "boundcond_surface": None, "temperature_surface": 800,
+    "nhf": 20000, "ihf_type": "constant", "ihf_coefficients": 40000,
+    "surface_losses_type": "linear", "h_total": 15,
+    "h_convective": None, "absorptivity": 0.9, "emissivity": None,
+    "boundcond_back": "insulated", "conductivity_subs": None,
+    "material_type": "inert", "pre_exp_factor": None,
+    "activation_energy": None, "heat_reaction": None,
+    "reaction_order": None, "in-depth_absorptivity": 0,
+    "time_step": 1}
+
+analytical_solutions = {"dirichlet": calc_dirichlet,
+                        "neunman": calc_neunman,
+                        "robin": calc_robin}
+
+direct_methods = {"crank_nicolson": {},
+                  "tr_bdf2": {"time_integrator": "tr_bdf2"},
+                  "duhamel": {"direct_method": "duhamel"}}
+
+# fraction of the total time after which the relative error is evaluated
+settling_fraction = 0.1
+
+validation_cases = [f"{boundary_condition}-{method}"
+                    for boundary_condition in analytical_solutions
+                    for method in direct_methods]
+
+
+def case_problem(name):
+    """Returns the problem description of a validation case"""
+    boundary_condition, method = name.split("-")
+    return dict(base_problem, boundcond_surface=boundary_condition,
+                **direct_methods[method])
+
+
+def minmax_decimate(values, points):
+    """Returns the indices of about points values (in order) that keep the
+    minimum and maximum of every bucket of consecutive values"""
+    n = values.shape[0]
+    if n <= points:
+        return np.arange(n)
+    buckets = max(points // 2, 1)
+    size = -(-n // buckets)
+    padded = np.concatenate([values, np.full(buckets * size - n,
+                                             values[-1])])
+    padded = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    indices = np.concatenate([offsets + np.argmin(padded, axis=1),
+                              offsets + np.argmax(padded, axis=1),
+                              [0, n - 1]])
+    return np.unique(np.clip(indices, 0, n - 1))
+
+
+def plot_case(name, space_mesh, times, numerical, analytical, points=1000):
+    """Returns the PNG (base64) of the temperature profiles at 8 times and
+    of the surface temperature and the maximum error over time"""
+    figure = Figure(figsize=(12, 4.5))
+    axes = figure.subplots(1, 2)
+    figure.suptitle(name)
+
+    # profiles: numerical (markers) and analytical (lines), one call each
+    columns = np.linspace(0, times.shape[0] - 1, 8).astype(int)
+    colors = colormaps["cividis"](np.linspace(0, 0.9, columns.shape[0]))
+    axes[0].set_prop_cycle(color=colors)
+    axes[0].plot(space_mesh, numerical[:, columns], "o", markersize=3,
+                 alpha=0.6)
+    axes[0].set_prop_cycle(color=colors)
+    axes[0].plot(space_mesh, analytical[:, columns], "-", linewidth=1)
+    axes[0].legend([f"{np.round(t, 1)} s" for t in times[columns]],
+                   fontsize=8, ncol=2)
+    axes[0].set_xlabel("Depth [m]")
+    axes[0].set_ylabel("Temperature [K]")
+
+    # surface temperature and maximum error over the nodes (decimated)
+    error = np.max(np.abs(numerical - analytical), axis=0)
+    kept = minmax_decimate(numerical[0], points)
+    axes[1].plot(times[kept], numerical[0, kept], label="numerical")
+    kept = minmax_decimate(analytical[0], points)
+    axes[1].plot(times[kept], analytical[0, kept], "--", label="analytical")
+    axes[1].set_xlabel("Time [s]")
+    axes[1].set_ylabel("Surface temperature [K]")
+    axes[1].legend(loc="lower right", fontsize=8)
+    axis_error = axes[1].twinx()
+    kept = minmax_decimate(error, points)
+    axis_error.plot(times[kept], error[kept], color="firebrick",
+                    linewidth=0.75)
+    axis_error.set_ylabel("Maximum error [K]", color="firebrick")
+    for axis in axes:
+        axis.grid(True, linestyle="--", linewidth=0.75, color="gainsboro")
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=80)
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def run_case(name, points=1000):
+    """Solves a validation case and returns its error metrics and plot"""
+    problem_description = case_problem(name)
+    time_start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution = main_solver(problem_description)
+    computing_time = time.perf_counter() - time_start
+    sample = solution["sample"]
+
+    # every node and time step at once (t=0 excluded, singular)
+    times = sample.temporal_mesh[1:]
+    numerical = sample.temperatures.values[:, 1:]
+    analytical = analytical_solutions[problem_description[
+        "boundcond_surface"]](solution, times)
+    error = numerical - analytical
+    temperature_rise = np.max(np.abs(
+        analytical - problem_description["temperature_initial"]))
+    # the first steps (penetration depth below the spacing) are not
+    # resolved by the mesh, so the relative error excludes them
+    settled = times >= settling_fraction * times[-1]
+    metrics = {"case": name, "nodes": sample.x_divisions,
+               "steps": times.shape[0], "computing_time": computing_time,
+               "max_error": float(np.max(np.abs(error))),
+               "rms_error": float(np.sqrt(np.mean(error**2))),
+               "surface_max_error": float(np.max(np.abs(error[0]))),
+               "relative_error": float(np.max(np.abs(error[:, settled])) /
+                                       temperature_rise)}
+    return metrics, plot_case(name, sample.space_mesh, times, numerical,
+                              analytical, points)
+
+
+def validation_report(file_name="validation_report.html", cases=None,
+                      workers=None, tolerance=0.02, points=1000):
+    """
+    Solves the validation cases in parallel and writes the HTML report.
+
+    Parameters
+    ----------
+    file_name : STR
+        HTML file of the report (plots embedded as PNG).
+
+    cases : LIST
+        names of the cases (all the validation cases if None).
+
+    workers : INT
+        number of processes (number of CPUs if None).
+
+    tolerance : FLOAT
+        maximum error relative to the temperature rise (after the settling
+        fraction of the total time) for a case to pass.
+
+    points : INT
+        approximate number of points of the decimated time series.
+
+    Returns
+    -------
+    metrics : LIST
+        error metrics of every case (with "passed").
+
+    """
+    cases = validation_cases if cases is None else cases
+    for name in cases:
+        if name not in validation_cases:
+            print(f"Error, validation case {name} not valid")
+            sys.exit(1)
+    time_start = time.perf_counter()
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = list(pool.map(run_case, cases, [points] * len(cases)))
+    for metrics, _ in results:
+        metrics["passed"] = metrics["relative_error"] < tolerance
+
+    rows = "\n".join(
+        f"<tr><td>{m['case']}</td><td>{m['nodes']}</td><td>{m['steps']}"
+        f"</td><td>{m['max_error']:.3f}</td><td>{m['rms_error']:.3f}</td>"
+        f"<td>{m['surface_max_error']:.3f}</td>"
+        f"<td>{m['relative_error'] * 100:.3f}</td>"
+        f"<td>{m['computing_time']:.2f}</td>"
+        f"<td>{'passed' if m['passed'] else 'FAILED'}</td></tr>"
+        for m, _ in results)
+    images = "\n".join(f'<h2>{m["case"]}</h2>\n<img src="data:image/png;'
+                       f'base64,{png}">' for m, png in results)
+    with open(file_name, "w") as f:
+        f.write(f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Validation report</title>
+<style>body {{font-family: sans-serif}} td, th {{padding: 2px 10px;
+text-align: right}} table {{border-collapse: collapse}}
+tr:nth-child(even) {{background: #f2f2f2}}</style></head><body>
+<h1>Validation against analytical solutions</h1>
+<p>Semi-infinite solid, constant properties. Errors in K over every node
+and time step; relative error = maximum error after
+{settling_fraction * 100:.0f} % of the total time / temperature rise
+(tolerance {tolerance * 100:.1f} %). Generated in
+{time.perf_counter() - time_start:.1f} s.</p>
+<table><tr><th>case</th><th>nodes</th><th>steps</th><th>max error</th>
+<th>rms error</th><th>surface max error</th><th>relative error %</th>
+<th>computing time s</th><th>status</th></tr>
+{rows}
+</table>
+{images}
+</body></html>
+""")
+    return [metrics for metrics, _ in results]
+
+
+if __name__ == "__main__":
+    metrics = validation_report(*sys.argv[1:2])
+    for m in metrics:
+        print(f"{m['case']:<24}{m['max_error']:>9.3f} K "
+              f"{m['relative_error'] * 100:>7.3f} %  "
+              f"{'passed' if m['passed'] else 'FAILED'}")